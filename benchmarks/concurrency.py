@@ -0,0 +1,210 @@
+"""
+Бенчмарк задержки обработчиков при одновременном импорте и отправке напоминаний.
+
+Для каждого профиля SQLite (настройки по умолчанию и профиль из core.database)
+в отдельном процессе запускаются:
+- импорт: файл CSV попеременно в двух версиях загружается снова и снова;
+- напоминания: короткие транзакции записи уведомления и сдвига next_reminder;
+- обработчики: запрос списка событий пользователя, как в «Мои события».
+
+    python -m benchmarks.concurrency --seconds 30 --rows 20000 --output bench_concurrency.json
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import random
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from benchmarks.ingest import CACHE_DIR, _git_revision
+from benchmarks.workbooks import cached_workbook
+
+# Пользователь, чьи события читают обработчики, и пользователь, загружающий файлы
+HANDLER_USER_ID = 1
+IMPORT_USER_ID = 2
+
+PROFILES = ("default", "production")
+
+
+def _percentile(values, share):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * share))]
+
+
+def _csv_version(rows, seed):
+    """CSV для нагрузки импортом: чтение дешёвое, основная работа — запись"""
+    path = os.path.join(CACHE_DIR, f"load_{rows}_{seed}.csv")
+    if not os.path.exists(path):
+        workbook = cached_workbook(CACHE_DIR, rows, 0.0, "iso", seed)
+        pd.read_excel(workbook, header=None, dtype=str).to_csv(path, sep=";", header=False, index=False)
+    return path
+
+
+def _run_profile(profile, db_path, seconds, rows, handler_threads, queue):
+    from sqlalchemy import create_engine
+    from sqlalchemy.exc import OperationalError
+
+    logging.basicConfig(level=logging.CRITICAL)
+
+    from core.database import Base, SessionLocal, apply_sqlite_profile
+    from models import Event, Notification, UploadedFile
+    from services.excel.parser import process_excel
+
+    engine = create_engine(f"sqlite:///{db_path}")
+    if profile == "production":
+        apply_sqlite_profile(engine)
+    Base.metadata.create_all(engine)
+    SessionLocal.configure(bind=engine)
+
+    versions = [_csv_version(rows, seed) for seed in (1, 2)]
+    process_excel(_csv_version(2000, 0), HANDLER_USER_ID, "handler.csv")
+
+    stop = threading.Event()
+    counters = {"imports": 0, "import_errors": 0, "reminders": 0, "reminder_errors": 0, "handler_errors": 0}
+    latencies = []
+    lock = threading.Lock()
+
+    def count(name):
+        with lock:
+            counters[name] += 1
+
+    def importer():
+        attempt = 0
+        while not stop.is_set():
+            db = SessionLocal()
+            try:
+                # Сбрасываем хэш загрузки, иначе повторный импорт будет пропущен
+                db.query(UploadedFile).filter(UploadedFile.creator_id == IMPORT_USER_ID).delete()
+                db.commit()
+            finally:
+                db.close()
+            try:
+                process_excel(versions[attempt % 2], IMPORT_USER_ID, "load.csv")
+                count("imports")
+            except ValueError:
+                count("import_errors")
+            attempt += 1
+
+    def reminders():
+        rnd = random.Random(0)
+        while not stop.is_set():
+            db = SessionLocal()
+            try:
+                event = db.query(Event).filter(Event.creator_id == HANDLER_USER_ID).offset(rnd.randrange(1000)).first()
+                now = datetime.now()
+                db.add(Notification(
+                    event_id=event.event_id,
+                    user_id=HANDLER_USER_ID,
+                    type="TELEGRAM",
+                    status="SENT",
+                    scheduled_at=now,
+                    sent_at=now,
+                    created_at=now
+                ))
+                event.next_reminder = now + timedelta(days=30)
+                db.commit()
+                count("reminders")
+            except OperationalError:
+                db.rollback()
+                count("reminder_errors")
+            finally:
+                db.close()
+            time.sleep(0.005)
+
+    def handler():
+        while not stop.is_set():
+            start = time.perf_counter()
+            db = SessionLocal()
+            try:
+                db.query(Event).filter(
+                    Event.creator_id == HANDLER_USER_ID,
+                    Event.is_active == True
+                ).order_by(Event.file_name, Event.event_date).all()
+                elapsed = time.perf_counter() - start
+                with lock:
+                    latencies.append(elapsed * 1000)
+            except OperationalError:
+                count("handler_errors")
+            finally:
+                db.close()
+            time.sleep(0.01)
+
+    threads = [threading.Thread(target=importer), threading.Thread(target=reminders)]
+    threads += [threading.Thread(target=handler) for _ in range(handler_threads)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+
+    queue.put({
+        "profile": profile,
+        "handler_queries": len(latencies),
+        "handler_p50_ms": round(_percentile(latencies, 0.5), 2) if latencies else None,
+        "handler_p95_ms": round(_percentile(latencies, 0.95), 2) if latencies else None,
+        "handler_p99_ms": round(_percentile(latencies, 0.99), 2) if latencies else None,
+        "handler_max_ms": round(max(latencies), 2) if latencies else None,
+        **counters,
+    })
+
+
+def run_profile(profile, seconds, rows, handler_threads=2):
+    """Один профиль в отдельном процессе и в чистой базе"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        context = multiprocessing.get_context("spawn")
+        queue = context.Queue()
+        process = context.Process(
+            target=_run_profile,
+            args=(profile, os.path.join(tmp_dir, "bench.db"), seconds, rows, handler_threads, queue)
+        )
+        process.start()
+        result = queue.get()
+        process.join()
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Задержка обработчиков при одновременной нагрузке на базу")
+    parser.add_argument("--profiles", nargs="+", choices=PROFILES, default=list(PROFILES))
+    parser.add_argument("--seconds", type=int, default=30)
+    parser.add_argument("--rows", type=int, default=20000, help="строк в загружаемом файле")
+    parser.add_argument("--handlers", type=int, default=2, help="потоков, выполняющих запросы обработчиков")
+    parser.add_argument("--output", default="bench_concurrency.json")
+    args = parser.parse_args(argv)
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    results = []
+    for profile in args.profiles:
+        result = run_profile(profile, args.seconds, args.rows, args.handlers)
+        print(
+            f"{profile:>10}: обработчики p50 {result['handler_p50_ms']} мс, p95 {result['handler_p95_ms']} мс, "
+            f"p99 {result['handler_p99_ms']} мс, ошибок блокировки: {result['handler_errors']}; "
+            f"импортов: {result['imports']}, напоминаний: {result['reminders']} "
+            f"(ошибок {result['reminder_errors']})"
+        )
+        results.append(result)
+
+    report = {
+        "revision": _git_revision(),
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "seconds": args.seconds,
+        "rows": args.rows,
+        "profiles": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"Результаты сохранены в {args.output}")
+
+
+if __name__ == "__main__":
+    main()
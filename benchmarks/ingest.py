@@ -0,0 +1,163 @@
+"""
+Бенчмарк импорта Excel.
+
+Генерирует книги нужного размера, импортирует каждую в отдельном процессе
+во временную базу SQLite и сохраняет результаты в JSON для сравнения между коммитами:
+
+    python -m benchmarks.ingest --rows 10000 100000 1000000 --error-rate 0.01 --output bench_ingest.json
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.workbooks import DATE_STYLES, cached_workbook
+
+DEFAULT_ROWS = (10000, 100000, 1000000)
+CACHE_DIR = os.path.join(tempfile.gettempdir(), "reminder_bot_bench")
+
+logger = logging.getLogger(__name__)
+
+
+def _peak_rss_mb():
+    """Пиковое потребление памяти текущим процессом"""
+    try:
+        import resource
+        # На Linux ru_maxrss в килобайтах
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    except ImportError:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / 1024 / 1024
+
+
+def _run_import(path, db_path, repeat, queue):
+    """Импорт в отдельном процессе: пиковая память не смешивается с генерацией книг и прошлыми прогонами"""
+    from sqlalchemy import create_engine, event
+
+    # Построчные ошибки валидации не выводим: в отчёт идёт только их количество
+    logging.basicConfig(level=logging.CRITICAL)
+
+    from core.database import Base, SessionLocal
+    import models  # noqa: F401
+    from models import UploadedFile
+    from services.excel.parser import process_excel
+
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(engine)
+    SessionLocal.configure(bind=engine)
+
+    statements = {"count": 0}
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def count_statement(*args):
+        statements["count"] += 1
+
+    runs = []
+    for attempt in range(1 + repeat):
+        if attempt:
+            # Повторная загрузка того же файла: хэш сбрасывается, чтобы импорт не был пропущен,
+            # и замеряется upsert, при котором все строки уже есть в базе без изменений
+            db = SessionLocal()
+            db.query(UploadedFile).delete()
+            db.commit()
+            db.close()
+
+        statements["count"] = 0
+        stats = {}
+        start = time.perf_counter()
+        result = process_excel(path, 1, os.path.basename(path), stats=stats)
+        elapsed = time.perf_counter() - start
+        runs.append({
+            "kind": "reimport_unchanged" if attempt else "import",
+            "seconds": round(elapsed, 3),
+            "sql_statements": statements["count"],
+            "stages": {name: round(value, 3) for name, value in stats.items()},
+            "created": result.created,
+            "updated": result.updated,
+            "unchanged": result.unchanged,
+            "errors": len(result.errors),
+        })
+
+    queue.put({"runs": runs, "peak_rss_mb": round(_peak_rss_mb(), 1)})
+
+
+def run_case(rows, error_rate, date_style, repeat=0, seed=0):
+    """Один сценарий: книга на rows строк, импорт в чистую базу"""
+    path = cached_workbook(CACHE_DIR, rows, error_rate, date_style, seed)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        context = multiprocessing.get_context("spawn")
+        queue = context.Queue()
+        process = context.Process(
+            target=_run_import, args=(path, os.path.join(tmp_dir, "bench.db"), repeat, queue)
+        )
+        process.start()
+        measured = queue.get()
+        process.join()
+
+    for run in measured["runs"]:
+        run["rows_per_second"] = round(rows / run["seconds"]) if run["seconds"] else None
+
+    return {
+        "rows": rows,
+        "error_rate": error_rate,
+        "date_style": date_style,
+        "file_size_mb": round(os.path.getsize(path) / 1024 / 1024, 2),
+        "peak_rss_mb": measured["peak_rss_mb"],
+        "runs": measured["runs"],
+    }
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарк импорта Excel")
+    parser.add_argument("--rows", type=int, nargs="+", default=list(DEFAULT_ROWS))
+    parser.add_argument("--error-rate", type=float, default=0.01)
+    parser.add_argument("--date-style", choices=["mixed", *DATE_STYLES], default="mixed")
+    parser.add_argument("--repeat", type=int, default=1, help="сколько раз повторно импортировать тот же файл")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="bench_ingest.json")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+
+    import pandas as pd
+    import sqlalchemy
+
+    cases = []
+    for rows in args.rows:
+        case = run_case(rows, args.error_rate, args.date_style, args.repeat, args.seed)
+        first = case["runs"][0]
+        print(
+            f"{rows:>9} строк: {first['seconds']:.2f} c, {first['rows_per_second']} строк/с, "
+            f"SQL: {first['sql_statements']}, память: {case['peak_rss_mb']} МБ, этапы: {first['stages']}"
+        )
+        cases.append(case)
+
+    report = {
+        "revision": _git_revision(),
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "sqlalchemy": sqlalchemy.__version__,
+        "cases": cases,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"Результаты сохранены в {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Генератор синтетических книг Excel в формате импорта (7 колонок, см. COLUMN_ORDER)"""
+import os
+import random
+from datetime import datetime, timedelta
+
+from openpyxl import Workbook
+
+HEADER = [
+    "Событие",
+    "Дата наступления",
+    "За сколько дней напомнить",
+    "Повтор события",
+    "Периодичность (мес)",
+    "Email ответственного",
+    "ID ответственных"
+]
+
+# Форматы записи даты в ячейке: строкой в одном из поддерживаемых форматов или значением даты Excel
+DATE_STYLES = {
+    "iso": lambda d: d.strftime("%Y-%m-%d"),
+    "iso_datetime": lambda d: d.strftime("%Y-%m-%d %H:%M:%S"),
+    "dotted": lambda d: d.strftime("%d.%m.%Y"),
+    "excel": lambda d: d,
+}
+
+# Виды ошибок в строке
+_ERRORS = (
+    lambda row: row.__setitem__(0, None),          # пустое название
+    lambda row: row.__setitem__(1, "31.31.2024"),  # некорректная дата
+    lambda row: row.__setitem__(2, "три"),         # нечисловое количество дней
+)
+
+
+def make_row(idx, rnd, date_style, error_rate):
+    """Одна строка данных; с вероятностью error_rate в ней есть ошибка"""
+    event_date = datetime(2025, 1, 1) + timedelta(days=rnd.randrange(730))
+    style = rnd.choice(list(DATE_STYLES)) if date_style == "mixed" else date_style
+    monthly = rnd.random() < 0.3
+    row = [
+        f"Событие {idx}",
+        DATE_STYLES[style](event_date),
+        rnd.randrange(1, 30),
+        "Ежемесячно" if monthly else "Нет",
+        rnd.choice((1, 3, 6, 12)) if monthly else "нет",
+        f"user{idx % 500}@example.com",
+        ",".join(str(100000 + rnd.randrange(1000)) for _ in range(rnd.randrange(1, 3))),
+    ]
+    if rnd.random() < error_rate:
+        rnd.choice(_ERRORS)(row)
+    return row
+
+
+def generate_workbook(path, rows, error_rate=0.0, date_style="mixed", seed=0):
+    """
+    Запись книги с rows строками данных.
+
+    Args:
+        path: куда сохранить .xlsx
+        rows: количество строк данных (без заголовка)
+        error_rate: доля строк с ошибками
+        date_style: один из DATE_STYLES или "mixed"
+        seed: зерно генератора для воспроизводимости
+
+    Returns:
+        path
+    """
+    if date_style != "mixed" and date_style not in DATE_STYLES:
+        raise ValueError(f"Неизвестный формат даты: {date_style}")
+
+    rnd = random.Random(seed)
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("События")
+    sheet.append(HEADER)
+    for idx in range(rows):
+        sheet.append(make_row(idx, rnd, date_style, error_rate))
+    workbook.save(path)
+    return path
+
+
+def cached_workbook(directory, rows, error_rate=0.0, date_style="mixed", seed=0):
+    """Книга из кэша каталога; генерируется только при первом запросе с такими параметрами"""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"events_{rows}_{error_rate}_{date_style}_{seed}.xlsx")
+    if not os.path.exists(path):
+        generate_workbook(path, rows, error_rate, date_style, seed)
+    return path
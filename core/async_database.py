@@ -0,0 +1,80 @@
+"""
+Асинхронный доступ к той же базе через расширение asyncio SQLAlchemy.
+
+Драйвер выбирается по DATABASE_URL: aiosqlite для SQLite, asyncpg для PostgreSQL.
+Engine создаётся при первом обращении, поэтому без установленного драйвера
+синхронная часть бота продолжает работать.
+"""
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from config.settings import DATABASE_URL
+from core.database import _engine_options, apply_sqlite_profile
+
+# Асинхронный драйвер для каждой СУБД
+ASYNC_DRIVERS = {
+    "sqlite": "aiosqlite",
+    "postgresql": "asyncpg",
+}
+
+_async_engine = None
+
+
+def async_url(url=DATABASE_URL):
+    """URL с асинхронным драйвером: sqlite:///... -> sqlite+aiosqlite:///..."""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"Асинхронный доступ не поддерживается для {backend}")
+    return url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+
+
+def create_async_db_engine(url=DATABASE_URL):
+    """AsyncEngine с теми же настройками пула и PRAGMA SQLite, что и синхронный engine"""
+    url = async_url(url)
+    options = _engine_options(str(url))
+    if "poolclass" in options:
+        # Пул с ожиданием соединения через asyncio вместо блокировки потока
+        options["poolclass"] = AsyncAdaptedQueuePool
+    try:
+        db_engine = create_async_engine(url, **options)
+    except ImportError:
+        raise ValueError(f"Для асинхронного доступа к базе необходимо установить пакет {url.get_driver_name()}")
+    if db_engine.dialect.name == "sqlite":
+        apply_sqlite_profile(db_engine.sync_engine)
+    return db_engine
+
+
+def get_async_engine():
+    """Общий AsyncEngine процесса"""
+    global _async_engine
+    if _async_engine is None:
+        _async_engine = create_async_db_engine()
+    return _async_engine
+
+
+# Фабрика асинхронных сессий; объекты не истекают после commit — к ним нельзя обращаться с ленивой загрузкой
+AsyncSessionLocal = sessionmaker(class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+
+def async_session():
+    """
+    Новая AsyncSession, привязанная к общему AsyncEngine:
+
+        async with async_session() as db:
+            events = await get_active_events(db, user_id)
+    """
+    if AsyncSessionLocal.kw.get("bind") is None:
+        AsyncSessionLocal.configure(bind=get_async_engine())
+    return AsyncSessionLocal()
+
+
+async def dispose_async_engine():
+    """Закрытие соединений пула при остановке"""
+    global _async_engine
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+        AsyncSessionLocal.configure(bind=None)
@@ -1,11 +1,76 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import QueuePool
+
+from config.settings import (
+    DATABASE_URL, DATABASE_ECHO, DATABASE_POOL_SIZE, DATABASE_MAX_OVERFLOW, DATABASE_POOL_TIMEOUT,
+    DATABASE_POOL_RECYCLE, SQLITE_JOURNAL_MODE, SQLITE_SYNCHRONOUS, SQLITE_BUSY_TIMEOUT_MS,
+    SQLITE_MMAP_SIZE_MB, SQLITE_CACHE_SIZE_MB
+)
+
+# Параметры SQLite, которые выставляются при открытии каждого соединения
+SQLITE_PRAGMAS = {
+    "journal_mode": SQLITE_JOURNAL_MODE,
+    "synchronous": SQLITE_SYNCHRONOUS,
+    "busy_timeout": SQLITE_BUSY_TIMEOUT_MS,
+    "mmap_size": SQLITE_MMAP_SIZE_MB * 1024 * 1024,
+    # Отрицательное значение — размер кэша в килобайтах, а не в страницах
+    "cache_size": -SQLITE_CACHE_SIZE_MB * 1024,
+    "temp_store": "MEMORY",
+}
+
+
+def apply_sqlite_profile(engine, pragmas=None):
+    """Применение PRAGMA к каждому новому соединению engine SQLite"""
+    pragmas = SQLITE_PRAGMAS if pragmas is None else pragmas
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+    return engine
+
+
+def _engine_options(url):
+    options = {
+        "echo": DATABASE_ECHO,
+        "pool_size": DATABASE_POOL_SIZE,
+        "max_overflow": DATABASE_MAX_OVERFLOW,
+        "pool_timeout": DATABASE_POOL_TIMEOUT,
+    }
+    if url.startswith("sqlite"):
+        # SQLAlchemy 1.4 для файловой базы SQLite по умолчанию открывает новое соединение
+        # на каждую сессию (NullPool) и заново выполняет PRAGMA — держим соединения в пуле
+        options["poolclass"] = QueuePool
+        # Соединение из пула может достаться другому потоку: обработчики, импорт, периодические задачи
+        options["connect_args"] = {"check_same_thread": False}
+    else:
+        # Сервер БД или прокси закрывает простаивающие соединения: проверяем перед выдачей из пула
+        options["pool_pre_ping"] = True
+        options["pool_recycle"] = DATABASE_POOL_RECYCLE
+    return options
+
+
+def create_db_engine(url=DATABASE_URL):
+    """
+    Engine с настройками из окружения (DATABASE_URL, DATABASE_POOL_*).
+
+    Один engine на процесс: обработчики, импорт и периодические задачи
+    пользуются общим пулом соединений.
+    """
+    db_engine = create_engine(url, **_engine_options(url))
+    if db_engine.dialect.name == "sqlite":
+        apply_sqlite_profile(db_engine)
+    return db_engine
 
-# Настройка базы данных
-DATABASE_URL = "sqlite:///data/reminder_bot.db"
 
 # Создаем engine
-engine = create_engine(DATABASE_URL, echo=True)
+engine = create_db_engine()
 
 # Создаем фабрику сессий
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
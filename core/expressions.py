@@ -0,0 +1,27 @@
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+from sqlalchemy.types import Date
+
+
+class days_before(FunctionElement):
+    """
+    Дата за указанное количество дней до момента: days_before(Event.event_date, Event.remind_before).
+
+    Арифметика дат в SQLite и PostgreSQL записывается по-разному,
+    поэтому выражение компилируется отдельно для каждого диалекта.
+    """
+    type = Date()
+    name = "days_before"
+    inherit_cache = True
+
+
+@compiles(days_before)
+def _days_before_default(element, compiler, **kw):
+    moment, days = (compiler.process(clause, **kw) for clause in element.clauses)
+    return f"CAST({moment} - {days} * INTERVAL '1 day' AS DATE)"
+
+
+@compiles(days_before, "sqlite")
+def _days_before_sqlite(element, compiler, **kw):
+    moment, days = (compiler.process(clause, **kw) for clause in element.clauses)
+    return f"date({moment}, '-' || {days} || ' days')"
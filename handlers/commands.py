@@ -1,12 +1,13 @@
 import logging
 from datetime import datetime
-from datetime import timedelta
 
+from sqlalchemy.orm import Session
 from telegram import Update
 from telegram.ext import CallbackContext
 
-from core.database import SessionLocal
-from models import Event
+from services.events.cache import event_cache
+from services.events.queries import reminders_query
+from utils.decorators import db_session
 from .base import get_base_keyboard
 
 logger = logging.getLogger(__name__)
@@ -21,7 +22,7 @@ def format_event_message(event, detailed=False):
         f"🗓 Дата: {event.event_date.strftime('%d.%m.%Y')}\n"
         f"⏰ Время: {event_time.strftime('%H:%M')}\n"
         f"🔁 Повтор: {event.repeat_type or 'Нет'}\n"
-        f"👤 Ответственный: @{event.responsible_telegram_ids.split(',')[0] if event.responsible_telegram_ids else 'не указан'}"
+        f"👤 Ответственный: {event.responsible_telegram_ids or 'не указан'}"
     )
 
     if detailed:
@@ -41,99 +42,63 @@ def format_event_message(event, detailed=False):
 def start_command(update: Update, context: CallbackContext):
     """Обработчик команды /start"""
     user = update.effective_user
-    db = SessionLocal()
-    try:
-        message = (
-            f"Привет, {user.first_name}! 👋\n\n"
-            "Я помогу вам управлять событиями и напоминаниями.\n\n"
-            "Используйте кнопки меню для работы с событиями:"
-        )
-        keyboard = get_base_keyboard(user.id)
-        update.message.reply_text(message, reply_markup=keyboard)
-    finally:
-        db.close()
+    message = (
+        f"Привет, {user.first_name}! 👋\n\n"
+        "Я помогу вам управлять событиями и напоминаниями.\n\n"
+        "Используйте кнопки меню для работы с событиями:"
+    )
+    keyboard = get_base_keyboard(user.id)
+    update.message.reply_text(message, reply_markup=keyboard)
+
 
+# Разделы экрана напоминаний в порядке вывода
+REMINDER_BUCKETS = {
+    0: "⚠️ Просроченные события:\n",
+    1: "📅 События на сегодня:\n",
+    2: "🔔 Приближающиеся события:\n",
+}
 
-def reminders_command(update: Update, context: CallbackContext):
+def query_reminders(db: Session, user_id, current_date):
+    """
+    Напоминания пользователя одним запросом (services.events.queries.reminders_query).
+
+    Returns:
+        список (раздел, файл, событие, дата) в порядке раздела, файла и даты
+    """
+    return db.execute(reminders_query(user_id, current_date)).all()
+
+
+@db_session
+def reminders_command(update: Update, context: CallbackContext, db: Session):
     """Показать активные напоминания"""
     user_id = update.effective_user.id
     current_date = datetime.now().date()
-    one_month_ahead = current_date + timedelta(days=30)  # ограничение на один месяц
-    db = SessionLocal()
     try:
-        overdue_events = db.query(Event).filter(
-            Event.creator_id == user_id,
-            Event.is_active == True,
-            Event.event_date < current_date
-        ).order_by(Event.event_date).all()
-
-        today_events = db.query(Event).filter(
-            Event.creator_id == user_id,
-            Event.is_active == True,
-            Event.event_date == current_date
-        ).order_by(Event.event_date).all()
-
-        upcoming_events = []
-        all_future_events = db.query(Event).filter(
-            Event.creator_id == user_id,
-            Event.is_active == True,
-            Event.event_date > current_date,
-            Event.event_date <= one_month_ahead
-        ).order_by(Event.event_date).all()
-
-        for event in all_future_events:
-            remind_date = event.event_date - timedelta(days=event.remind_before)
-            if current_date >= remind_date.date():
-                upcoming_events.append(event)
-
-        logger.info(
-            f"Найдено: просрочено - {len(overdue_events)}, сегодня - {len(today_events)}, предстоящих - {len(upcoming_events)}")
-
-        if not any([overdue_events, today_events, upcoming_events]):
+        rows = query_reminders(db, user_id, current_date)
+
+        if not rows:
             update.message.reply_text("📭 Нет активных напоминаний")
             return
 
+        # Один проход по строкам, уже упорядоченным по разделу, файлу и дате
         message_parts = []
-
-        if overdue_events:
-            message_parts.append("⚠️ Просроченные события:\n")
-            grouped_overdue = {}
-            for event in overdue_events:
-                grouped_overdue.setdefault(event.file_name, []).append(event)
-
-            for file_name, events in grouped_overdue.items():
-                message_parts.append(f"📁 {file_name}\n")
-                message_parts.append("━━━━━━━━━━━━━━━\n")
-                for event in events:
-                    event_date = event.event_date.strftime('%d.%m.%Y')
-                    message_parts.append(f"📅 {event.event_name}: {event_date}\n")
-
-        if today_events:
-            message_parts.append("📅 События на сегодня:\n")
-            grouped_today = {}
-            for event in today_events:
-                grouped_today.setdefault(event.file_name, []).append(event)
-
-            for file_name, events in grouped_today.items():
+        counts = dict.fromkeys(REMINDER_BUCKETS, 0)
+        current_bucket = current_file = None
+        for bucket, file_name, event_name, event_date in rows:
+            if bucket != current_bucket:
+                message_parts.append(REMINDER_BUCKETS[bucket])
+                current_bucket, current_file = bucket, None
+            if file_name != current_file:
                 message_parts.append(f"📁 {file_name}\n")
                 message_parts.append("━━━━━━━━━━━━━━━\n")
-                for event in events:
-                    event_date = event.event_date.strftime('%d.%m.%Y')
-                    message_parts.append(f"📅 {event.event_name}: {event_date}\n")
+                current_file = file_name
 
-        if upcoming_events:
-            message_parts.append("🔔 Приближающиеся события:\n")
-            grouped_upcoming = {}
-            for event in upcoming_events:
-                grouped_upcoming.setdefault(event.file_name, []).append(event)
+            message_parts.append(f"📅 {event_name}: {event_date.strftime('%d.%m.%Y')}\n")
+            if bucket == 2:
+                message_parts.append(f"До события: {(event_date.date() - current_date).days} дней\n")
+            counts[bucket] += 1
 
-            for file_name, events in grouped_upcoming.items():
-                message_parts.append(f"📁 {file_name}\n")
-                message_parts.append("━━━━━━━━━━━━━━━\n")
-                for event in events:
-                    event_date = event.event_date.strftime('%d.%m.%Y')
-                    message_parts.append(f"📅 {event.event_name}: {event_date}\n")
-                    message_parts.append(f"До события: {(event.event_date.date() - current_date).days} дней\n")
+        logger.info(f"Найдено: просрочено - {counts[0]}, сегодня - {counts[1]}, предстоящих - {counts[2]}")
 
         final_message = "".join(message_parts)
         if len(final_message) > 4096:
@@ -145,21 +110,16 @@ def reminders_command(update: Update, context: CallbackContext):
     except Exception as e:
         logger.error(f"Ошибка при показе напоминаний: {e}")
         update.message.reply_text("❌ Ошибка при получении напоминаний")
-    finally:
-        db.close()
 
 
-def show_events(update: Update, context: CallbackContext):
+@db_session
+def show_events(update: Update, context: CallbackContext, db: Session):
     """Показ списка событий пользователя с группировкой по файлам"""
     user_id = update.effective_user.id
     logger.info(f"Запрос списка событий от пользователя {user_id}")
 
-    db = SessionLocal()
     try:
-        events = db.query(Event).filter(
-            Event.creator_id == user_id,
-            Event.is_active == True
-        ).order_by(Event.file_name, Event.event_date).all()
+        events = event_cache.get(db, user_id)
 
         if not events:
             update.message.reply_text(
@@ -211,7 +171,7 @@ def show_events(update: Update, context: CallbackContext):
                 message_parts.append("\n")
 
                 # Дополнительная информация (без email)
-                if event.responsible_telegram_ids and event.responsible_telegram_ids != "@не указан":
+                if event.responsible_telegram_ids:
                     message_parts.append(f"👤 {event.responsible_telegram_ids}\n")
                 if event.repeat_type and event.repeat_type.lower() != "нет":
                     message_parts.append(f"🔄 {event.repeat_type}")
@@ -256,8 +216,6 @@ def show_events(update: Update, context: CallbackContext):
             "❌ Произошла ошибка при получении списка событий.\n"
             "Пожалуйста, попробуйте позже или обратитесь к администратору."
         )
-    finally:
-        db.close()
 
 def handle_add_file(update: Update, context: CallbackContext):
     """Обработка команды 'Добавить файл'"""
@@ -271,5 +229,7 @@ def handle_add_file(update: Update, context: CallbackContext):
         "- Повтор события (Нет/Ежемесячно)\n"
         "- Периодичность (мес)\n"
         "- Ответственный (@username)\n"
-        "- Email ответственного"
+        "- Email ответственного\n\n"
+        "Можно загрузить книгу с несколькими листами или архив .zip с файлами Excel.\n"
+        "Те же колонки в том же порядке принимаются в файлах CSV (.csv, разделитель ; или ,) и Parquet (.parquet)."
     )
\ No newline at end of file
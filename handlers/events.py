@@ -1,25 +1,26 @@
 import logging
-from datetime import datetime
+from datetime import timedelta
 
+from sqlalchemy.orm import Session
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import CallbackContext
 
-from core.database import SessionLocal
 from models import Event
+from services.events.cache import event_cache
+from services.notifications.timing_wheel import reminder_wheel
+from utils.dates import parse_date
+from utils.decorators import db_session
 
 logger = logging.getLogger(__name__)
 
-def delete_event_request(update: Update, context: CallbackContext):
+@db_session
+def delete_event_request(update: Update, context: CallbackContext, db: Session):
     """Запрос на удаление события с инлайн-кнопками"""
     user_id = update.effective_user.id
     logger.info(f"Запрос на удаление события от пользователя {user_id}")
 
-    db = SessionLocal()
     try:
-        events = db.query(Event).filter(
-            Event.creator_id == user_id,
-            Event.is_active == True
-        ).all()
+        events = event_cache.get(db, user_id)
 
         logger.info(f"Найдено {len(events)} событий")
 
@@ -29,21 +30,6 @@ def delete_event_request(update: Update, context: CallbackContext):
 
         events_by_file = {}
         for event in events:
-            # Преобразуем дату к datetime с временем по умолчанию
-            if isinstance(event.event_date, str):
-                try:
-                    event.event_date = datetime.strptime(event.event_date, "%Y-%m-%d").replace(hour=0, minute=0,
-                                                                                               second=0)
-                except ValueError:
-                    try:
-                        event.event_date = datetime.strptime(event.event_date, "%Y-%m-%d %H:%M:%S")
-                    except ValueError:
-                        try:
-                            event.event_date = datetime.strptime(event.event_date, "%d.%m.%Y")
-                        except ValueError as e:
-                            logger.error(f"Не удалось распарсить дату {event.event_date}, ошибка {e}")
-                            continue
-
             try:
                 file_name = event.file_name or "Другие события"
                 if file_name not in events_by_file:
@@ -81,10 +67,9 @@ def delete_event_request(update: Update, context: CallbackContext):
     except Exception as e:
         logger.error(f"Общая ошибка: {e}", exc_info=True)
         update.message.reply_text("❌ Произошла ошибка при получении списка событий")
-    finally:
-        db.close()
 
-def handle_delete_callback(update: Update, context: CallbackContext):
+@db_session
+def handle_delete_callback(update: Update, context: CallbackContext, db: Session):
     """Обработка удаления события"""
     query = update.callback_query
     logger.info(f"Получен callback удаления: {query.data}")
@@ -96,35 +81,30 @@ def handle_delete_callback(update: Update, context: CallbackContext):
     event_id = int(query.data.split('_')[1])
     logger.info(f"Удаление события {event_id}")
 
-    db = SessionLocal()
-    try:
-        event = db.query(Event).filter(
-            Event.event_id == event_id,
-            Event.creator_id == query.from_user.id
-        ).first()
-
-        if event:
-            event.is_active = False
-            db.commit()
-            logger.info(f"Событие {event_id} успешно удалено")
-            query.edit_message_text("✅ Событие успешно удалено!")
-        else:
-            logger.warning(f"Событие {event_id} не найдено")
-            query.edit_message_text("❌ Событие не найдено.")
-    finally:
-        db.close()
-
-def update_event_request(update: Update, context: CallbackContext):
+    event = db.query(Event).filter(
+        Event.event_id == event_id,
+        Event.creator_id == query.from_user.id
+    ).first()
+
+    if event:
+        event.is_active = False
+        db.commit()
+        event_cache.invalidate(query.from_user.id)
+        reminder_wheel.cancel(event_id)
+        logger.info(f"Событие {event_id} успешно удалено")
+        query.edit_message_text("✅ Событие успешно удалено!")
+    else:
+        logger.warning(f"Событие {event_id} не найдено")
+        query.edit_message_text("❌ Событие не найдено.")
+
+@db_session
+def update_event_request(update: Update, context: CallbackContext, db: Session):
     """Запрос на обновление события с инлайн-кнопками"""
     user_id = update.effective_user.id
     logger.info(f"Запрос на обновление события от пользователя {user_id}")
 
-    db = SessionLocal()
     try:
-        events = db.query(Event).filter(
-            Event.creator_id == user_id,
-            Event.is_active == True
-        ).order_by(Event.file_name, Event.event_date).all()
+        events = event_cache.get(db, user_id)
 
         logger.info(f"Найдено {len(events)} событий")
 
@@ -171,10 +151,9 @@ def update_event_request(update: Update, context: CallbackContext):
     except Exception as e:
         logger.error(f"Общая ошибка: {e}", exc_info=True)
         update.message.reply_text("❌ Произошла ошибка при получении списка событий")
-    finally:
-        db.close()
 
-def handle_update_callback(update: Update, context: CallbackContext):
+@db_session
+def handle_update_callback(update: Update, context: CallbackContext, db: Session):
     """Обработка выбора события для обновления"""
     query = update.callback_query
     logger.info(f"Получен callback обновления: {query.data}")
@@ -191,7 +170,6 @@ def handle_update_callback(update: Update, context: CallbackContext):
         context.user_data['updating_event'] = event_id
 
         # Получаем информацию о событии
-        db = SessionLocal()
         try:
             event = db.query(Event).filter(
                 Event.event_id == event_id,
@@ -212,52 +190,54 @@ def handle_update_callback(update: Update, context: CallbackContext):
         except Exception as e:
             logger.error(f"Ошибка при получении события: {e}", exc_info=True)
             query.edit_message_text(text="❌ Произошла ошибка при обновлении события")
-        finally:
-            db.close()
 
     except Exception as e:
         logger.error(f"Ошибка при обработке callback обновления: {e}", exc_info=True)
         query.edit_message_text(text="❌ Произошла ошибка при обновлении события")
 
-def handle_new_date(update: Update, context: CallbackContext):
+@db_session
+def handle_new_date(update: Update, context: CallbackContext, db: Session):
     """Обработка новой даты события"""
     if 'updating_event' not in context.user_data:
         return  # Пропускаем обработку, если это не обновление даты
 
     try:
-        new_date = datetime.strptime(update.message.text.strip(), "%d.%m.%Y")
+        new_date = parse_date(update.message.text, formats=("%d.%m.%Y",))
+        if new_date is None:
+            raise ValueError(f"Некорректная дата: {update.message.text}")
         event_id = context.user_data['updating_event']
         logger.info(f"Попытка обновления даты события {event_id} на {new_date}")
 
-        db = SessionLocal()
-        try:
-            event = db.query(Event).filter(
-                Event.event_id == event_id,
-                Event.creator_id == update.effective_user.id
-            ).first()
+        event = db.query(Event).filter(
+            Event.event_id == event_id,
+            Event.creator_id == update.effective_user.id
+        ).first()
 
-            if event:
-                old_date = event.event_date
-                event.event_date = new_date
-                try:
-                    db.commit()
-                    logger.info(f"Дата события {event_id} успешно обновлена")
-
-                    message = (
-                        f"✅ Дата события '{event.event_name}' изменена!\n"
-                        f"Старая дата: {old_date.strftime('%d.%m.%Y')}\n"
-                        f"Новая дата: {new_date.strftime('%d.%m.%Y')}"
-                    )
-                    update.message.reply_text(message)
-                except Exception as commit_error:
-                    logger.error(f"Ошибка при сохранении изменений: {commit_error}", exc_info=True)
-                    db.rollback()
-                    update.message.reply_text("❌ Ошибка при сохранении изменений")
-            else:
-                logger.warning(f"Событие {event_id} не найдено")
-                update.message.reply_text("❌ Событие не найдено")
-        finally:
-            db.close()
+        if event:
+            old_date = event.event_date
+            event.event_date = new_date
+            event.anchor_day = new_date.day
+            # Напоминание по новой дате отправит обход наступивших next_reminder
+            event.next_reminder = new_date - timedelta(days=event.remind_before)
+            try:
+                db.commit()
+                event_cache.invalidate(update.effective_user.id)
+                reminder_wheel.update([(event_id, event.next_reminder)])
+                logger.info(f"Дата события {event_id} успешно обновлена")
+
+                message = (
+                    f"✅ Дата события '{event.event_name}' изменена!\n"
+                    f"Старая дата: {old_date.strftime('%d.%m.%Y')}\n"
+                    f"Новая дата: {new_date.strftime('%d.%m.%Y')}"
+                )
+                update.message.reply_text(message)
+            except Exception as commit_error:
+                logger.error(f"Ошибка при сохранении изменений: {commit_error}", exc_info=True)
+                db.rollback()
+                update.message.reply_text("❌ Ошибка при сохранении изменений")
+        else:
+            logger.warning(f"Событие {event_id} не найдено")
+            update.message.reply_text("❌ Событие не найдено")
 
     except ValueError:
         logger.error("Ошибка формата даты")
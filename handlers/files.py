@@ -1,28 +1,28 @@
 import logging
-import os
 
 from telegram import Update
 from telegram.ext import CallbackContext
 
-from services.excel.parser import process_excel  # Изменено с process_file на process_excel
+from services.excel.jobs import import_queue
+from services.excel.reader import SUPPORTED_EXTENSIONS
 
 # Настройка логирования
 logger = logging.getLogger(__name__)
 
 
 def handle_document(update: Update, context: CallbackContext):
-    """Обработчик загруженных файлов"""
+    """Обработчик загруженных файлов: файл ставится в очередь фонового импорта"""
     # Проверяем, есть ли документ
     if not update.message.document:
         update.message.reply_text("❌ Файл не найден!")
         return
 
     file = update.message.document
-    # Проверяем формат файла (только .xlsx)
-    if not file.file_name.endswith('.xlsx'):
+    # Проверяем формат файла (.xlsx, архив .zip с файлами .xlsx, .csv или .parquet)
+    if not file.file_name.lower().endswith(SUPPORTED_EXTENSIONS):
         update.message.reply_text(
             "❌ Неверный формат файла!\n"
-            "Пожалуйста, загрузите файл Excel (.xlsx)"
+            "Пожалуйста, загрузите файл Excel (.xlsx), архив .zip с файлами Excel, CSV (.csv) или Parquet (.parquet)"
         )
         return
 
@@ -30,38 +30,29 @@ def handle_document(update: Update, context: CallbackContext):
     file_name = file.file_name
 
     try:
-        # Создаем временную директорию, если её нет
-        os.makedirs('tempfiles', exist_ok=True)
-        file_path = f"tempfiles/{file_name}"
-
-        # Скачиваем файл
-        file_info = context.bot.get_file(file.file_id)
-        file_info.download(file_path)
-
-        # Сообщаем о начале обработки
-        update.message.reply_text("📥 Файл получен, начинаю обработку...")
-
-        # Обрабатываем файл с помощью process_excel
-        events_created = process_excel(file_path, user_id, file_name)
-
-        # Отправляем результат
-        update.message.reply_text(
-            f"✅ Файл успешно обработан!\n"
-            f"Добавлено событий: {events_created}"
+        # Сообщение, в котором будет отображаться прогресс обработки
+        progress_message = update.message.reply_text("📥 Файл получен и поставлен в очередь на обработку...")
+
+        job_id = import_queue.submit(
+            context.bot,
+            chat_id=update.effective_chat.id,
+            message_id=progress_message.message_id,
+            user_id=user_id,
+            file_id=file.file_id,
+            file_name=file_name,
+            file_size=file.file_size
         )
 
+        if job_id is None:
+            progress_message.edit_text(
+                "⏳ Предыдущий файл ещё обрабатывается.\n"
+                "Пожалуйста, дождитесь завершения и загрузите файл снова."
+            )
+
     except Exception as e:
         # Логируем ошибку
-        logger.error(f"Ошибка при обработке файла: {str(e)}")
+        logger.error(f"Ошибка при постановке файла в очередь: {str(e)}")
         update.message.reply_text(
             "❌ Произошла ошибка при обработке файла.\n"
-            "Убедитесь, что файл соответствует формату."
+            "Попробуйте загрузить его ещё раз."
         )
-
-    finally:
-        # Удаляем временный файл, если он был скачан
-        if os.path.exists(file_path):
-            try:
-                os.remove(file_path)
-            except Exception as delete_error:
-                logger.error(f"Не удалось удалить временный файл {file_path}: {delete_error}")
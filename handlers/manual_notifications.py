@@ -1,27 +1,28 @@
 import logging
 from datetime import datetime
 
+from sqlalchemy.orm import Session
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import CallbackContext
 
-from core.database import SessionLocal
-from models import Event, Notification, NotificationStatus, NotificationType
+from models import Event, NotificationStatus, NotificationType
+from services.events.cache import event_cache
+from services.events.recipients import chat_id, telegram_chat_ids
 from services.notifications.email import EmailNotifier
+from services.notifications.log_writer import notification_log
+from utils.decorators import db_session
 
 logger = logging.getLogger(__name__)
 
 
-def manual_notification_request(update: Update, context: CallbackContext):
+@db_session
+def manual_notification_request(update: Update, context: CallbackContext, db: Session):
     """Запрос на ручную отправку напоминаний"""
     user_id = update.effective_user.id
     logger.info(f"Запрос на ручную отправку напоминания от пользователя {user_id}")
 
-    db = SessionLocal()
     try:
-        events = db.query(Event).filter(
-            Event.creator_id == user_id,
-            Event.is_active == True
-        ).order_by(Event.file_name, Event.event_date).all()
+        events = event_cache.get(db, user_id)
 
         if not events:
             update.message.reply_text("📭 У вас нет активных событий для отправки напоминаний.")
@@ -68,11 +69,10 @@ def manual_notification_request(update: Update, context: CallbackContext):
     except Exception as e:
         logger.error(f"Ошибка при формировании списка событий: {e}", exc_info=True)
         update.message.reply_text("❌ Произошла ошибка при получении списка событий")
-    finally:
-        db.close()
 
 
-def handle_manual_notification_callback(update: Update, context: CallbackContext):
+@db_session
+def handle_manual_notification_callback(update: Update, context: CallbackContext, db: Session):
     """Обработка отправки ручного напоминания"""
     query = update.callback_query
     logger.info(f"Получен callback: {query.data}")
@@ -88,7 +88,6 @@ def handle_manual_notification_callback(update: Update, context: CallbackContext
         user_id = query.from_user.id
         logger.info(f"Обработка события {event_id} для пользователя {user_id}")
 
-        db = SessionLocal()
         try:
             event = db.query(Event).filter(
                 Event.event_id == event_id,
@@ -132,20 +131,15 @@ def handle_manual_notification_callback(update: Update, context: CallbackContext
             success_telegram = False
             success_email = False
 
-            if event.responsible_telegram_ids:
-                telegram_ids = event.responsible_telegram_ids.split(',')
+            telegram_ids = telegram_chat_ids(db, event.event_id)
+            if telegram_ids:
                 logger.info(f"Список ID для отправки в Telegram: {telegram_ids}")
 
                 for telegram_id in telegram_ids:
-                    telegram_id = telegram_id.strip()
                     try:
-                        if not telegram_id:
-                            logger.warning("Пустой telegram_id, пропускаем")
-                            continue
-
                         logger.info(f"Попытка отправки сообщения в Telegram пользователю {telegram_id}")
                         context.bot.send_message(
-                            chat_id=telegram_id,
+                            chat_id=chat_id(telegram_id),
                             text=message,
                             parse_mode='HTML'
                         )
@@ -178,33 +172,28 @@ def handle_manual_notification_callback(update: Update, context: CallbackContext
                 except Exception as e:
                     logger.error(f"Ошибка отправки email: {str(e)}", exc_info=True)
 
-            if event.responsible_telegram_ids:
-                notification_telegram = Notification(
+            # Журнал уведомлений сохраняется в фоне, ответ пользователю не ждёт записи
+            if telegram_ids:
+                notification_log.write(
                     event_id=event.event_id,
                     user_id=user_id,
                     type=NotificationType.TELEGRAM,
                     status=NotificationStatus.SENT if success_telegram else NotificationStatus.FAILED,
-                    scheduled_at=datetime.now(),
                     sent_at=datetime.now() if success_telegram else None
                 )
-                db.add(notification_telegram)
 
             if event.responsible_email:
-                notification_email = Notification(
+                notification_log.write(
                     event_id=event.event_id,
                     user_id=user_id,
                     type=NotificationType.EMAIL,
                     status=NotificationStatus.SENT if success_email else NotificationStatus.FAILED,
-                    scheduled_at=datetime.now(),
                     sent_at=datetime.now() if success_email else None
                 )
-                db.add(notification_email)
-
-            db.commit()
 
             status_message = "📤 Статус отправки напоминаний:\n\n"
 
-            if event.responsible_telegram_ids:
+            if telegram_ids:
                 status = "✅" if success_telegram else "❌"
                 status_message += f"{status} Telegram\n"
 
@@ -218,9 +207,9 @@ def handle_manual_notification_callback(update: Update, context: CallbackContext
 
         except Exception as db_error:
             logger.error(f"Ошибка работы с БД: {db_error}", exc_info=True)
+            # Ошибка обработана здесь, поэтому декоратор не откатит изменения сам
+            db.rollback()
             query.edit_message_text("❌ Ошибка при обработке запроса")
-        finally:
-            db.close()
 
     except Exception as e:
         logger.error(f"Общая ошибка обработки callback: {e}", exc_info=True)
@@ -18,6 +18,10 @@ from handlers import (
     manual_notification_request,
     handle_manual_notification_callback
 )
+from services.excel.jobs import import_queue
+from services.excel.parallel import shutdown_process_pool
+from services.notifications.log_writer import notification_log
+from services.scheduler.jobs import register_jobs
 
 # Настройка логирования
 logging.basicConfig(
@@ -35,7 +39,8 @@ def setup_handlers(dp):
 
     # Обработка файлов
     dp.add_handler(MessageHandler(
-        Filters.document.file_extension('xlsx'),
+        Filters.document.file_extension('xlsx') | Filters.document.file_extension('zip')
+        | Filters.document.file_extension('csv') | Filters.document.file_extension('parquet'),
         handle_document
     ))
 
@@ -115,6 +120,9 @@ def main():
         # Регистрируем обработчики
         setup_handlers(dp)
 
+        # Периодические задачи: job_queue — единственный планировщик процесса
+        register_jobs(updater.job_queue)
+
         # Запускаем бота
         updater.start_polling()
         logger.info("✅ Бот успешно запущен")
@@ -127,6 +135,12 @@ def main():
         # Ожидаем завершения
         updater.idle()
 
+        # Дожидаемся начатых импортов
+        import_queue.shutdown()
+        shutdown_process_pool()
+        # Сохраняем журнал уведомлений, накопленный в очереди
+        notification_log.shutdown()
+
     except Exception as e:
         logger.error(f"❌ Ошибка при запуске бота: {e}", exc_info=True)
 
@@ -0,0 +1,60 @@
+"""Начальная схема: события, пользователи, уведомления
+
+Revision ID: 0001_initial
+Revises:
+Create Date: 2026-10-18 10:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001_initial'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'events',
+        sa.Column('event_id', sa.Integer(), primary_key=True),
+        sa.Column('creator_id', sa.BigInteger(), nullable=True),
+        sa.Column('file_name', sa.String(), nullable=False),
+        sa.Column('event_name', sa.String(), nullable=False),
+        sa.Column('event_date', sa.DateTime(), nullable=False),
+        sa.Column('next_reminder', sa.DateTime(), nullable=False),
+        sa.Column('periodicity', sa.Integer(), nullable=True),
+        sa.Column('repeat_type', sa.String(), nullable=True),
+        sa.Column('remind_before', sa.Integer(), nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('responsible_telegram_ids', sa.BigInteger(), nullable=True),
+        sa.Column('responsible_email', sa.String(), nullable=True),
+    )
+    op.create_table(
+        'users',
+        sa.Column('user_id', sa.Integer(), primary_key=True),
+        sa.Column('username', sa.String(), nullable=True),
+        sa.Column('first_name', sa.String(), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+    )
+    op.create_table(
+        'notifications',
+        sa.Column('notification_id', sa.Integer(), primary_key=True),
+        sa.Column('event_id', sa.Integer(), sa.ForeignKey('events.event_id'), nullable=False),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.user_id'), nullable=False),
+        sa.Column('type', sa.String(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('scheduled_at', sa.DateTime(), nullable=False),
+        sa.Column('sent_at', sa.DateTime(), nullable=True),
+        sa.Column('error_message', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+    )
+
+
+def downgrade():
+    op.drop_table('notifications')
+    op.drop_table('users')
+    op.drop_table('events')
@@ -0,0 +1,42 @@
+"""Уникальный индекс events(file_name, event_name) для пакетного upsert
+
+Revision ID: 0002_events_file_event_unique
+Revises: 0001_initial
+Create Date: 2026-10-18 10:30:00
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_events_file_event_unique'
+down_revision = '0001_initial'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Повторные загрузки раньше могли создать дубликаты — оставляем последнюю версию события.
+    # Журнал уведомлений ссылается на события внешним ключом: записи дубликатов
+    # переносятся на оставшееся событие до удаления
+    op.execute(
+        "UPDATE notifications SET event_id = ("
+        "SELECT MAX(kept.event_id) FROM events duplicate "
+        "JOIN events kept ON kept.file_name = duplicate.file_name AND kept.event_name = duplicate.event_name "
+        "WHERE duplicate.event_id = notifications.event_id) "
+        "WHERE event_id NOT IN (SELECT MAX(event_id) FROM events GROUP BY file_name, event_name)"
+    )
+    op.execute(
+        "DELETE FROM events WHERE event_id NOT IN ("
+        "SELECT MAX(event_id) FROM events GROUP BY file_name, event_name)"
+    )
+    op.create_index(
+        'ux_events_file_name_event_name',
+        'events',
+        ['file_name', 'event_name'],
+        unique=True
+    )
+
+
+def downgrade():
+    op.drop_index('ux_events_file_name_event_name', table_name='events')
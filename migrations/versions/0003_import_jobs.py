@@ -0,0 +1,43 @@
+"""Таблица фоновых задач импорта
+
+Revision ID: 0003_import_jobs
+Revises: 0002_events_file_event_unique
+Create Date: 2026-10-18 11:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_import_jobs'
+down_revision = '0002_events_file_event_unique'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'import_jobs',
+        sa.Column('job_id', sa.Integer(), primary_key=True),
+        sa.Column('creator_id', sa.BigInteger(), nullable=False),
+        sa.Column('chat_id', sa.BigInteger(), nullable=False),
+        sa.Column('message_id', sa.Integer(), nullable=True),
+        sa.Column('file_name', sa.String(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('total_rows', sa.Integer(), nullable=True),
+        sa.Column('processed_rows', sa.Integer(), nullable=False),
+        sa.Column('events_created', sa.Integer(), nullable=False),
+        sa.Column('events_updated', sa.Integer(), nullable=False),
+        sa.Column('error_count', sa.Integer(), nullable=False),
+        sa.Column('error_message', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+    )
+    op.create_index('ix_import_jobs_creator_id_status', 'import_jobs', ['creator_id', 'status'])
+
+
+def downgrade():
+    op.drop_index('ix_import_jobs_creator_id_status', table_name='import_jobs')
+    op.drop_table('import_jobs')
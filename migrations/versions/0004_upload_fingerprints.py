@@ -0,0 +1,42 @@
+"""Хэши загруженных файлов и отпечатки строк событий
+
+Revision ID: 0004_upload_fingerprints
+Revises: 0003_import_jobs
+Create Date: 2026-10-18 11:30:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004_upload_fingerprints'
+down_revision = '0003_import_jobs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'uploaded_files',
+        sa.Column('uploaded_file_id', sa.Integer(), primary_key=True),
+        sa.Column('creator_id', sa.BigInteger(), nullable=False),
+        sa.Column('file_name', sa.String(), nullable=False),
+        sa.Column('content_hash', sa.String(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+    )
+    op.create_index(
+        'ux_uploaded_files_creator_id_file_name',
+        'uploaded_files',
+        ['creator_id', 'file_name'],
+        unique=True
+    )
+    with op.batch_alter_table('events') as batch_op:
+        batch_op.add_column(sa.Column('row_hash', sa.String(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('events') as batch_op:
+        batch_op.drop_column('row_hash')
+    op.drop_index('ux_uploaded_files_creator_id_file_name', table_name='uploaded_files')
+    op.drop_table('uploaded_files')
@@ -0,0 +1,39 @@
+"""Индексы для частых запросов к событиям и уведомлениям
+
+Revision ID: 0005_query_indexes
+Revises: 0004_upload_fingerprints
+Create Date: 2026-10-18 13:00:00
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0005_query_indexes'
+down_revision = '0004_upload_fingerprints'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'ix_events_creator_id_is_active_event_date',
+        'events',
+        ['creator_id', 'is_active', 'event_date']
+    )
+    op.create_index(
+        'ix_events_is_active_next_reminder',
+        'events',
+        ['is_active', 'next_reminder']
+    )
+    op.create_index(
+        'ix_notifications_event_id_scheduled_at',
+        'notifications',
+        ['event_id', 'scheduled_at']
+    )
+
+
+def downgrade():
+    op.drop_index('ix_notifications_event_id_scheduled_at', table_name='notifications')
+    op.drop_index('ix_events_is_active_next_reminder', table_name='events')
+    op.drop_index('ix_events_creator_id_is_active_event_date', table_name='events')
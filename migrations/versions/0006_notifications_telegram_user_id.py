@@ -0,0 +1,33 @@
+"""notifications.user_id хранит telegram_id: BigInteger без внешнего ключа на users
+
+Revision ID: 0006_notifications_telegram_user_id
+Revises: 0005_query_indexes
+Create Date: 2026-10-18 15:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006_notifications_telegram_user_id'
+down_revision = '0005_query_indexes'
+branch_labels = None
+depends_on = None
+
+# Имя безымянного внешнего ключа: для SQLite задаётся через naming_convention,
+# PostgreSQL называет его <таблица>_<колонка>_fkey
+SQLITE_NAMING = {"fk": "%(table_name)s_%(column_0_name)s_fkey"}
+FK_NAME = 'notifications_user_id_fkey'
+
+
+def upgrade():
+    with op.batch_alter_table('notifications', naming_convention=SQLITE_NAMING) as batch_op:
+        batch_op.drop_constraint(FK_NAME, type_='foreignkey')
+        batch_op.alter_column('user_id', existing_type=sa.Integer(), type_=sa.BigInteger(), existing_nullable=False)
+
+
+def downgrade():
+    with op.batch_alter_table('notifications', naming_convention=SQLITE_NAMING) as batch_op:
+        batch_op.alter_column('user_id', existing_type=sa.BigInteger(), type_=sa.Integer(), existing_nullable=False)
+        batch_op.create_foreign_key(FK_NAME, 'users', ['user_id'], ['user_id'])
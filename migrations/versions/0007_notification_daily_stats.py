@@ -0,0 +1,41 @@
+"""Дневная статистика уведомлений для свёртки старых записей журнала
+
+Revision ID: 0007_notification_daily_stats
+Revises: 0006_notifications_telegram_user_id
+Create Date: 2026-10-18 16:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007_notification_daily_stats'
+down_revision = '0006_notifications_telegram_user_id'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'notification_daily_stats',
+        sa.Column('stat_id', sa.Integer(), primary_key=True),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('event_id', sa.Integer(), nullable=False),
+        sa.Column('type', sa.String(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+    )
+    op.create_index(
+        'ux_notification_daily_stats_day_event_type_status',
+        'notification_daily_stats',
+        ['day', 'event_id', 'type', 'status'],
+        unique=True
+    )
+    op.create_index('ix_notifications_scheduled_at', 'notifications', ['scheduled_at'])
+
+
+def downgrade():
+    op.drop_index('ix_notifications_scheduled_at', table_name='notifications')
+    op.drop_index('ux_notification_daily_stats_day_event_type_status', table_name='notification_daily_stats')
+    op.drop_table('notification_daily_stats')
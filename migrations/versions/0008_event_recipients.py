@@ -0,0 +1,108 @@
+"""Таблица получателей event_recipients вместо ID через запятую в events
+
+Revision ID: 0008_event_recipients
+Revises: 0007_notification_daily_stats
+Create Date: 2026-10-18 17:00:00
+
+"""
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008_event_recipients'
+down_revision = '0007_notification_daily_stats'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 500
+
+# Разделители и числовые ID из Excel, как в services.events.recipients
+_SEPARATORS = re.compile(r"[,;\s]+")
+_FLOAT_ID = re.compile(r"(-?\d+)\.0+")
+
+
+def _split(value):
+    addresses = []
+    for address in _SEPARATORS.split(str(value or "")):
+        match = _FLOAT_ID.fullmatch(address)
+        if match:
+            address = match.group(1)
+        if address and address not in addresses:
+            addresses.append(address)
+    return addresses
+
+
+def _backfill(bind):
+    events = sa.table(
+        'events',
+        sa.column('event_id', sa.Integer()),
+        sa.column('responsible_telegram_ids', sa.String()),
+        sa.column('responsible_email', sa.String()),
+    )
+    recipients = sa.table(
+        'event_recipients',
+        sa.column('event_id', sa.Integer()),
+        sa.column('channel', sa.String()),
+        sa.column('address', sa.String()),
+    )
+    rows = bind.execute(sa.select(
+        events.c.event_id, events.c.responsible_telegram_ids, events.c.responsible_email
+    ).where(sa.or_(
+        events.c.responsible_telegram_ids.isnot(None), events.c.responsible_email.isnot(None)
+    ))).fetchall()
+
+    records = []
+    for event_id, telegram_ids, emails in rows:
+        telegram_ids = _split(telegram_ids)
+        records += [{"event_id": event_id, "channel": "TELEGRAM", "address": address} for address in telegram_ids]
+        records += [{"event_id": event_id, "channel": "EMAIL", "address": address} for address in _split(emails)]
+        bind.execute(
+            events.update().where(events.c.event_id == event_id),
+            {"responsible_telegram_ids": ",".join(telegram_ids) or None}
+        )
+    for start in range(0, len(records), BATCH_SIZE):
+        bind.execute(recipients.insert(), records[start:start + BATCH_SIZE])
+
+
+def upgrade():
+    with op.batch_alter_table('events') as batch_op:
+        batch_op.alter_column(
+            'responsible_telegram_ids', existing_type=sa.BigInteger(), type_=sa.String(), existing_nullable=True
+        )
+
+    op.create_table(
+        'event_recipients',
+        sa.Column('recipient_id', sa.Integer(), primary_key=True),
+        sa.Column('event_id', sa.Integer(), sa.ForeignKey('events.event_id', ondelete='CASCADE'), nullable=False),
+        sa.Column('channel', sa.String(), nullable=False),
+        sa.Column('address', sa.String(), nullable=False),
+    )
+    op.create_index(
+        'ux_event_recipients_event_id_channel_address',
+        'event_recipients',
+        ['event_id', 'channel', 'address'],
+        unique=True
+    )
+    op.create_index(
+        'ix_event_recipients_channel_address_event_id',
+        'event_recipients',
+        ['channel', 'address', 'event_id']
+    )
+
+    _backfill(op.get_bind())
+
+
+def downgrade():
+    op.drop_index('ix_event_recipients_channel_address_event_id', table_name='event_recipients')
+    op.drop_index('ux_event_recipients_event_id_channel_address', table_name='event_recipients')
+    op.drop_table('event_recipients')
+
+    # Несколько ID не помещаются в BigInteger: в PostgreSQL остаётся первый
+    with op.batch_alter_table('events') as batch_op:
+        batch_op.alter_column(
+            'responsible_telegram_ids', existing_type=sa.String(), type_=sa.BigInteger(), existing_nullable=True,
+            postgresql_using="NULLIF(split_part(responsible_telegram_ids, ',', 1), '')::bigint"
+        )
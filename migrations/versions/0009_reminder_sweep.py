@@ -0,0 +1,56 @@
+"""events.next_reminder допускает NULL; задачи планировщика на каждое событие заменены обходом
+
+Revision ID: 0009_reminder_sweep
+Revises: 0008_event_recipients
+Create Date: 2026-10-18 18:00:00
+
+"""
+from datetime import date, datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009_reminder_sweep'
+down_revision = '0008_event_recipients'
+branch_labels = None
+depends_on = None
+
+# Значение «Повтор события» у повторяющихся событий (services.events.recurrence.MONTHLY)
+MONTHLY = 'ежемесячно'
+
+
+def upgrade():
+    with op.batch_alter_table('events') as batch_op:
+        batch_op.alter_column('next_reminder', existing_type=sa.DateTime(), nullable=True)
+
+    # Задачи notify_<event_id> отправили бы напоминания второй раз вместе с обходом
+    bind = op.get_bind()
+    if sa.inspect(bind).has_table('apscheduler_jobs'):
+        op.execute("DELETE FROM apscheduler_jobs WHERE id LIKE 'notify_%'")
+
+    # Прошедшие разовые события планировщик пропускал как просроченные: обход не должен
+    # напоминать о них. Повтор сравнивается в Python — lower() SQLite не меняет кириллицу
+    events = sa.table(
+        'events', sa.column('event_id'), sa.column('event_date', sa.DateTime()), sa.column('repeat_type'),
+        sa.column('next_reminder', sa.DateTime())
+    )
+    rows = bind.execute(sa.select(events.c.event_id, events.c.repeat_type).where(
+        events.c.event_date < datetime.combine(date.today(), datetime.min.time()),
+        events.c.next_reminder.isnot(None)
+    ))
+    past = [event_id for event_id, repeat_type in rows if (repeat_type or '').strip().lower() != MONTHLY]
+    for start in range(0, len(past), 500):
+        op.execute(events.update().where(events.c.event_id.in_(past[start:start + 500])).values(next_reminder=None))
+
+
+def downgrade():
+    # Задачи планировщика notify_<event_id> не восстанавливаются: после отката напоминания
+    # нужно запланировать заново. NULL у отправленных разовых напоминаний заменяется
+    # датой события только для того, чтобы колонка снова могла стать NOT NULL
+    op.execute(
+        "UPDATE events SET next_reminder = event_date WHERE next_reminder IS NULL"
+    )
+    with op.batch_alter_table('events') as batch_op:
+        batch_op.alter_column('next_reminder', existing_type=sa.DateTime(), nullable=False)
@@ -0,0 +1,26 @@
+"""events.anchor_day: день месяца исходной даты для повторяющихся событий
+
+Revision ID: 0010_events_anchor_day
+Revises: 0009_reminder_sweep
+Create Date: 2026-10-18 19:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0010_events_anchor_day'
+down_revision = '0009_reminder_sweep'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # NULL — день берётся из event_date: даты существующих событий ещё не переносились
+    op.add_column('events', sa.Column('anchor_day', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('events') as batch_op:
+        batch_op.drop_column('anchor_day')
@@ -0,0 +1,29 @@
+"""Отметки обработанных срабатываний очереди напоминаний
+
+Revision ID: 0011_reminder_checkpoints
+Revises: 0010_events_anchor_day
+Create Date: 2026-10-18 20:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0011_reminder_checkpoints'
+down_revision = '0010_events_anchor_day'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'reminder_checkpoints',
+        sa.Column('name', sa.String(), primary_key=True),
+        sa.Column('watermark', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+    )
+
+
+def downgrade():
+    op.drop_table('reminder_checkpoints')
@@ -0,0 +1,27 @@
+"""events.lease_token, events.lease_expires_at: аренда отправки напоминаний процессами бота
+
+Revision ID: 0012_events_reminder_leases
+Revises: 0011_reminder_checkpoints
+Create Date: 2026-10-18 21:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0012_events_reminder_leases'
+down_revision = '0011_reminder_checkpoints'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('events', sa.Column('lease_token', sa.String(), nullable=True))
+    op.add_column('events', sa.Column('lease_expires_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('events') as batch_op:
+        batch_op.drop_column('lease_expires_at')
+        batch_op.drop_column('lease_token')
@@ -0,0 +1,27 @@
+"""import_jobs.owner_id, import_jobs.heartbeat_at: владелец задачи импорта среди процессов бота
+
+Revision ID: 0013_import_jobs_owner
+Revises: 0012_events_reminder_leases
+Create Date: 2026-10-18 22:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0013_import_jobs_owner'
+down_revision = '0012_events_reminder_leases'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('import_jobs', sa.Column('owner_id', sa.String(), nullable=True))
+    op.add_column('import_jobs', sa.Column('heartbeat_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('import_jobs') as batch_op:
+        batch_op.drop_column('heartbeat_at')
+        batch_op.drop_column('owner_id')
@@ -0,0 +1,43 @@
+"""uploaded_file_parts: файлы событий, записанные загрузкой ZIP-архива или книги по листам
+
+Revision ID: 0014_uploaded_file_parts
+Revises: 0013_import_jobs_owner
+Create Date: 2026-10-18 23:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0014_uploaded_file_parts'
+down_revision = '0013_import_jobs_owner'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Прежние загрузки архивов частей не записывали: их отпечатки сбрасываются
+    # только по имени, пока архив не будет загружен снова
+    op.create_table(
+        'uploaded_file_parts',
+        sa.Column('uploaded_file_part_id', sa.Integer(), primary_key=True),
+        sa.Column(
+            'uploaded_file_id', sa.Integer(),
+            sa.ForeignKey('uploaded_files.uploaded_file_id', ondelete='CASCADE'), nullable=False
+        ),
+        sa.Column('file_name', sa.String(), nullable=False),
+    )
+    op.create_index(
+        'ux_uploaded_file_parts_uploaded_file_id_file_name',
+        'uploaded_file_parts',
+        ['uploaded_file_id', 'file_name'],
+        unique=True
+    )
+    op.create_index('ix_uploaded_file_parts_file_name', 'uploaded_file_parts', ['file_name'])
+
+
+def downgrade():
+    op.drop_index('ix_uploaded_file_parts_file_name', table_name='uploaded_file_parts')
+    op.drop_index('ux_uploaded_file_parts_uploaded_file_id_file_name', table_name='uploaded_file_parts')
+    op.drop_table('uploaded_file_parts')
@@ -1,11 +1,24 @@
 from .event import Event
+from .event_recipient import EventRecipient
+from .import_job import ImportJob, ImportJobStatus
 from .notification import Notification, NotificationType, NotificationStatus
+from .notification_stat import NotificationDailyStat
+from .reminder_checkpoint import ReminderCheckpoint
+from .uploaded_file import UploadedFile
+from .uploaded_file_part import UploadedFilePart
 from .user import User
 
 __all__ = [
     'Event',
+    'EventRecipient',
     'User',
     'Notification',
     'NotificationType',
-    'NotificationStatus'
+    'NotificationStatus',
+    'NotificationDailyStat',
+    'ReminderCheckpoint',
+    'ImportJob',
+    'ImportJobStatus',
+    'UploadedFile',
+    'UploadedFilePart'
 ]
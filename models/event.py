@@ -1,19 +1,34 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, BigInteger
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, BigInteger, Index
 
 from core.database import Base
 
 
 class Event(Base):
     __tablename__ = "events"
+    __table_args__ = (
+        # Ключ повторной загрузки файла: по нему выполняется upsert при импорте
+        Index("ux_events_file_name_event_name", "file_name", "event_name", unique=True),
+        # Списки событий пользователя в обработчиках: creator_id + is_active, диапазон/сортировка по event_date
+        Index("ix_events_creator_id_is_active_event_date", "creator_id", "is_active", "event_date"),
+        # Выборка событий, по которым пора отправить напоминание
+        Index("ix_events_is_active_next_reminder", "is_active", "next_reminder"),
+    )
+
     event_id = Column(Integer, primary_key=True)
     creator_id = Column(BigInteger)  # это telegram_id создателя
     file_name = Column(String, nullable=False)
     event_name = Column(String, nullable=False)
     event_date = Column(DateTime, nullable=False)
-    next_reminder = Column(DateTime, nullable=False)
+    next_reminder = Column(DateTime, nullable=True)  # NULL — напоминаний по событию больше не будет
     periodicity = Column(Integer, nullable=True)
     repeat_type = Column(String, nullable=True)
     remind_before = Column(Integer, nullable=False)
     is_active = Column(Boolean, default=True)
-    responsible_telegram_ids = Column(BigInteger, nullable=True)  # Поле для ID ответственного
-    responsible_email = Column(String, nullable=True)
\ No newline at end of file
+    anchor_day = Column(Integer, nullable=True)  # день месяца исходной даты для повторений; NULL — день event_date
+    # ID ответственных через запятую для показа; рассылка идёт по таблице event_recipients
+    responsible_telegram_ids = Column(String, nullable=True)
+    responsible_email = Column(String, nullable=True)
+    row_hash = Column(String, nullable=True)  # отпечаток строки файла, из которой загружено событие
+    # Аренда отправки напоминания процессом бота (services.notifications.leases)
+    lease_token = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
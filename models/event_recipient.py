@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
+
+from core.database import Base
+
+
+class EventRecipient(Base):
+    """Получатель напоминаний о событии: канал (NotificationType) и адрес в нём"""
+    __tablename__ = "event_recipients"
+    __table_args__ = (
+        # Получатели события при рассылке; уникальность исключает повторную отправку одному адресу
+        Index("ux_event_recipients_event_id_channel_address", "event_id", "channel", "address", unique=True),
+        # Обратный поиск: события, о которых напоминают чату или адресу
+        Index("ix_event_recipients_channel_address_event_id", "channel", "address", "event_id"),
+    )
+
+    recipient_id = Column(Integer, primary_key=True)
+    event_id = Column(Integer, ForeignKey('events.event_id', ondelete='CASCADE'), nullable=False)
+    channel = Column(String, nullable=False)
+    address = Column(String, nullable=False)  # chat_id Telegram или email
@@ -0,0 +1,39 @@
+from datetime import datetime
+from enum import Enum
+
+from sqlalchemy import Column, Integer, String, DateTime, BigInteger, Index
+
+from core.database import Base
+
+
+class ImportJobStatus(str, Enum):
+    QUEUED = "QUEUED"
+    RUNNING = "RUNNING"
+    DONE = "DONE"
+    FAILED = "FAILED"
+
+
+class ImportJob(Base):
+    __tablename__ = "import_jobs"
+    __table_args__ = (
+        Index("ix_import_jobs_creator_id_status", "creator_id", "status"),
+    )
+
+    job_id = Column(Integer, primary_key=True)
+    creator_id = Column(BigInteger, nullable=False)  # telegram_id загрузившего файл
+    chat_id = Column(BigInteger, nullable=False)
+    message_id = Column(Integer, nullable=True)  # сообщение с прогрессом
+    file_name = Column(String, nullable=False)
+    status = Column(String, nullable=False, default=ImportJobStatus.QUEUED)
+    total_rows = Column(Integer, nullable=True)
+    processed_rows = Column(Integer, nullable=False, default=0)
+    events_created = Column(Integer, nullable=False, default=0)
+    events_updated = Column(Integer, nullable=False, default=0)
+    error_count = Column(Integer, nullable=False, default=0)
+    error_message = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    # Процесс бота, выполняющий задачу, и время его последней отметки (services.excel.jobs)
+    owner_id = Column(String, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
@@ -1,6 +1,6 @@
 from enum import Enum
 
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, BigInteger
 
 from core.database import Base
 
@@ -17,10 +17,16 @@ class NotificationStatus(str, Enum):
 
 class Notification(Base):
     __tablename__ = "notifications"
+    __table_args__ = (
+        # История уведомлений события в хронологическом порядке
+        Index("ix_notifications_event_id_scheduled_at", "event_id", "scheduled_at"),
+        # Свёртка старых записей и статистика за период
+        Index("ix_notifications_scheduled_at", "scheduled_at"),
+    )
 
     notification_id = Column(Integer, primary_key=True)
     event_id = Column(Integer, ForeignKey('events.event_id'), nullable=False)
-    user_id = Column(Integer, ForeignKey('users.user_id'), nullable=False)
+    user_id = Column(BigInteger, nullable=False)  # telegram_id получателя или отправителя
     type = Column(String, nullable=False)
     status = Column(String, nullable=False)
     scheduled_at = Column(DateTime, nullable=False)
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, String, Date, Index
+
+from core.database import Base
+
+
+class NotificationDailyStat(Base):
+    """Количество уведомлений за день по событию, типу и статусу (свёртка старых записей notifications)"""
+    __tablename__ = "notification_daily_stats"
+    __table_args__ = (
+        Index("ux_notification_daily_stats_day_event_type_status", "day", "event_id", "type", "status", unique=True),
+    )
+
+    stat_id = Column(Integer, primary_key=True)
+    day = Column(Date, nullable=False)  # дата scheduled_at свёрнутых записей
+    event_id = Column(Integer, nullable=False)
+    type = Column(String, nullable=False)
+    status = Column(String, nullable=False)
+    count = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,14 @@
+from datetime import datetime
+
+from sqlalchemy import Column, String, DateTime
+
+from core.database import Base
+
+
+class ReminderCheckpoint(Base):
+    """Отметка, до которой очередь напоминаний уже обработала срабатывания (по имени очереди)"""
+    __tablename__ = "reminder_checkpoints"
+
+    name = Column(String, primary_key=True)
+    watermark = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,19 @@
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, String, DateTime, BigInteger, Index
+
+from core.database import Base
+
+
+class UploadedFile(Base):
+    """Хэш содержимого последней загрузки файла пользователем"""
+    __tablename__ = "uploaded_files"
+    __table_args__ = (
+        Index("ux_uploaded_files_creator_id_file_name", "creator_id", "file_name", unique=True),
+    )
+
+    uploaded_file_id = Column(Integer, primary_key=True)
+    creator_id = Column(BigInteger, nullable=False)
+    file_name = Column(String, nullable=False)
+    content_hash = Column(String, nullable=False)  # sha256 содержимого файла
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
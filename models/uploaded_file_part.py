@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
+
+from core.database import Base
+
+
+class UploadedFilePart(Base):
+    """Файл событий (книга ZIP-архива или лист книги), записанный многочастной загрузкой"""
+    __tablename__ = "uploaded_file_parts"
+    __table_args__ = (
+        Index("ux_uploaded_file_parts_uploaded_file_id_file_name", "uploaded_file_id", "file_name", unique=True),
+        # Загрузки, записавшие события файла, при сбросе отпечатков
+        Index("ix_uploaded_file_parts_file_name", "file_name"),
+    )
+
+    uploaded_file_part_id = Column(Integer, primary_key=True)
+    uploaded_file_id = Column(
+        Integer, ForeignKey('uploaded_files.uploaded_file_id', ondelete='CASCADE'), nullable=False
+    )
+    file_name = Column(String, nullable=False)
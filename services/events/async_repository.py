@@ -0,0 +1,33 @@
+"""
+Асинхронные запросы к событиям для кода, работающего в цикле asyncio.
+
+Используют те же выражения services.events.queries, что и синхронные обработчики,
+поэтому результаты совпадают. Сессия — AsyncSession из core.async_database.async_session().
+"""
+from services.events.queries import (
+    EventSnapshot, active_events_query, reminders_query, telegram_chat_ids_query, user_event_query
+)
+
+
+async def get_active_events(db, creator_id):
+    """Активные события пользователя (EventSnapshot) в порядке файла и даты"""
+    result = await db.execute(active_events_query(creator_id))
+    return tuple(EventSnapshot(*row) for row in result)
+
+
+async def get_user_event(db, event_id, creator_id):
+    """Активное событие пользователя или None"""
+    result = await db.execute(user_event_query(event_id, creator_id))
+    return result.scalars().first()
+
+
+async def get_reminders(db, user_id, current_date):
+    """Список (раздел, файл, событие, дата), как в handlers.commands.query_reminders"""
+    result = await db.execute(reminders_query(user_id, current_date))
+    return result.all()
+
+
+async def get_telegram_chat_ids(db, event_id):
+    """Адреса Telegram получателей события"""
+    result = await db.execute(telegram_chat_ids_query(event_id))
+    return result.scalars().all()
@@ -0,0 +1,80 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from config.settings import EVENT_CACHE_SIZE, EVENT_CACHE_TTL
+from services.events.queries import EventSnapshot, active_events_query
+
+logger = logging.getLogger(__name__)
+
+
+def load_active_events(db, creator_id):
+    """Активные события пользователя в порядке файла и даты"""
+    return tuple(EventSnapshot(*row) for row in db.execute(active_events_query(creator_id)))
+
+
+class EventCache:
+    """
+    LRU-кэш списков активных событий по создателю с ограничением размера и времени жизни.
+
+    Записи в базу, меняющие события пользователя, вызывают invalidate(creator_id).
+    """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # creator_id -> (время загрузки, события)
+        self._generations = {}  # creator_id -> номер инвалидации
+
+    def get(self, db, creator_id):
+        """Список событий из кэша; при промахе — загрузка из базы через сессию db"""
+        with self._lock:
+            entry = self._entries.get(creator_id)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl:
+                self._entries.move_to_end(creator_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            generation = self._generations.get(creator_id, 0)
+
+        events = load_active_events(db, creator_id)
+
+        with self._lock:
+            # Пока шла загрузка, события могли измениться: устаревший снимок не сохраняем
+            if self._generations.get(creator_id, 0) == generation:
+                self._entries[creator_id] = (time.monotonic(), events)
+                self._entries.move_to_end(creator_id)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        return events
+
+    def invalidate(self, *creator_ids):
+        """Сброс снимков пользователей после изменения их событий"""
+        with self._lock:
+            for creator_id in creator_ids:
+                self._entries.pop(creator_id, None)
+                self._generations[creator_id] = self._generations.get(creator_id, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            for creator_id in self._entries:
+                self._generations[creator_id] = self._generations.get(creator_id, 0) + 1
+            self._entries.clear()
+
+    def stats(self):
+        """Счётчики попаданий и промахов"""
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / requests if requests else 0.0,
+                "size": len(self._entries),
+            }
+
+
+event_cache = EventCache(EVENT_CACHE_SIZE, EVENT_CACHE_TTL)
@@ -0,0 +1,81 @@
+"""
+Запросы к событиям в виде select(): одни и те же выражения выполняются
+синхронной сессией (обработчики, кэш) и асинхронной (services.events.async_repository).
+"""
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from sqlalchemy import case, or_, select
+
+from core.expressions import days_before
+from models import Event, EventRecipient, NotificationType
+
+# Насколько вперёд показываются приближающиеся события
+REMINDER_HORIZON_DAYS = 30
+
+# Неизменяемая копия активного события для меню: не привязана к сессии базы
+EventSnapshot = namedtuple("EventSnapshot", [
+    "event_id",
+    "file_name",
+    "event_name",
+    "event_date",
+    "remind_before",
+    "repeat_type",
+    "periodicity",
+    "responsible_telegram_ids",
+    "responsible_email",
+])
+
+
+def active_events_query(creator_id):
+    """Поля EventSnapshot активных событий пользователя в порядке файла и даты"""
+    return select(*(getattr(Event, field) for field in EventSnapshot._fields)).where(
+        Event.creator_id == creator_id,
+        Event.is_active == True
+    ).order_by(Event.file_name, Event.event_date)
+
+
+def user_event_query(event_id, creator_id):
+    """Активное событие пользователя по id"""
+    return select(Event).where(
+        Event.event_id == event_id,
+        Event.creator_id == creator_id,
+        Event.is_active == True
+    )
+
+
+def reminders_query(user_id, current_date):
+    """
+    Напоминания пользователя одним запросом.
+
+    Каждая строка помечена разделом: 0 — просрочено, 1 — сегодня, 2 — приближается
+    (в пределах REMINDER_HORIZON_DAYS дней и уже наступил срок «напомнить за N дней»).
+    Строки (раздел, файл, событие, дата) упорядочены по разделу, файлу и дате.
+    """
+    today_start = datetime.combine(current_date, datetime.min.time())
+    tomorrow_start = today_start + timedelta(days=1)
+    horizon_end = tomorrow_start + timedelta(days=REMINDER_HORIZON_DAYS)
+
+    bucket = case(
+        (Event.event_date < today_start, 0),
+        (Event.event_date < tomorrow_start, 1),
+        else_=2
+    ).label("bucket")
+
+    return select(bucket, Event.file_name, Event.event_name, Event.event_date).where(
+        Event.creator_id == user_id,
+        Event.is_active == True,
+        Event.event_date < horizon_end,
+        or_(
+            Event.event_date < tomorrow_start,
+            days_before(Event.event_date, Event.remind_before) <= current_date
+        )
+    ).order_by(bucket, Event.file_name, Event.event_date)
+
+
+def telegram_chat_ids_query(event_id):
+    """Адреса Telegram получателей события в порядке добавления"""
+    return select(EventRecipient.address).where(
+        EventRecipient.event_id == event_id,
+        EventRecipient.channel == NotificationType.TELEGRAM.value
+    ).order_by(EventRecipient.recipient_id)
@@ -0,0 +1,99 @@
+import re
+from collections import defaultdict
+
+from models import Event, EventRecipient, NotificationType
+from services.events.queries import telegram_chat_ids_query
+
+# Разделители адресов в ячейке файла: запятая, точка с запятой, пробелы
+_SEPARATORS = re.compile(r"[,;\s]+")
+
+# Числовой ID, прочитанный из Excel как число с плавающей точкой: 123456789.0
+_FLOAT_ID = re.compile(r"(-?\d+)\.0+")
+
+# Размер пакета IN (...) и вставки: укладывается в лимит параметров SQLite
+BATCH_SIZE = 500
+
+
+def split_addresses(value):
+    """Список адресов из ячейки без пустых значений и повторов, в исходном порядке"""
+    if not value:
+        return []
+    addresses = []
+    for address in _SEPARATORS.split(str(value)):
+        match = _FLOAT_ID.fullmatch(address)
+        if match:
+            address = match.group(1)
+        if address and address not in addresses:
+            addresses.append(address)
+    return addresses
+
+
+def recipients_of(telegram_ids, emails):
+    """Пары (канал, адрес) для значений колонок «ID ответственных» и «Email ответственного»"""
+    return [(NotificationType.TELEGRAM.value, address) for address in split_addresses(telegram_ids)] + \
+           [(NotificationType.EMAIL.value, address) for address in split_addresses(emails)]
+
+
+def _batches(items, size=BATCH_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def replace_recipients(db, recipients):
+    """
+    Замена получателей событий пакетами: удаление прежних и вставка новых.
+
+    Args:
+        recipients: {event_id: [(канал, адрес), ...]}
+    """
+    event_ids = list(recipients)
+    for batch in _batches(event_ids):
+        db.query(EventRecipient).filter(EventRecipient.event_id.in_(batch)).delete(synchronize_session=False)
+
+    rows = [
+        {"event_id": event_id, "channel": channel, "address": address}
+        for event_id, pairs in recipients.items()
+        for channel, address in pairs
+    ]
+    for batch in _batches(rows):
+        db.execute(EventRecipient.__table__.insert(), batch)
+
+
+def load_recipients(db, event_ids, channel=None):
+    """
+    Получатели нескольких событий одним запросом на пакет.
+
+    Returns:
+        {event_id: [(канал, адрес), ...]}
+    """
+    result = defaultdict(list)
+    for batch in _batches(list(event_ids)):
+        query = db.query(EventRecipient.event_id, EventRecipient.channel, EventRecipient.address).filter(
+            EventRecipient.event_id.in_(batch)
+        )
+        if channel is not None:
+            query = query.filter(EventRecipient.channel == channel)
+        for event_id, recipient_channel, address in query.order_by(EventRecipient.recipient_id):
+            result[event_id].append((recipient_channel, address))
+    return result
+
+
+def telegram_chat_ids(db, event_id):
+    """Адреса Telegram получателей события"""
+    return db.execute(telegram_chat_ids_query(event_id)).scalars().all()
+
+
+def chat_id(address):
+    """chat_id для Bot.send_message: числовой ID или @username как есть"""
+    return int(address) if address.lstrip("-").isdigit() else address
+
+
+def events_for_address(db, channel, address, since, until):
+    """Активные события, о которых пора напомнить адресу в интервале next_reminder [since, until)"""
+    return db.query(Event).join(EventRecipient, EventRecipient.event_id == Event.event_id).filter(
+        EventRecipient.channel == channel,
+        EventRecipient.address == str(address),
+        Event.is_active == True,
+        Event.next_reminder >= since,
+        Event.next_reminder < until
+    ).order_by(Event.next_reminder).all()
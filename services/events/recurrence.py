@@ -0,0 +1,176 @@
+"""
+Повторение событий по repeat_type и periodicity (в месяцах) целыми колонками.
+
+Повторения отсчитываются от дня месяца исходной даты (anchor_day): 31 января
+с повтором раз в месяц даёт 28 (29) февраля, затем 31 марта — день, урезанный
+до конца короткого месяца, не переносится на следующие месяцы.
+"""
+import numpy as np
+import pandas as pd
+
+# Значение «Повтор события», при котором событие повторяется каждые periodicity месяцев
+MONTHLY = "ежемесячно"
+
+
+def recurrence_months(repeat_type, periodicity):
+    """
+    Шаг повторения в месяцах для каждой строки; 0 — событие не повторяется.
+
+    Для «Ежемесячно» без периодичности шаг — один месяц.
+    """
+    repeat_type = pd.Series(repeat_type, dtype=object)
+    periodicity = pd.Series(periodicity, index=repeat_type.index, dtype=object)
+    monthly = repeat_type.fillna("").astype(str).str.strip().str.lower() == MONTHLY
+    months = pd.to_numeric(periodicity, errors="coerce").fillna(0).astype(int).clip(lower=1)
+    return months.where(monthly, 0)
+
+
+def _month_index(dates):
+    return dates.dt.year.to_numpy() * 12 + dates.dt.month.to_numpy() - 1
+
+
+def _build_dates(month_index, anchor_days, time_of_day):
+    """Даты по номеру месяца с днём anchor_day, урезанным до длины месяца"""
+    years = month_index // 12
+    months = month_index % 12 + 1
+    starts = pd.to_datetime({"year": years, "month": months, "day": np.ones_like(years)})
+    days = np.minimum(anchor_days, starts.dt.days_in_month.to_numpy())
+    return starts + pd.to_timedelta(days - 1, unit="D") + time_of_day
+
+
+def _frame_parts(event_dates, anchor_days):
+    event_dates = pd.Series(pd.to_datetime(event_dates)).reset_index(drop=True)
+    if anchor_days is None:
+        anchor_days = event_dates.dt.day
+    anchor_days = pd.Series(anchor_days, dtype=object).reset_index(drop=True)
+    anchor_days = pd.to_numeric(anchor_days, errors="coerce").fillna(event_dates.dt.day).astype(int).to_numpy()
+    time_of_day = (event_dates - event_dates.dt.normalize()).reset_index(drop=True)
+    return event_dates, anchor_days, time_of_day
+
+
+def next_occurrences(event_dates, months, not_before, anchor_days=None, min_steps=1):
+    """
+    Ближайшее повторение каждого события не раньше not_before.
+
+    Пропущенные периоды (например, после простоя бота) не перебираются по одному:
+    количество шагов вычисляется сразу по разнице номеров месяцев.
+
+    Args:
+        event_dates: текущие даты событий
+        months: шаг повторения в месяцах (> 0)
+        not_before: граница — скаляр или значения по строкам
+        anchor_days: день месяца исходной даты; по умолчанию — день event_dates
+        min_steps: не меньше скольких шагов сделать (0 — текущая дата подходит, если не раньше границы)
+
+    Returns:
+        Series дат повторений с индексом event_dates
+    """
+    index = pd.Series(event_dates).index
+    event_dates, anchor_days, time_of_day = _frame_parts(event_dates, anchor_days)
+    months = np.asarray(months, dtype=np.int64)
+    if np.ndim(not_before):
+        not_before = pd.Series(pd.to_datetime(np.asarray(not_before)))
+    else:
+        not_before = pd.Series(pd.Timestamp(not_before), index=range(len(event_dates)))
+
+    base = _month_index(event_dates)
+    steps = np.ceil((_month_index(not_before) - base) / months).astype(np.int64)
+    steps = np.maximum(steps, min_steps)
+
+    occurrences = _build_dates(base + steps * months, anchor_days, time_of_day)
+    # В месяце границы повторение может прийтись на день раньше неё: ещё один шаг
+    early = (occurrences < not_before).to_numpy()
+    if early.any():
+        steps = steps + early
+        occurrences = _build_dates(base + steps * months, anchor_days, time_of_day)
+    occurrences.index = index
+    return occurrences
+
+
+def expand_occurrences(events, count):
+    """
+    Следующие count повторений каждого повторяющегося события для прогноза нагрузки.
+
+    Args:
+        events: DataFrame с колонками event_id, event_date, repeat_type, periodicity, remind_before
+                и необязательной anchor_day
+        count: количество повторений, начиная с текущей даты события
+
+    Returns:
+        DataFrame event_id, occurrence, reminder — по count строк на повторяющееся событие
+    """
+    months = recurrence_months(events["repeat_type"], events["periodicity"]).to_numpy()
+    recurring = events[months > 0]
+    months = months[months > 0]
+    if recurring.empty or count <= 0:
+        return pd.DataFrame({
+            "event_id": pd.Series(dtype="int64"),
+            "occurrence": pd.Series(dtype="datetime64[ns]"),
+            "reminder": pd.Series(dtype="datetime64[ns]"),
+        })
+
+    event_dates, anchor_days, time_of_day = _frame_parts(
+        recurring["event_date"], recurring["anchor_day"] if "anchor_day" in recurring else None
+    )
+    steps = np.tile(np.arange(count), len(recurring))
+    base = np.repeat(_month_index(event_dates), count)
+    occurrences = _build_dates(
+        base + steps * np.repeat(months, count),
+        np.repeat(anchor_days, count),
+        pd.Series(np.repeat(time_of_day.to_numpy(), count))
+    )
+    remind_before = np.repeat(recurring["remind_before"].to_numpy(dtype=np.int64), count)
+    return pd.DataFrame({
+        "event_id": np.repeat(recurring["event_id"].to_numpy(), count),
+        "occurrence": occurrences.to_numpy(),
+        "reminder": (occurrences - pd.to_timedelta(remind_before, unit="D")).to_numpy(),
+    })
+
+
+def advance_events(events, cutoff):
+    """
+    Новые event_date и next_reminder для пачки отправленных событий.
+
+    Повторяющееся событие переносится на ближайшее повторение, напоминание о котором
+    ещё не наступило (не раньше cutoff); у разового события next_reminder сбрасывается.
+
+    Args:
+        events: объекты Event (или строки с теми же полями)
+        cutoff: граница обхода наступивших напоминаний
+
+    Returns:
+        список словарей для bulk_update_mappings(Event, ...)
+    """
+    frame = pd.DataFrame([{
+        "event_id": event.event_id,
+        "event_date": event.event_date,
+        "repeat_type": event.repeat_type,
+        "periodicity": event.periodicity,
+        "remind_before": event.remind_before,
+        "anchor_day": event.anchor_day,
+    } for event in events])
+    if frame.empty:
+        return []
+
+    months = recurrence_months(frame["repeat_type"], frame["periodicity"]).to_numpy()
+    recurring = frame[months > 0]
+    updates = [{"event_id": int(event_id), "next_reminder": None} for event_id in frame["event_id"][months == 0]]
+    if recurring.empty:
+        return updates
+
+    remind_before = pd.to_timedelta(recurring["remind_before"].to_numpy(dtype=np.int64), unit="D")
+    occurrences = next_occurrences(
+        recurring["event_date"], months[months > 0], pd.Timestamp(cutoff) + remind_before,
+        recurring["anchor_day"].to_numpy(dtype=object)
+    )
+    reminders = occurrences - remind_before
+    anchor_days = _frame_parts(recurring["event_date"], recurring["anchor_day"].to_numpy(dtype=object))[1]
+    for event_id, occurrence, reminder, anchor_day in zip(
+            recurring["event_id"], occurrences, reminders, anchor_days):
+        updates.append({
+            "event_id": int(event_id),
+            "event_date": occurrence.to_pydatetime(),
+            "next_reminder": reminder.to_pydatetime(),
+            "anchor_day": int(anchor_day),
+        })
+    return updates
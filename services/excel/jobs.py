@@ -0,0 +1,243 @@
+import logging
+import os
+import socket
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from io import BytesIO
+
+from sqlalchemy import func
+
+from config.settings import (
+    IMPORT_WORKERS, IMPORT_MAX_JOBS_PER_USER, IMPORT_JOB_STALE_SECONDS, UPLOAD_SPOOL_THRESHOLD_MB, EXCEL_TEMP_DIR
+)
+from core.database import SessionLocal
+from models import ImportJob, ImportJobStatus
+from services.excel.parser import process_excel
+
+logger = logging.getLogger(__name__)
+
+# Не чаще одного редактирования сообщения с прогрессом в секунду (лимиты Telegram)
+PROGRESS_EDIT_INTERVAL = 1.0
+
+# Идентификатор процесса бота: владелец поставленных им задач импорта
+INSTANCE_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def format_count(value):
+    """12000 -> '12 000'"""
+    return f"{value:,}".replace(",", " ")
+
+
+def open_upload_buffer(file_size):
+    """
+    Буфер для скачивания загрузки: небольшие файлы остаются в памяти,
+    крупные пишутся в анонимный временный файл с уникальным именем
+    """
+    if file_size is not None and file_size > UPLOAD_SPOOL_THRESHOLD_MB * 1024 * 1024:
+        return tempfile.TemporaryFile(dir=EXCEL_TEMP_DIR)
+    return BytesIO()
+
+
+def _update_job(job_id, **fields):
+    """Обновление записи задачи отдельной короткой транзакцией"""
+    db = SessionLocal()
+    try:
+        db.query(ImportJob).filter(ImportJob.job_id == job_id).update(fields, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def heartbeat_jobs(owner_id=INSTANCE_ID):
+    """Отметка незавершённых задач процесса: по ней другие процессы видят, что он жив"""
+    db = SessionLocal()
+    try:
+        db.query(ImportJob).filter(
+            ImportJob.owner_id == owner_id,
+            ImportJob.status.in_([ImportJobStatus.QUEUED, ImportJobStatus.RUNNING])
+        ).update({ImportJob.heartbeat_at: datetime.utcnow()}, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def recover_interrupted_jobs(owner_id=INSTANCE_ID, stale_seconds=IMPORT_JOB_STALE_SECONDS):
+    """
+    Помечает как завершившиеся с ошибкой задачи, прерванные остановкой процесса.
+
+    Задача прервана, если её процесс-владелец не отмечал её дольше stale_seconds.
+    Задачи других работающих процессов бота с общей базой не затрагиваются.
+    """
+    stale_before = datetime.utcnow() - timedelta(seconds=stale_seconds)
+    db = SessionLocal()
+    try:
+        count = db.query(ImportJob).filter(
+            ImportJob.status.in_([ImportJobStatus.QUEUED, ImportJobStatus.RUNNING]),
+            (ImportJob.owner_id.is_(None)) | (ImportJob.owner_id != owner_id),
+            # Задачи без отметки (созданные до её появления) — по времени создания
+            func.coalesce(ImportJob.heartbeat_at, ImportJob.created_at) < stale_before
+        ).update({
+            ImportJob.status: ImportJobStatus.FAILED,
+            ImportJob.error_message: "Прервано остановкой бота",
+            ImportJob.finished_at: datetime.utcnow()
+        }, synchronize_session=False)
+        db.commit()
+        if count:
+            logger.warning(f"Задач импорта прервано остановкой бота: {count}")
+    finally:
+        db.close()
+
+
+def import_jobs_job(context):
+    """Периодическая задача job_queue бота: отметка своих задач и освобождение прерванных"""
+    try:
+        heartbeat_jobs()
+        recover_interrupted_jobs()
+    except Exception as e:
+        logger.error(f"Ошибка проверки задач импорта: {str(e)}", exc_info=True)
+
+
+class ImportQueue:
+    """Очередь фоновых задач импорта с ограниченным пулом потоков"""
+
+    def __init__(self, max_workers, max_jobs_per_user):
+        self.max_jobs_per_user = max_jobs_per_user
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="import")
+        self._lock = threading.Lock()
+        self._active = {}  # user_id -> количество задач в очереди и в работе
+
+    def submit(self, bot, chat_id, message_id, user_id, file_id, file_name, file_size=None):
+        """
+        Постановка загрузки в очередь.
+
+        Returns:
+            job_id или None, если у пользователя уже максимум задач
+        """
+        with self._lock:
+            if self._active.get(user_id, 0) >= self.max_jobs_per_user:
+                return None
+            self._active[user_id] = self._active.get(user_id, 0) + 1
+
+        try:
+            db = SessionLocal()
+            try:
+                job = ImportJob(
+                    creator_id=user_id,
+                    chat_id=chat_id,
+                    message_id=message_id,
+                    file_name=file_name,
+                    status=ImportJobStatus.QUEUED,
+                    owner_id=INSTANCE_ID,
+                    heartbeat_at=datetime.utcnow()
+                )
+                db.add(job)
+                db.commit()
+                job_id = job.job_id
+            finally:
+                db.close()
+
+            self.executor.submit(
+                self._run, job_id, bot, chat_id, message_id, user_id, file_id, file_name, file_size
+            )
+            logger.info(f"Задача импорта {job_id} ({file_name}) поставлена в очередь")
+            return job_id
+        except Exception:
+            self._release(user_id)
+            raise
+
+    def shutdown(self, wait=True):
+        """Остановка пула: дожидается завершения начатых задач"""
+        self.executor.shutdown(wait=wait)
+
+    def _release(self, user_id):
+        with self._lock:
+            self._active[user_id] -= 1
+            if not self._active[user_id]:
+                del self._active[user_id]
+
+    def _edit_message(self, bot, chat_id, message_id, text):
+        try:
+            bot.edit_message_text(chat_id=chat_id, message_id=message_id, text=text)
+        except Exception as e:
+            logger.warning(f"Не удалось обновить сообщение о прогрессе: {e}")
+
+    def _run(self, job_id, bot, chat_id, message_id, user_id, file_id, file_name, file_size):
+        """Выполнение задачи в потоке пула"""
+        buffer = None
+        last_edit = 0.0
+
+        def on_progress(processed, total):
+            nonlocal last_edit
+            _update_job(job_id, processed_rows=processed, total_rows=total)
+            now = time.monotonic()
+            if now - last_edit >= PROGRESS_EDIT_INTERVAL:
+                last_edit = now
+                total_text = format_count(total) if total else "?"
+                self._edit_message(
+                    bot, chat_id, message_id,
+                    f"⏳ Обработка {file_name}: {format_count(processed)} / {total_text} строк"
+                )
+
+        try:
+            _update_job(job_id, status=ImportJobStatus.RUNNING, started_at=datetime.utcnow())
+
+            # Скачиваем файл в память (или во временный файл, если он большой)
+            buffer = open_upload_buffer(file_size)
+            bot.get_file(file_id).download(out=buffer)
+
+            result = process_excel(buffer, user_id, file_name, progress=on_progress)
+
+            _update_job(
+                job_id,
+                status=ImportJobStatus.DONE,
+                events_created=result.created,
+                events_updated=result.updated,
+                error_count=len(result.errors),
+                finished_at=datetime.utcnow()
+            )
+
+            if result.skipped:
+                self._edit_message(
+                    bot, chat_id, message_id,
+                    f"ℹ️ Файл {file_name} не изменился с прошлой загрузки — события уже актуальны."
+                )
+                return
+
+            message = (
+                f"✅ Файл {file_name} успешно обработан!\n"
+                f"Добавлено событий: {result.created}\n"
+                f"Обновлено событий: {result.updated}\n"
+                f"Без изменений: {result.unchanged}"
+            )
+            if result.removed:
+                message += f"\n🗂 Отсутствуют в новой версии файла: {result.removed}"
+            if result.errors:
+                message += f"\n⚠️ Строк с ошибками: {len(result.errors)}\n" + "\n".join(result.errors[:10])
+            self._edit_message(bot, chat_id, message_id, message)
+
+        except Exception as e:
+            logger.error(f"Ошибка задачи импорта {job_id}: {str(e)}", exc_info=True)
+            _update_job(
+                job_id,
+                status=ImportJobStatus.FAILED,
+                error_message=str(e),
+                finished_at=datetime.utcnow()
+            )
+            self._edit_message(
+                bot, chat_id, message_id,
+                "❌ Произошла ошибка при обработке файла.\n"
+                "Убедитесь, что файл соответствует формату."
+            )
+
+        finally:
+            self._release(user_id)
+            # Временный файл удаляется системой при закрытии
+            if buffer is not None:
+                buffer.close()
+
+
+import_queue = ImportQueue(IMPORT_WORKERS, IMPORT_MAX_JOBS_PER_USER)
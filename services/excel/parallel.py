@@ -0,0 +1,169 @@
+import logging
+import multiprocessing
+import os
+import shutil
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+from openpyxl import load_workbook
+
+from config.settings import EXCEL_SPLIT_SHEETS, EXCEL_STREAMING_THRESHOLD_MB, IMPORT_PROCESSES
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def is_zip(file_name):
+    return file_name.lower().endswith(".zip")
+
+
+def _spool(source, path):
+    """Копирование загрузки в файл path блоками, без чтения целиком в память"""
+    if hasattr(source, "read"):
+        source.seek(0)
+        with open(path, "wb") as f:
+            shutil.copyfileobj(source, f)
+        source.seek(0)
+        return path
+    return source
+
+
+def list_parts(source, file_name, work_dir, errors=None):
+    """
+    Части загрузки, которые разбираются независимо.
+
+    ZIP-архив даёт по части на каждую книгу .xlsx (имя файла событий — путь книги
+    в архиве). При EXCEL_SPLIT_SHEETS книга с несколькими листами даёт по части
+    на лист: первый лист остаётся под именем книги, как при обычной загрузке,
+    остальные получают имя файла «книга / лист». Части передаются в пул процессов
+    путём к файлу в work_dir, а не содержимым: книга копируется на диск один раз.
+
+    Каталоги и служебные файлы macOS (__MACOSX/) в архиве пропускаются, о прочих
+    файлах, кроме книг .xlsx, сообщается в errors.
+
+    Args:
+        errors: необязательный список, в который добавляются сообщения о пропущенных файлах архива
+
+    Returns:
+        список (имя файла событий, путь к книге, имя листа) или None,
+        если загрузка читается как обычная книга (только первый лист)
+    """
+    if is_zip(file_name):
+        parts = []
+        with zipfile.ZipFile(source) as archive:
+            for number, member in enumerate(archive.infolist()):
+                name = member.filename
+                if member.is_dir() or name.startswith("__MACOSX/"):
+                    logger.info(f"Архив {file_name}: пропущен служебный элемент {name}")
+                    continue
+                if not name.lower().endswith(".xlsx"):
+                    logger.warning(f"Архив {file_name}: пропущен файл {name}")
+                    if errors is not None:
+                        errors.append(f"{name}: пропущен, в архиве обрабатываются только книги .xlsx")
+                    continue
+                path = os.path.join(work_dir, f"part-{number}.xlsx")
+                with archive.open(member) as data, open(path, "wb") as f:
+                    shutil.copyfileobj(data, f)
+                parts.append((name, path, None))
+        if hasattr(source, "seek"):
+            source.seek(0)
+        return parts
+
+    if not EXCEL_SPLIT_SHEETS:
+        return None
+
+    workbook = load_workbook(source, read_only=True)
+    try:
+        sheet_names = workbook.sheetnames
+    finally:
+        workbook.close()
+        if hasattr(source, "seek"):
+            source.seek(0)
+
+    if len(sheet_names) < 2:
+        return None
+
+    path = _spool(source, os.path.join(work_dir, "workbook.xlsx"))
+    return [
+        (f"{file_name} / {sheet_name}" if number else file_name, path, sheet_name)
+        for number, sheet_name in enumerate(sheet_names)
+    ]
+
+
+def is_large_part(path):
+    """Книги больше EXCEL_STREAMING_THRESHOLD_MB читаются потоково в потоке записи, а не в пуле"""
+    return os.path.getsize(path) > EXCEL_STREAMING_THRESHOLD_MB * 1024 * 1024
+
+
+def parse_part(path, sheet_name=None):
+    """
+    Разбор одной книги или листа в отдельном процессе.
+
+    Returns:
+        (DataFrame из prepare_events, ошибки, количество строк)
+    """
+    from services.excel.parser import prepare_events
+
+    df = pd.read_excel(path, sheet_name=sheet_name or 0, header=None, dtype=str)
+    # Пропускаем первую строку (заголовки) и полностью пустые строки
+    df = df.iloc[1:].dropna(how="all")
+    frame, errors = prepare_events(df)
+    return frame, errors, len(df)
+
+
+def _get_executor():
+    """Пул процессов создаётся при первой многочастной загрузке"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn: дочерние процессы не наследуют потоки и соединения бота
+            _executor = ProcessPoolExecutor(
+                max_workers=IMPORT_PROCESSES,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _executor
+
+
+def iter_parsed_parts(parts):
+    """
+    Параллельный разбор частей в пуле процессов.
+
+    Yields:
+        (имя файла событий, DataFrame, ошибки, количество строк) по мере готовности
+    """
+    if IMPORT_PROCESSES <= 1:
+        # Один процесс: разбираем на месте, без затрат на запуск пула
+        for name, path, sheet_name in parts:
+            try:
+                frame, errors, rows = parse_part(path, sheet_name)
+            except Exception as e:
+                logger.error(f"Ошибка разбора {name}: {str(e)}")
+                yield name, None, [f"Не удалось прочитать: {str(e)}"], 0
+                continue
+            yield name, frame, errors, rows
+        return
+
+    executor = _get_executor()
+    futures = {executor.submit(parse_part, path, sheet_name): name for name, path, sheet_name in parts}
+    for future in as_completed(futures):
+        name = futures[future]
+        try:
+            frame, errors, rows = future.result()
+        except Exception as e:
+            logger.error(f"Ошибка разбора {name}: {str(e)}")
+            yield name, None, [f"Не удалось прочитать: {str(e)}"], 0
+            continue
+        yield name, frame, errors, rows
+
+
+def shutdown_process_pool():
+    """Остановка пула процессов при завершении бота"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown()
+            _executor = None
@@ -1,14 +1,65 @@
+import hashlib
 import logging
 import os
-from datetime import datetime, timedelta
+import tempfile
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from itertools import chain
 
 import pandas as pd
+from sqlalchemy import func, or_, select
 
+from config.settings import EXCEL_STREAMING_THRESHOLD_MB, EXCEL_CHUNK_SIZE, EXCEL_TEMP_DIR
 from core.database import SessionLocal
-from models import Event
+from models import Event, UploadedFile, UploadedFilePart
+from services.events.cache import event_cache
+from services.events.recipients import split_addresses
+from services.events.recurrence import next_occurrences, recurrence_months
+from services.excel.parallel import is_large_part, iter_parsed_parts, list_parts
+from services.excel.reader import (
+    excel_row_count, file_format, iter_csv_chunks, iter_excel_chunks, iter_parquet_chunks, parquet_row_count,
+    read_excel_frame, split_frame
+)
+from services.excel.upsert import load_existing_keys, upsert_events
+from services.notifications.timing_wheel import reminder_wheel
+from utils.dates import parse_date, parse_date_column
 
 logger = logging.getLogger(__name__)
 
+# Порядок колонок (индексы начинаются с 0)
+COLUMN_ORDER = {
+    0: "Событие",
+    1: "Дата наступления",
+    2: "За сколько дней напомнить",
+    3: "Повтор события",
+    4: "Периодичность (мес)",
+    5: "Email ответственного",
+    6: "ID ответственных"
+}
+
+# Внутренние имена колонок подготовленного DataFrame
+COLUMNS = [
+    "event_name",
+    "event_date",
+    "remind_before",
+    "repeat_type",
+    "periodicity",
+    "responsible_email",
+    "responsible_ids"
+]
+
+# Результат импорта: количество созданных, изменённых, неизменённых и исчезнувших из файла
+# событий, ошибки по строкам и признак пропуска импорта для файла без изменений
+ImportResult = namedtuple(
+    "ImportResult",
+    ["created", "updated", "errors", "unchanged", "removed", "skipped"],
+    defaults=(0, 0, False)
+)
+
+# Размер блока при вычислении хэша содержимого файла
+HASH_BLOCK_SIZE = 1024 * 1024
+
 
 def validate_row(row, idx):
     """Валидация строки данных."""
@@ -25,137 +76,419 @@ def validate_row(row, idx):
         errors.append(f"Строка {idx + 1}: Поле 'За сколько дней напомнить' должно быть числом")
 
     # Проверка даты
-    try:
-        date_str = str(row.iloc[1]).strip()
-        datetime.strptime(date_str, "%Y-%m-%d %H:%M:%S")
-    except ValueError:
-        try:
-            datetime.strptime(date_str, "%Y-%m-%d")
-        except ValueError:
-            try:
-                datetime.strptime(date_str, "%d.%m.%Y")
-            except ValueError:
-                errors.append(f"Строка {idx + 1}: Некорректный формат даты '{date_str}'")
+    date_str = str(row.iloc[1]).strip()
+    if parse_date(date_str) is None:
+        errors.append(f"Строка {idx + 1}: Некорректный формат даты '{date_str}'")
 
     return errors
 
 
-def process_excel(file_path, user_id, file_name):
-    """Обработка Excel файла"""
+def _clean_text(series):
+    """Обрезка пробелов; пустые строки превращаются в пропуски"""
+    series = series.astype("string").str.strip()
+    return series.mask(series == "")
+
+
+def _to_python(series):
+    """Пропуски pandas заменяются на None для записи в базу"""
+    return series.astype(object).where(series.notna(), None)
+
+
+def prepare_events(df):
+    """
+    Валидация и преобразование строк Excel целиком по колонкам.
+
+    Args:
+        df: DataFrame со строками файла (без заголовка), индекс — номер строки в файле с нуля
+
+    Returns:
+        (DataFrame с корректными строками в колонках COLUMNS и next_reminder, список ошибок)
+    """
+    df = df.reindex(columns=range(len(COLUMNS)))
+    frame = pd.DataFrame(index=df.index)
+    for position, column in enumerate(COLUMNS):
+        frame[column] = _clean_text(df[position])
+
+    event_dates = parse_date_column(frame["event_date"])
+    remind_valid = frame["remind_before"].str.fullmatch(r"\d+").fillna(False).astype(bool)
+
+    valid = frame["event_name"].notna() & event_dates.notna() & remind_valid
+
+    # Построчная работа только для ошибочных строк — формируем понятные сообщения
+    errors = []
+    for idx in frame.index[~valid]:
+        errors.extend(validate_row(df.loc[idx], idx))
+
+    frame = frame[valid].copy()
+    frame["event_date"] = event_dates[valid]
+    frame["remind_before"] = frame["remind_before"].astype(int)
+
+    # Проверка значения "Периодичность"
+    periodicity = frame["periodicity"]
+    no_period = periodicity.isna() | (periodicity.str.lower() == "нет")
+    numeric_period = pd.to_numeric(periodicity.where(~no_period), errors="coerce")
+    invalid_period = ~no_period & numeric_period.isna()
+    for idx in frame.index[invalid_period]:
+        logger.error(
+            f"Строка {idx + 1}: Некорректное значение периодичности '{periodicity[idx]}', установлено значение 0")
+    frame["periodicity"] = numeric_period.fillna(0).astype(int)
+
+    for column in ("event_name", "repeat_type", "responsible_email", "responsible_ids"):
+        frame[column] = _to_python(frame[column])
+
+    # ID ответственных в едином виде для показа; сами получатели пишутся в event_recipients
+    frame["responsible_telegram_ids"] = frame["responsible_ids"].map(
+        lambda value: ",".join(split_addresses(value)) or None
+    )
+
+    # Отпечаток строки по уже нормализованным значениям: смена формата даты не считается изменением,
+    # а дата считается по файлу, до переноса повторяющихся событий
+    frame["row_hash"] = pd.util.hash_pandas_object(frame[COLUMNS], index=False).astype(str)
+
+    # Повторяющееся событие с прошедшей датой переносится на ближайшее повторение с сегодняшнего дня
+    frame["anchor_day"] = frame["event_date"].dt.day
+    today = pd.Timestamp.now().normalize()
+    months = recurrence_months(frame["repeat_type"], frame["periodicity"])
+    stale = (months > 0) & (frame["event_date"] < today)
+    if stale.any():
+        frame.loc[stale, "event_date"] = next_occurrences(
+            frame["event_date"][stale], months[stale], today,
+            frame["anchor_day"][stale], min_steps=0
+        )
+
+    # Устанавливаем дату напоминания; разовое событие с прошедшей датой сохраняется без напоминания
+    next_reminder = frame["event_date"] - pd.to_timedelta(frame["remind_before"], unit="D")
+    frame["next_reminder"] = _to_python(next_reminder.mask((months == 0) & (frame["event_date"] < today)))
+
+    return frame, errors
+
+
+def _rewind(source):
+    """Файловый объект читается несколько раз: перед каждым чтением возвращаемся в начало"""
+    if hasattr(source, "seek"):
+        source.seek(0)
+    return source
+
+
+def _source_size(source):
+    """Размер файла по пути или файлового объекта"""
+    if hasattr(source, "seek"):
+        size = source.seek(0, os.SEEK_END)
+        source.seek(0)
+        return size
+    return os.path.getsize(source)
+
+
+def file_hash(source):
+    """sha256 содержимого файла (путь или файловый объект)"""
+    digest = hashlib.sha256()
+    if hasattr(source, "read"):
+        f = _rewind(source)
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+        _rewind(source)
+    else:
+        with open(source, "rb") as f:
+            for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def _stored_hash(db, user_id, file_name):
+    return db.query(UploadedFile.content_hash).filter(
+        UploadedFile.creator_id == user_id,
+        UploadedFile.file_name == file_name
+    ).scalar()
+
+
+def _save_hash(db, user_id, file_name, content_hash, part_names=None):
+    """
+    Сохранение отпечатка загрузки.
+
+    Args:
+        part_names: файлы событий многочастной загрузки (книги архива, листы книги) —
+                    по ним сбрасывается отпечаток, когда события части перезаписывает другой пользователь
+    """
+    uploaded = db.query(UploadedFile).filter(
+        UploadedFile.creator_id == user_id,
+        UploadedFile.file_name == file_name
+    ).first()
+    if uploaded:
+        uploaded.content_hash = content_hash
+    else:
+        uploaded = UploadedFile(creator_id=user_id, file_name=file_name, content_hash=content_hash)
+        db.add(uploaded)
+        db.flush()
+
+    db.query(UploadedFilePart).filter(
+        UploadedFilePart.uploaded_file_id == uploaded.uploaded_file_id
+    ).delete(synchronize_session=False)
+    if part_names:
+        db.bulk_insert_mappings(UploadedFilePart, [
+            {"uploaded_file_id": uploaded.uploaded_file_id, "file_name": name} for name in dict.fromkeys(part_names)
+        ])
+
+
+def _invalidate_hashes(db, user_id, file_name):
+    """
+    Сброс отпечатков загрузок других пользователей, записавших события файла file_name.
+
+    События записываются по ключу (file_name, event_name) для всех пользователей:
+    после чужой загрузки повторная загрузка прежнего содержимого не должна пропускаться.
+    Сбрасываются отпечатки загрузок с тем же именем и многочастных загрузок
+    (архивов, книг по листам), в которых была часть file_name.
+    """
+    archives = select(UploadedFilePart.uploaded_file_id).where(UploadedFilePart.file_name == file_name)
+    stale = [uploaded_file_id for uploaded_file_id, in db.query(UploadedFile.uploaded_file_id).filter(
+        UploadedFile.creator_id != user_id,
+        or_(UploadedFile.file_name == file_name, UploadedFile.uploaded_file_id.in_(archives))
+    )]
+    if stale:
+        db.query(UploadedFilePart).filter(
+            UploadedFilePart.uploaded_file_id.in_(stale)
+        ).delete(synchronize_session=False)
+        db.query(UploadedFile).filter(UploadedFile.uploaded_file_id.in_(stale)).delete(synchronize_session=False)
+
+
+@contextmanager
+def _stage(stats, name):
+    """Накопление времени этапа импорта в stats (если передан)"""
+    if stats is None:
+        yield
+        return
+    start = time.perf_counter()
     try:
-        logger.info(f"Начало обработки файла: {file_path}")
+        yield
+    finally:
+        stats[name] = stats.get(name, 0.0) + time.perf_counter() - start
+
+
+def _prepare_chunks(chunks, stats=None):
+    """Валидация пачек сырых строк: (DataFrame, ошибки, количество строк)"""
+    chunks = iter(chunks)
+    while True:
+        with _stage(stats, "read"):
+            chunk = next(chunks, None)
+        if chunk is None:
+            return
+        with _stage(stats, "validate"):
+            frame, errors = prepare_events(chunk)
+        yield frame, errors, len(chunk)
+
+
+def _import_chunks(db, prepared, user_id, file_name, total_rows=None, progress=None, processed_offset=0,
+                   stats=None):
+    """
+    Пакетная запись подготовленных пачек строк; каждая пачка фиксируется отдельным commit
+
+    Сохранённые события читаются по названиям текущей пачки, а записанные события
+    попадают в очередь ближайших напоминаний после commit пачки: память не растёт
+    с количеством строк файла.
+
+    Args:
+        prepared: итератор (DataFrame из prepare_events, ошибки, количество строк)
+        progress: необязательный callback(обработано_строк, всего_строк) после каждого commit
+        processed_offset: строки, обработанные ранее в этой же загрузке (для прогресса)
+        stats: необязательный dict для времени этапов read/validate/upsert/commit в секундах
+    """
+    events_created = 0
+    events_updated = 0
+    events_unchanged = 0
+    processed_rows = processed_offset
+    errors = []
+
+    # События файла до загрузки: созданные в этой загрузке получают event_id больше last_id
+    previous_count, last_id = db.query(func.count(Event.event_id), func.max(Event.event_id)).filter(
+        Event.file_name == file_name).one()
+    matched = 0
+    for frame, chunk_errors, rows in prepared:
+        for error in chunk_errors:
+            logger.error(error)
+        errors.extend(chunk_errors)
+
+        with _stage(stats, "upsert"):
+            existing = load_existing_keys(db, file_name, frame["event_name"])
+            matched += sum(1 for event_id, _ in existing.values() if last_id is not None and event_id <= last_id)
+            written = []
+            created, updated, unchanged = upsert_events(db, user_id, file_name, frame, existing, written)
+        with _stage(stats, "commit"):
+            db.commit()
+        reminder_wheel.update(written)
+        events_created += created
+        events_updated += updated
+        events_unchanged += unchanged
+
+        processed_rows += rows
+        if progress:
+            progress(processed_rows, total_rows)
+
+    # Название, повторённое в разных пачках, учитывается в каждой из них, поэтому счётчик
+    # исчезнувших событий может быть занижен, но не уходит ниже нуля
+    events_removed = max(previous_count - matched, 0)
+
+    # ON CONFLICT обновляет события файла независимо от того, кто их загрузил раньше
+    if events_created or events_updated:
+        # Фиксируется вместе с отпечатком загрузки в process_excel
+        _invalidate_hashes(db, user_id, file_name)
+    creators = [creator_id for creator_id, in db.query(Event.creator_id).filter(
+        Event.file_name == file_name).distinct()]
+    event_cache.invalidate(user_id, *creators)
+
+    logger.info(
+        f"Файл {file_name}: создано событий: {events_created}, обновлено событий: {events_updated}, "
+        f"без изменений: {events_unchanged}, отсутствуют в файле: {events_removed}")
+    return ImportResult(events_created, events_updated, errors, events_unchanged, events_removed)
+
+
+def _streamed_parts(parts, stats=None):
+    """
+    Крупные части читаются потоково пачками по EXCEL_CHUNK_SIZE строк, как большие книги.
+
+    Yields:
+        (имя файла событий, пачки для _import_chunks, ошибки чтения)
+    """
+    for part_name, path, sheet_name in parts:
+        yield part_name, _prepare_chunks(iter_excel_chunks(path, EXCEL_CHUNK_SIZE, sheet_name), stats), []
+
+
+def _parsed_parts(parts, stats=None):
+    """
+    Небольшие части разбираются в пуле процессов целиком.
+
+    Yields:
+        (имя файла событий, пачки для _import_chunks или None, если часть не прочиталась, ошибки чтения)
+    """
+    parsed = iter_parsed_parts(parts)
+    while True:
+        # Чтение и валидация выполняются в пуле процессов: здесь учитывается ожидание результата
+        with _stage(stats, "read"):
+            part = next(parsed, None)
+        if part is None:
+            return
+
+        part_name, frame, part_errors, rows = part
+        part_errors = [f"{part_name}: {error}" for error in part_errors]
+        if frame is None:
+            yield part_name, None, part_errors
+        else:
+            yield part_name, [(frame, part_errors, rows)], []
+
+
+def _import_parts(db, parts, user_id, progress=None, stats=None):
+    """
+    Разбор частей (листов или книг архива) и запись результатов в единственном
+    потоке-писателе: небольшие части разбираются в пуле процессов по мере готовности,
+    части больше EXCEL_STREAMING_THRESHOLD_MB читаются потоково.
+    """
+    small = [part for part in parts if not is_large_part(part[1])]
+    large = [part for part in parts if is_large_part(part[1])]
+
+    total = ImportResult(0, 0, [])
+    processed_rows = 0
+
+    def on_progress(processed, total_rows):
+        nonlocal processed_rows
+        processed_rows = processed
+        if progress:
+            progress(processed, total_rows)
+
+    for part_name, prepared, part_errors in chain(_parsed_parts(small, stats), _streamed_parts(large, stats)):
+        if prepared is None:
+            total = total._replace(errors=total.errors + part_errors)
+            continue
+
+        result = _import_chunks(
+            db, prepared, user_id, part_name,
+            progress=on_progress, processed_offset=processed_rows, stats=stats
+        )
+        total = ImportResult(
+            total.created + result.created,
+            total.updated + result.updated,
+            total.errors + result.errors,
+            total.unchanged + result.unchanged,
+            total.removed + result.removed
+        )
+    return total
+
+
+def _read_chunks(source, file_name, stats=None):
+    """
+    Выбор способа чтения по формату и размеру файла.
+
+    CSV и Parquet всегда читаются потоково пачками по EXCEL_CHUNK_SIZE строк.
+
+    Returns:
+        (оценка количества строк или None, итератор пачек строк)
+    """
+    fmt = file_format(file_name)
+    if fmt == "csv":
+        return None, iter_csv_chunks(_rewind(source), EXCEL_CHUNK_SIZE)
+    if fmt == "parquet":
+        total_rows = parquet_row_count(_rewind(source))
+        return total_rows, iter_parquet_chunks(_rewind(source), EXCEL_CHUNK_SIZE)
+
+    if _source_size(source) > EXCEL_STREAMING_THRESHOLD_MB * 1024 * 1024:
+        total_rows = excel_row_count(_rewind(source))
+        return total_rows, iter_excel_chunks(_rewind(source), EXCEL_CHUNK_SIZE)
+
+    with _stage(stats, "read"):
+        df = read_excel_frame(_rewind(source))
+    return len(df), split_frame(df, EXCEL_CHUNK_SIZE)
+
+
+def process_excel(source, user_id, file_name, progress=None, stats=None):
+    """
+    Обработка Excel файла, ZIP-архива с файлами Excel, CSV или Parquet
+
+    Все форматы проходят одну и ту же валидацию (prepare_events) и запись (upsert_events).
+    Книги архива и листы многолистовой книги (при EXCEL_SPLIT_SHEETS) разбираются
+    параллельно в пуле процессов, запись в базу выполняется в одном потоке. Файлы больше
+    EXCEL_STREAMING_THRESHOLD_MB читаются потоково: память ограничена
+    размером пачки EXCEL_CHUNK_SIZE, а не размером файла.
+    Если содержимое совпадает с прошлой загрузкой этого файла пользователем,
+    импорт пропускается; иначе записываются только изменившиеся строки.
+
+    Args:
+        source: путь к файлу или файловый объект (например, BytesIO с загрузкой из Telegram)
+        progress: необязательный callback(обработано_строк, всего_строк)
+        stats: необязательный dict, в который складывается время этапов импорта
+
+    Returns:
+        ImportResult
+    """
+    try:
+        logger.info(f"Начало обработки файла: {file_name}")
 
         # Проверяем существование файла
-        if not os.path.exists(file_path):
-            logger.error(f"Файл не найден: {file_path}")
+        if not hasattr(source, "read") and not os.path.exists(source):
+            logger.error(f"Файл не найден: {source}")
             raise ValueError("Файл не найден")
 
-        # Читаем Excel файл, прося pandas читать все как текст
-        df = pd.read_excel(file_path, header=None, dtype=str)
-        logger.info(f"Файл прочитан успешно, строк: {len(df)}")
-
-        # Порядок колонок (индексы начинаются с 0)
-        column_order = {
-            0: "Событие",
-            1: "Дата наступления",
-            2: "За сколько дней напомнить",
-            3: "Повтор события",
-            4: "Периодичность (мес)",
-            5: "Email ответственного",
-            6: "ID ответственных"
-        }
-
-        events_created = 0
-        events_updated = 0
+        content_hash = file_hash(source)
+
         db = SessionLocal()
         try:
-            for idx, row in df.iterrows():
-                if idx == 0:  # Пропускаем первую строку (заголовки)
-                    continue
-
-                logger.info(f"Обработка строки {idx + 1}")
-                logger.debug(f"Данные строки {idx + 1}: {row.to_dict()}")  # Логируем данные строки
-
-                # Валидация строки
-                errors = validate_row(row, idx)
-                if errors:
-                    for error in errors:
-                        logger.error(error)
-                    continue
-
-                try:
-                    # Обработка даты
-                    date_str = str(row.iloc[1]).strip()
-                    try:
-                        event_date = datetime.strptime(date_str, "%Y-%m-%d %H:%M:%S")
-                    except ValueError:
-                        try:
-                            event_date = datetime.strptime(date_str, "%Y-%m-%d")
-                        except ValueError:
-                            event_date = datetime.strptime(date_str, "%d.%m.%Y")
-
-                    # Проверка значения "Периодичность"
-                    periodicity_value = row.iloc[4]
-                    if pd.isna(periodicity_value) or str(periodicity_value).strip().lower() == "нет":
-                        periodicity = 0
-                    else:
-                        try:
-                            periodicity = int(periodicity_value)
-                        except ValueError:
-                            logger.error(
-                                f"Строка {idx + 1}: Некорректное значение периодичности '{periodicity_value}', установлено значение 0")
-                            periodicity = 0
-
-                    # Проверяем, существует ли событие
-                    existing_event = db.query(Event).filter(
-                        Event.file_name == file_name,
-                        Event.event_name == str(row.iloc[0]).strip()
-                    ).first()
-
-                    if existing_event:
-                        # Обновляем существующее событие
-                        existing_event.event_date = event_date
-                        existing_event.remind_before = int(row.iloc[2])
-                        existing_event.periodicity = periodicity
-                        existing_event.repeat_type = str(row.iloc[3]).strip()
-                        existing_event.responsible_email = str(row.iloc[5]).strip()
-
-                        # Устанавливаем дату напоминания
-                        remind_date = event_date - timedelta(days=int(row.iloc[2]))
-                        existing_event.next_reminder = remind_date
-
-                        events_updated += 1
-                        logger.info(f"Событие '{existing_event.event_name}' обновлено")
-                    else:
-                        # Создаем новое событие
-                        event = Event(
-                            creator_id=user_id,
-                            file_name=file_name,
-                            event_name=str(row.iloc[0]).strip(),
-                            event_date=event_date,
-                            remind_before=int(row.iloc[2]),
-                            repeat_type=str(row.iloc[3]).strip(),
-                            periodicity=periodicity,
-                            responsible_email=str(row.iloc[5]).strip(),
-                            is_active=True,
-                        )
-
-                        # Устанавливаем дату напоминания
-                        remind_date = event_date - timedelta(days=int(row.iloc[2]))
-                        event.next_reminder = remind_date
-
-                        db.add(event)
-                        events_created += 1
-                        logger.info(f"Событие '{event.event_name}' добавлено")
-
-                except Exception as e:
-                    logger.error(f"Ошибка в строке {idx + 1}: {str(e)}")
-                    continue
+            if _stored_hash(db, user_id, file_name) == content_hash:
+                logger.info(f"Файл {file_name} не изменился с прошлой загрузки, импорт пропущен")
+                return ImportResult(0, 0, [], skipped=True)
 
+            skipped_members = []
+            with tempfile.TemporaryDirectory(dir=EXCEL_TEMP_DIR) as work_dir:
+                parts = None
+                if file_format(file_name) in ("xlsx", "zip"):
+                    parts = list_parts(source, file_name, work_dir, skipped_members)
+                if parts is not None:
+                    logger.info(f"Файл {file_name}: частей для параллельного разбора: {len(parts)}")
+                    result = _import_parts(db, parts, user_id, progress, stats)
+                    result = result._replace(errors=skipped_members + result.errors)
+            if parts is None:
+                total_rows, chunks = _read_chunks(source, file_name, stats)
+                result = _import_chunks(
+                    db, _prepare_chunks(chunks, stats), user_id, file_name, total_rows, progress, stats=stats
+                )
+            _save_hash(db, user_id, file_name, content_hash, [part[0] for part in parts] if parts else None)
             db.commit()
-            logger.info(
-                f"Обработка завершена, создано событий: {events_created}, обновлено событий: {events_updated}")
-            return events_created, events_updated
+            return result
 
         except Exception as e:
             db.rollback()
@@ -166,4 +499,4 @@ def process_excel(file_path, user_id, file_name):
 
     except Exception as e:
         logger.error(f"Ошибка обработки файла: {str(e)}")
-        raise ValueError(f"Ошибка обработки файла: {str(e)}")
\ No newline at end of file
+        raise ValueError(f"Ошибка обработки файла: {str(e)}")
@@ -0,0 +1,215 @@
+import io
+import logging
+import os
+from datetime import datetime
+
+import pandas as pd
+from openpyxl import load_workbook
+
+logger = logging.getLogger(__name__)
+
+# Количество колонок формата файла (см. COLUMN_ORDER в parser.py)
+COLUMN_COUNT = 7
+
+# Расширения загружаемых файлов
+SUPPORTED_EXTENSIONS = (".xlsx", ".zip", ".csv", ".parquet")
+
+# Разделители CSV: выбирается тот, что чаще встречается в строке заголовков
+CSV_DELIMITERS = (";", ",", "\t")
+
+
+def _cell_to_text(value):
+    """Приведение значения ячейки к тексту так же, как это делает pd.read_excel(dtype=str)"""
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    return str(value)
+
+
+def _to_frame(rows, index):
+    frame = pd.DataFrame(rows, index=index, columns=range(COLUMN_COUNT), dtype=object)
+    return frame.map(_cell_to_text)
+
+
+def read_excel_frame(source):
+    """Чтение всего листа в DataFrame строк (для небольших файлов)"""
+    df = pd.read_excel(source, header=None, dtype=str)
+    logger.info(f"Файл прочитан успешно, строк: {len(df)}")
+    # Пропускаем первую строку (заголовки) и полностью пустые строки
+    return df.iloc[1:].dropna(how="all")
+
+
+def split_frame(df, chunk_size):
+    """Разбиение уже прочитанного DataFrame на пачки для поэтапной записи"""
+    for start in range(0, len(df), chunk_size):
+        yield df.iloc[start:start + chunk_size]
+
+
+def _sheet(workbook, sheet_name=None):
+    return workbook[sheet_name] if sheet_name is not None else workbook.worksheets[0]
+
+
+def excel_row_count(source, sheet_name=None):
+    """Оценка количества строк данных по размерам листа (без чтения содержимого)"""
+    workbook = load_workbook(source, read_only=True)
+    try:
+        max_row = _sheet(workbook, sheet_name).max_row
+        return max(max_row - 1, 0) if max_row else None
+    finally:
+        workbook.close()
+
+
+def iter_excel_chunks(source, chunk_size, sheet_name=None):
+    """
+    Потоковое чтение листа (по умолчанию первого) через openpyxl в режиме read_only.
+
+    В памяти держится не больше chunk_size строк. Индекс каждого DataFrame —
+    номер строки в файле с нуля, строка заголовков пропускается.
+
+    Args:
+        source: путь к файлу или файловый объект
+        chunk_size: количество строк в одном DataFrame
+        sheet_name: имя листа многолистовой книги
+
+    Yields:
+        DataFrame со строками файла в виде текста
+    """
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        sheet = _sheet(workbook, sheet_name)
+        logger.info(f"Потоковое чтение листа '{sheet.title}', строк по данным файла: {sheet.max_row}")
+
+        rows, index = [], []
+        for idx, row in enumerate(sheet.iter_rows(values_only=True)):
+            if idx == 0 or all(value is None for value in row):
+                continue
+            rows.append(row[:COLUMN_COUNT] + (None,) * (COLUMN_COUNT - len(row)))
+            index.append(idx)
+            if len(rows) >= chunk_size:
+                yield _to_frame(rows, index)
+                rows, index = [], []
+
+        if rows:
+            yield _to_frame(rows, index)
+    finally:
+        workbook.close()
+
+
+def file_format(file_name):
+    """Формат загрузки по расширению: 'xlsx', 'zip', 'csv' или 'parquet'"""
+    extension = os.path.splitext(file_name.lower())[1]
+    if extension not in SUPPORTED_EXTENSIONS:
+        raise ValueError(f"Неподдерживаемый формат файла: {extension or file_name}")
+    return extension[1:]
+
+
+def _open_binary(source):
+    """Путь или файловый объект -> (бинарный файловый объект, нужно ли его закрыть)"""
+    if hasattr(source, "read"):
+        source.seek(0)
+        return source, False
+    return open(source, "rb"), True
+
+
+def _csv_delimiter(header_line):
+    return max(CSV_DELIMITERS, key=header_line.count)
+
+
+def iter_csv_chunks(source, chunk_size):
+    """
+    Потоковое чтение CSV пачками через read_csv(chunksize=...).
+
+    Колонки те же, что в Excel; первая строка — заголовки. Разделитель
+    (; , или табуляция) определяется по строке заголовков, кодировка UTF-8 (с BOM или без).
+    Индекс каждого DataFrame — номер строки в файле с нуля, как у iter_excel_chunks.
+
+    Yields:
+        DataFrame со строками файла в виде текста
+    """
+    f, owned = _open_binary(source)
+    try:
+        text = io.TextIOWrapper(f, encoding="utf-8-sig", newline="")
+        try:
+            header_line = text.readline()
+            try:
+                reader = pd.read_csv(
+                    text,
+                    sep=_csv_delimiter(header_line),
+                    header=None,
+                    # Лишние колонки отбрасываются, недостающие заполняются пропусками
+                    names=range(COLUMN_COUNT),
+                    usecols=range(COLUMN_COUNT),
+                    dtype=str,
+                    keep_default_na=False,
+                    na_values=[""],
+                    chunksize=chunk_size
+                )
+            except pd.errors.EmptyDataError:
+                # В файле только строка заголовков
+                return
+            for chunk in reader:
+                # Строка заголовков уже прочитана: строки данных начинаются с 1
+                chunk.index = chunk.index + 1
+                chunk = chunk.dropna(how="all")
+                if len(chunk):
+                    yield chunk
+        finally:
+            # Не закрываем переданный файловый объект вместе с обёрткой
+            text.detach()
+    finally:
+        if owned:
+            f.close()
+
+
+def _column_to_text(series):
+    """Векторное приведение колонки Parquet к тексту по тем же правилам, что и _cell_to_text"""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series.dt.strftime("%Y-%m-%d %H:%M:%S")
+    if pd.api.types.is_float_dtype(series):
+        whole = series.notna() & (series % 1 == 0)
+        text = series.astype("string")
+        text[whole] = series[whole].astype("int64").astype("string")
+        return text
+    return series.astype("string")
+
+
+def _parquet_file(source):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError("Для загрузки файлов Parquet необходимо установить пакет pyarrow")
+    return pq.ParquetFile(source)
+
+
+def parquet_row_count(source):
+    """Количество строк по метаданным файла Parquet"""
+    return _parquet_file(source).metadata.num_rows
+
+
+def iter_parquet_chunks(source, chunk_size):
+    """
+    Потоковое чтение Parquet группами по chunk_size строк.
+
+    Читаются только первые COLUMN_COUNT колонок (по порядку, имена не важны).
+    Строки заголовков в Parquet нет, поэтому индекс начинается с 1 —
+    номера строк в сообщениях об ошибках совпадают с нумерацией Excel.
+
+    Yields:
+        DataFrame со строками файла в виде текста
+    """
+    parquet = _parquet_file(source)
+    columns = parquet.schema_arrow.names[:COLUMN_COUNT]
+    logger.info(f"Потоковое чтение Parquet, строк по метаданным: {parquet.metadata.num_rows}")
+
+    offset = 1
+    for batch in parquet.iter_batches(batch_size=chunk_size, columns=columns):
+        chunk = batch.to_pandas()
+        chunk.columns = range(len(columns))
+        chunk.index = range(offset, offset + len(chunk))
+        offset += len(chunk)
+        chunk = chunk.apply(_column_to_text).reindex(columns=range(COLUMN_COUNT)).dropna(how="all")
+        if len(chunk):
+            yield chunk
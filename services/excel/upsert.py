@@ -0,0 +1,158 @@
+import logging
+
+from sqlalchemy.dialects import postgresql, sqlite
+
+from models import Event
+from services.events.recipients import recipients_of, replace_recipients
+
+logger = logging.getLogger(__name__)
+
+# Размер пакета: 500 строк × ~10 параметров укладываются в лимиты SQLite
+BATCH_SIZE = 500
+
+# Колонки, которые перезаписываются при повторной загрузке файла
+UPDATE_COLUMNS = (
+    "event_date",
+    "anchor_day",
+    "next_reminder",
+    "remind_before",
+    "periodicity",
+    "repeat_type",
+    "responsible_email",
+    "responsible_telegram_ids",
+    "row_hash",
+)
+
+# Диалекты с поддержкой INSERT ... ON CONFLICT DO UPDATE
+_UPSERT_DIALECTS = {
+    "sqlite": sqlite.insert,
+    "postgresql": postgresql.insert,
+}
+
+
+def load_existing_keys(db, file_name, event_names):
+    """
+    {event_name: (event_id, row_hash)} уже сохранённых событий файла с названиями из event_names.
+
+    Читаются только названия пачки (запросами по BATCH_SIZE названий), а не все события файла:
+    память импорта ограничена размером пачки.
+    """
+    existing = {}
+    for batch in _batches(list(dict.fromkeys(event_names))):
+        rows = db.query(Event.event_name, Event.event_id, Event.row_hash).filter(
+            Event.file_name == file_name,
+            Event.event_name.in_(batch)
+        )
+        existing.update((event_name, (event_id, row_hash)) for event_name, event_id, row_hash in rows)
+    return existing
+
+
+def _batches(records, size=BATCH_SIZE):
+    for start in range(0, len(records), size):
+        yield records[start:start + size]
+
+
+def _upsert_on_conflict(db, insert, records):
+    """INSERT ... ON CONFLICT (file_name, event_name) DO UPDATE пакетами"""
+    stmt = insert(Event.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["file_name", "event_name"],
+        set_={column: stmt.excluded[column] for column in UPDATE_COLUMNS}
+    )
+    for batch in _batches(records):
+        db.execute(stmt, batch)
+
+
+def _upsert_mappings(db, file_name, records, existing):
+    """Запасной вариант для прочих СУБД: bulk insert новых и bulk update существующих строк"""
+    # События, вставленные ранее в этой же загрузке: их id ещё не известны
+    unknown = [r["event_name"] for r in records if existing.get(r["event_name"], (0, None))[0] is None]
+    if unknown:
+        rows = db.query(Event.event_name, Event.event_id, Event.row_hash).filter(
+            Event.file_name == file_name,
+            Event.event_name.in_(unknown)
+        )
+        for event_name, event_id, row_hash in rows:
+            existing[event_name] = (event_id, row_hash)
+
+    new_records = [r for r in records if r["event_name"] not in existing]
+    changed_records = [
+        dict({column: r[column] for column in UPDATE_COLUMNS}, event_id=existing[r["event_name"]][0])
+        for r in records if r["event_name"] in existing
+    ]
+    for batch in _batches(new_records):
+        db.bulk_insert_mappings(Event, batch)
+    for batch in _batches(changed_records):
+        db.bulk_update_mappings(Event, batch)
+
+
+def _written_ids(db, file_name, records):
+    """{event_name: event_id} записанных строк: id вставленных через ON CONFLICT заранее не известны"""
+    names = [record["event_name"] for record in records]
+    event_ids = {}
+    for batch in _batches(names):
+        rows = db.query(Event.event_name, Event.event_id).filter(
+            Event.file_name == file_name,
+            Event.event_name.in_(batch)
+        )
+        event_ids.update(rows)
+    return event_ids
+
+
+def upsert_events(db, user_id, file_name, frame, existing, touched=None):
+    """
+    Пакетная запись подготовленных строк файла.
+
+    Args:
+        db: сессия базы данных
+        user_id: telegram_id загрузившего файл
+        file_name: имя файла — вместе с названием события образует ключ
+        frame: DataFrame из prepare_events
+        existing: {event_name: (event_id, row_hash)} из load_existing_keys для названий пачки,
+                  дополняется записанными строками
+        touched: необязательный список, в который добавляются (event_id, next_reminder) записанных строк
+
+    Returns:
+        (создано, изменено, без изменений)
+
+    Строки, отпечаток которых совпадает с сохранённым, не записываются.
+    Получатели записанных строк заменяются в event_recipients в той же транзакции.
+    """
+    # При повторе названия в файле побеждает последняя строка
+    frame = frame.drop_duplicates("event_name", keep="last")
+
+    known = frame["event_name"].map(lambda name: existing.get(name, (None, None))[1])
+    is_new = ~frame["event_name"].isin(existing.keys())
+    is_changed = ~is_new & (known != frame["row_hash"])
+    to_write = frame[is_new | is_changed]
+
+    created = int(is_new.sum())
+    updated = int(is_changed.sum())
+    unchanged = len(frame) - created - updated
+
+    records = to_write[["event_name", *UPDATE_COLUMNS]].to_dict("records")
+    for record in records:
+        record.update(creator_id=user_id, file_name=file_name, is_active=True)
+
+    if records:
+        insert = _UPSERT_DIALECTS.get(db.bind.dialect.name)
+        if insert is not None:
+            _upsert_on_conflict(db, insert, records)
+        else:
+            _upsert_mappings(db, file_name, records, existing)
+
+    event_ids = _written_ids(db, file_name, records)
+    for record in records:
+        existing[record["event_name"]] = (event_ids[record["event_name"]], record["row_hash"])
+
+    if touched is not None:
+        touched.extend((event_ids[record["event_name"]], record["next_reminder"]) for record in records)
+
+    replace_recipients(db, {
+        event_ids[record["event_name"]]: recipients_of(record["responsible_telegram_ids"], record["responsible_email"])
+        for record in records
+    })
+
+    logger.info(
+        f"Файл {file_name}: новых {created}, изменённых {updated}, без изменений {unchanged}")
+    return created, updated, unchanged
@@ -0,0 +1,23 @@
+"""Асинхронная запись журнала уведомлений для кода, работающего в цикле asyncio"""
+from models import Notification
+from services.notifications.log_writer import notification_record
+
+
+async def add_notifications(db, records):
+    """
+    Сохранение записей журнала одним INSERT без ожидания фонового потока.
+
+    Args:
+        records: строки из notification_record(...)
+    """
+    if records:
+        await db.execute(Notification.__table__.insert(), records)
+        await db.commit()
+
+
+async def add_notification(db, event_id, user_id, type, status, scheduled_at=None, sent_at=None,
+                           error_message=None):
+    """Сохранение одной записи журнала"""
+    await add_notifications(db, [
+        notification_record(event_id, user_id, type, status, scheduled_at, sent_at, error_message)
+    ])
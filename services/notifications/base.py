@@ -1,7 +1,8 @@
 from abc import ABC, abstractmethod
 from datetime import datetime
 
-from models import Notification, NotificationStatus
+from models import NotificationStatus
+from services.notifications.log_writer import notification_log
 
 
 class BaseNotifier(ABC):
@@ -13,15 +14,17 @@ class BaseNotifier(ABC):
         pass
 
     def log_notification(self, db, user_id, event_id, notification_type, status, error=None):
-        """Логирование отправки уведомления"""
-        notification = Notification(
-            user_id=user_id,
+        """
+        Логирование отправки уведомления.
+
+        Запись ставится в очередь журнала (notification_log) и сохраняется в фоне пачкой;
+        db оставлен для совместимости вызовов и не используется.
+        """
+        notification_log.write(
             event_id=event_id,
+            user_id=user_id,
             type=notification_type,
             status=status,
-            sent_at=datetime.utcnow() if status == NotificationStatus.SENT else None,
+            sent_at=datetime.now() if status == NotificationStatus.SENT else None,
             error_message=error
         )
-        db.add(notification)
-        db.commit()
-        return notification
@@ -7,6 +7,8 @@ from email.mime.text import MIMEText
 from email.utils import formataddr, make_msgid
 
 from config.settings import SMTP_SERVER, SMTP_PORT, SMTP_USER, SMTP_PASSWORD, SENDER_EMAIL
+from models.notification import NotificationType
+from services.events.recipients import load_recipients, split_addresses
 
 # Настройка логгера
 logger = logging.getLogger(__name__)
@@ -103,18 +105,32 @@ class EmailNotifier:
         """
         return html
 
-    def send_notification(self, db, event, subject=None, message=None):
-        """Отправка email уведомления"""
-        if not event.responsible_email:
+    def recipients(self, db, event):
+        """Адреса получателей из event_recipients; без сессии — из колонки «Email ответственного»"""
+        if db is None:
+            return split_addresses(event.responsible_email)
+        recipients = load_recipients(db, [event.event_id], NotificationType.EMAIL.value)
+        return [address for _, address in recipients.get(event.event_id, [])]
+
+    def send_notification(self, db, event, subject=None, message=None, emails=None):
+        """
+        Отправка email уведомления
+
+        Args:
+            emails: адреса получателей; по умолчанию читаются из event_recipients
+        """
+        if emails is None:
+            emails = self.recipients(db, event)
+        if not emails:
             logger.warning(f"Email не указан для события {event.event_id}")
             return False
 
         try:
-            logger.info(f"Подготовка к отправке email для события {event.event_id} на адрес {event.responsible_email}")
+            logger.info(f"Подготовка к отправке email для события {event.event_id} на адреса {', '.join(emails)}")
 
             msg = MIMEMultipart('alternative')
             msg['From'] = formataddr(("Бот-напоминатель", self.sender_email))
-            msg['To'] = event.responsible_email
+            msg['To'] = ", ".join(emails)
             msg['Subject'] = subject or f"Напоминание: {event.event_name}"
             msg['Message-ID'] = make_msgid(domain='yandex.ru')
             msg['List-Unsubscribe'] = f'<mailto:{self.sender_email}?subject=unsubscribe>'
@@ -133,7 +149,7 @@ class EmailNotifier:
                 logger.debug("Успешная авторизация на SMTP сервере")
 
                 server.send_message(msg)
-                logger.info(f"Email успешно отправлен на {event.responsible_email}")
+                logger.info(f"Email успешно отправлен на {', '.join(emails)}")
                 return True
 
         except smtplib.SMTPException as smtp_error:
@@ -0,0 +1,158 @@
+"""
+Захват наступивших напоминаний арендой для нескольких процессов бота.
+
+Процесс помечает пачку событий своим токеном и сроком аренды одним атомарным
+UPDATE и отправляет только захваченные события: на SQLite — UPDATE ... RETURNING
+(запись в базу сериализуется блокировкой файла), на PostgreSQL — выборка
+FOR UPDATE SKIP LOCKED, при которой параллельные процессы пропускают строки
+друг друга. Аренда продлевается, пока процесс отправляет пачку, и снимается
+вместе со сдвигом next_reminder только у строк, которые всё ещё принадлежат
+процессу; аренду упавшего процесса после истечения срока захватывает другой процесс.
+"""
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from sqlalchemy import DateTime, bindparam, select, text, update
+
+from config.settings import REMINDER_LEASE_SECONDS
+from models import Event
+
+_SQLITE_CLAIM = """
+UPDATE events SET lease_token = :token, lease_expires_at = :expires_at
+WHERE event_id IN (
+    SELECT event_id FROM events
+    WHERE is_active = 1 AND next_reminder < :cutoff
+      AND (lease_expires_at IS NULL OR lease_expires_at < :now){ids_filter}
+    ORDER BY next_reminder
+    LIMIT :limit
+)
+RETURNING event_id
+"""
+
+
+def _due_filter(table, cutoff, now):
+    return (
+        (table.c.is_active == True)
+        & (table.c.next_reminder < cutoff)
+        & (table.c.lease_expires_at.is_(None) | (table.c.lease_expires_at < now))
+    )
+
+
+class Lease:
+    """
+    Аренда одной пачки напоминаний: захват, продление и снятие со сдвигом next_reminder.
+
+    Продление выполняется, когда прошла половина срока аренды, поэтому медленная
+    отправка (например, SMTP) не отдаёт пачку другому процессу.
+    """
+
+    def __init__(self, lease_seconds=REMINDER_LEASE_SECONDS):
+        self.token = uuid.uuid4().hex
+        self.lease_seconds = lease_seconds
+        self.event_ids = set()
+        self._renew_at = None
+
+    def _expires_at(self, now):
+        return now + timedelta(seconds=self.lease_seconds)
+
+    def _schedule_renewal(self):
+        self._renew_at = time.monotonic() + self.lease_seconds / 2
+
+    def claim(self, db, cutoff, limit, event_ids=None):
+        """
+        Захват до limit наступивших (next_reminder < cutoff) событий без действующей аренды.
+
+        Захват выполняется отдельной транзакцией и фиксируется сразу: пока идёт
+        отправка, другие процессы эти события не выбирают.
+
+        Args:
+            event_ids: необязательный список событий, среди которых выполняется захват
+
+        Returns:
+            список event_id захваченных событий
+        """
+        now = datetime.now()
+        params = {
+            "token": self.token, "expires_at": self._expires_at(now), "cutoff": cutoff, "now": now, "limit": limit
+        }
+
+        if db.bind.dialect.name == "sqlite":
+            statement = text(_SQLITE_CLAIM.format(
+                ids_filter="\n      AND event_id IN :event_ids" if event_ids is not None else ""
+            )).bindparams(
+                bindparam("expires_at", type_=DateTime),
+                bindparam("cutoff", type_=DateTime),
+                bindparam("now", type_=DateTime),
+            )
+            if event_ids is not None:
+                statement = statement.bindparams(bindparam("event_ids", expanding=True))
+                params["event_ids"] = list(event_ids)
+            claimed = [event_id for event_id, in db.execute(statement, params)]
+        else:
+            table = Event.__table__
+            candidates = select(table.c.event_id).where(_due_filter(table, cutoff, now))
+            if event_ids is not None:
+                candidates = candidates.where(table.c.event_id.in_(list(event_ids)))
+            candidates = candidates.order_by(table.c.next_reminder).limit(limit).with_for_update(skip_locked=True)
+            statement = update(table).where(table.c.event_id.in_(candidates.scalar_subquery())).values(
+                lease_token=self.token, lease_expires_at=params["expires_at"]
+            ).returning(table.c.event_id)
+            claimed = [event_id for event_id, in db.execute(statement)]
+
+        db.commit()
+        self.event_ids = set(claimed)
+        self._schedule_renewal()
+        return claimed
+
+    def events(self, db):
+        """Объекты Event, захваченные арендой"""
+        if not self.event_ids:
+            return []
+        return db.query(Event).filter(
+            Event.event_id.in_(self.event_ids),
+            Event.lease_token == self.token
+        ).order_by(Event.next_reminder).all()
+
+    def keep(self, db):
+        """
+        Продление аренды, если прошла половина её срока.
+
+        Returns:
+            множество event_id, которые всё ещё принадлежат аренде
+        """
+        if self.event_ids and time.monotonic() >= self._renew_at:
+            table = Event.__table__
+            held = table.c.event_id.in_(self.event_ids) & (table.c.lease_token == self.token)
+            # Отдельная транзакция на своём соединении: commit сессии отправки
+            # сбросил бы загруженные объекты Event и заставил перечитывать их по одному
+            with db.get_bind().begin() as connection:
+                connection.execute(update(table).where(held).values(lease_expires_at=self._expires_at(datetime.now())))
+                self.event_ids = {event_id for event_id, in connection.execute(select(table.c.event_id).where(held))}
+            self._schedule_renewal()
+        return self.event_ids
+
+    def release(self, db, updates):
+        """
+        Сдвиг next_reminder и снятие аренды у строк, которые всё ещё принадлежат аренде.
+
+        Строку, захваченную после истечения аренды другим процессом, сдвигает тот процесс.
+
+        Args:
+            updates: словари из advance_events (event_id и новые значения полей)
+        """
+        table = Event.__table__
+        groups = defaultdict(list)
+        for values in updates:
+            groups[tuple(sorted(column for column in values if column != "event_id"))].append(values)
+        for columns, rows in groups.items():
+            statement = update(table).where(
+                table.c.event_id == bindparam("b_event_id"),
+                table.c.lease_token == self.token
+            ).values(
+                lease_token=None, lease_expires_at=None,
+                **{column: bindparam(f"b_{column}") for column in columns}
+            )
+            db.execute(statement, [{f"b_{column}": value for column, value in row.items()} for row in rows])
+        self.event_ids = set()
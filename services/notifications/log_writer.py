@@ -0,0 +1,178 @@
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy.exc import IntegrityError
+
+from config.settings import NOTIFICATION_LOG_BATCH_SIZE, NOTIFICATION_LOG_FLUSH_MS
+from core.database import SessionLocal
+from models import Notification
+
+logger = logging.getLogger(__name__)
+
+# Служебные сообщения очереди
+_FLUSH = object()
+_STOP = object()
+
+
+def notification_record(event_id, user_id, type, status, scheduled_at=None, sent_at=None, error_message=None):
+    """Строка таблицы notifications для пакетной вставки"""
+    now = datetime.now()
+    return {
+        "event_id": event_id,
+        "user_id": user_id,
+        "type": type,
+        "status": status,
+        "scheduled_at": scheduled_at or now,
+        "sent_at": sent_at,
+        "error_message": error_message,
+        "created_at": now,
+    }
+
+
+class NotificationLogWriter:
+    """
+    Фоновая запись журнала уведомлений.
+
+    Отправители только ставят запись в очередь и не ждут базу. Поток записи
+    сохраняет накопленные записи одним INSERT, когда набралось batch_size
+    записей или прошло flush_interval секунд с первой записи пачки.
+
+    Пачка, которую не удалось записать (база недоступна или заблокирована),
+    остаётся в начале очереди и записывается повторно с нарастающей паузой
+    от retry_delay до max_retry_delay секунд; при остановке выполняется не больше
+    shutdown_attempts попыток. Строки, которые база отклоняет (IntegrityError),
+    записываются по одной, и отбрасываются только отклонённые.
+    """
+
+    def __init__(self, batch_size, flush_interval, retry_delay=1.0, max_retry_delay=60.0, shutdown_attempts=3):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.shutdown_attempts = shutdown_attempts
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def write(self, event_id, user_id, type, status, scheduled_at=None, sent_at=None, error_message=None):
+        """Постановка записи об уведомлении в очередь на сохранение"""
+        self._ensure_started()
+        self._queue.put(notification_record(event_id, user_id, type, status, scheduled_at, sent_at, error_message))
+
+    def flush(self, timeout=None):
+        """Сохранение всех записей, поставленных в очередь до вызова; ждёт завершения записи"""
+        if self._thread is None:
+            return
+        done = threading.Event()
+        self._queue.put((_FLUSH, done))
+        done.wait(timeout)
+
+    def shutdown(self):
+        """Остановка потока записи: записи из очереди сохраняются перед выходом"""
+        with self._lock:
+            if self._thread is None:
+                return
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+
+    def _ensure_started(self):
+        # Поток запускается при первой записи, поэтому импорт модуля ничего не запускает
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="notification-log", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        batch = []
+        deadline = None
+        # Пауза перед повторной записью пачки; 0 — последняя запись прошла успешно
+        retry_delay = 0
+        while True:
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if isinstance(item, dict):
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+                # После неудачной записи новые записи копятся до срока повтора
+                if (retry_delay or len(batch) < self.batch_size) and time.monotonic() < deadline:
+                    continue
+
+            # Пачка заполнена, истёк интервал или пауза повтора, запрошен flush или остановка
+            if batch:
+                if self._save(batch):
+                    batch, deadline, retry_delay = [], None, 0
+                else:
+                    retry_delay = min(max(retry_delay * 2, self.retry_delay), self.max_retry_delay)
+                    deadline = time.monotonic() + retry_delay
+            if isinstance(item, tuple) and item[0] is _FLUSH:
+                item[1].set()
+            elif item is _STOP:
+                self._save_on_shutdown(batch, retry_delay)
+                return
+
+    def _save_on_shutdown(self, batch, retry_delay):
+        """Последние попытки записать пачку при остановке; после них записи теряются с ошибкой в журнале"""
+        for _ in range(self.shutdown_attempts if batch else 0):
+            time.sleep(retry_delay)
+            if self._save(batch):
+                return
+            retry_delay = min(max(retry_delay * 2, self.retry_delay), self.max_retry_delay)
+        if batch:
+            logger.error(f"Записи журнала уведомлений потеряны при остановке: {len(batch)}")
+
+    def _save(self, batch):
+        """
+        Запись пачки одним INSERT.
+
+        Returns:
+            True, если пачка обработана (в том числе с отброшенными отклонёнными строками);
+            False — пачку нужно записать повторно
+        """
+        db = SessionLocal()
+        try:
+            db.execute(Notification.__table__.insert(), batch)
+            db.commit()
+            logger.debug(f"Сохранено записей журнала уведомлений: {len(batch)}")
+            return True
+        except IntegrityError as e:
+            db.rollback()
+            logger.error(f"База отклонила пачку журнала уведомлений, записи сохраняются по одной: {str(e)}")
+            return self._save_rows(db, batch)
+        except Exception as e:
+            db.rollback()
+            logger.error(
+                f"Не удалось сохранить {len(batch)} записей журнала уведомлений, запись будет повторена: {str(e)}")
+            return False
+        finally:
+            db.close()
+
+    def _save_rows(self, db, batch):
+        """Запись по одной строке: отклонённые базой строки отбрасываются, при другой ошибке пачка повторяется"""
+        for index, record in enumerate(batch):
+            try:
+                db.execute(Notification.__table__.insert(), record)
+                db.commit()
+            except IntegrityError as e:
+                db.rollback()
+                logger.error(f"Запись журнала уведомлений отклонена: {record}: {str(e)}")
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Не удалось сохранить записи журнала уведомлений по одной: {str(e)}")
+                # Уже сохранённые и отброшенные строки не повторяются
+                del batch[:index]
+                return False
+        return True
+
+
+notification_log = NotificationLogWriter(NOTIFICATION_LOG_BATCH_SIZE, NOTIFICATION_LOG_FLUSH_MS / 1000)
@@ -0,0 +1,189 @@
+import gzip
+import json
+import logging
+import os
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+
+from config.settings import (
+    NOTIFICATION_RETENTION_DAYS, NOTIFICATION_RETENTION_BATCH_SIZE, NOTIFICATION_ARCHIVE, NOTIFICATION_ARCHIVE_DIR
+)
+from core.database import SessionLocal
+from models import Notification, NotificationDailyStat
+
+logger = logging.getLogger(__name__)
+
+# Пауза между пачками: другие записи в базу не ждут окончания всей свёртки
+BATCH_PAUSE = 0.05
+
+# Колонки записи уведомления в архиве
+ARCHIVE_COLUMNS = (
+    "notification_id", "event_id", "user_id", "type", "status",
+    "scheduled_at", "sent_at", "error_message", "created_at",
+)
+
+# Диалекты с поддержкой INSERT ... ON CONFLICT DO UPDATE
+_UPSERT_DIALECTS = {
+    "sqlite": sqlite.insert,
+    "postgresql": postgresql.insert,
+}
+
+_STAT_KEY = ("day", "event_id", "type", "status")
+
+
+def _add_counts(db, counts):
+    """Прибавление количеств {(день, event_id, тип, статус): n} к дневной статистике"""
+    table = NotificationDailyStat.__table__
+    records = [dict(zip(_STAT_KEY, key), count=count) for key, count in counts.items()]
+
+    insert = _UPSERT_DIALECTS.get(db.bind.dialect.name)
+    if insert is not None:
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(_STAT_KEY),
+            set_={"count": table.c.count + stmt.excluded.count}
+        )
+        db.execute(stmt, records)
+        return
+
+    for record in records:
+        updated = db.query(NotificationDailyStat).filter_by(
+            **{column: record[column] for column in _STAT_KEY}
+        ).update({NotificationDailyStat.count: NotificationDailyStat.count + record["count"]},
+                 synchronize_session=False)
+        if not updated:
+            db.add(NotificationDailyStat(**record))
+
+
+def _archive_path(day):
+    return os.path.join(NOTIFICATION_ARCHIVE_DIR, f"notifications-{day:%Y-%m}.jsonl.gz")
+
+
+def _archive(rows):
+    """
+    Дописывание записей в сжатые файлы по месяцам scheduled_at.
+
+    Каждая пачка дописывается отдельным членом gzip: файл читается
+    целиком обычным gzip.open, включая все дописанные части.
+    """
+    os.makedirs(NOTIFICATION_ARCHIVE_DIR, exist_ok=True)
+    by_month = {}
+    for row in rows:
+        by_month.setdefault(_archive_path(row.scheduled_at), []).append(row)
+
+    for path, month_rows in by_month.items():
+        with gzip.open(path, "at", encoding="utf-8") as f:
+            for row in month_rows:
+                record = {column: getattr(row, column) for column in ARCHIVE_COLUMNS}
+                f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+
+
+def rollup_batch(db, cutoff, batch_size=NOTIFICATION_RETENTION_BATCH_SIZE, archive=NOTIFICATION_ARCHIVE):
+    """
+    Свёртка одной пачки записей старше cutoff отдельной короткой транзакцией.
+
+    Статистика пополняется и записи удаляются в одной транзакции, поэтому
+    количество не удваивается при повторном запуске. Архив дописывается
+    до commit: при сбое запись может попасть в архив дважды, но не потеряется.
+
+    Returns:
+        количество свёрнутых записей (0 — старых записей не осталось)
+    """
+    rows = db.query(Notification).filter(
+        Notification.scheduled_at < cutoff
+    ).order_by(Notification.scheduled_at).limit(batch_size).all()
+    if not rows:
+        return 0
+
+    counts = Counter((row.scheduled_at.date(), row.event_id, row.type, row.status) for row in rows)
+    try:
+        if archive:
+            _archive(rows)
+        _add_counts(db, counts)
+        db.query(Notification).filter(
+            Notification.notification_id.in_([row.notification_id for row in rows])
+        ).delete(synchronize_session=False)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.expunge_all()
+    return len(rows)
+
+
+def run_retention(retention_days=NOTIFICATION_RETENTION_DAYS, batch_size=NOTIFICATION_RETENTION_BATCH_SIZE,
+                  archive=NOTIFICATION_ARCHIVE):
+    """
+    Свёртка журнала уведомлений старше retention_days дней в дневную статистику.
+
+    Returns:
+        количество свёрнутых записей
+    """
+    cutoff = datetime.combine(datetime.now().date() - timedelta(days=retention_days), datetime.min.time())
+    total = 0
+    db = SessionLocal()
+    try:
+        while True:
+            processed = rollup_batch(db, cutoff, batch_size, archive)
+            total += processed
+            if processed < batch_size:
+                break
+            time.sleep(BATCH_PAUSE)
+    finally:
+        db.close()
+
+    if total:
+        logger.info(f"Свёрнуто записей журнала уведомлений старше {cutoff:%d.%m.%Y}: {total}")
+    return total
+
+
+def retention_job(context):
+    """Ежедневная задача job_queue бота"""
+    try:
+        run_retention()
+    except Exception as e:
+        logger.error(f"Ошибка свёртки журнала уведомлений: {str(e)}", exc_info=True)
+
+
+def delivery_stats(db, since=None, until=None, event_ids=None):
+    """
+    Количество уведомлений по типу и статусу за период [since, until).
+
+    Старые периоды читаются из дневной статистики (границы — с точностью до дня),
+    а ещё не свёрнутые записи — из журнала, который ограничен сроком хранения.
+    Поэтому время запроса не растёт с объёмом истории.
+
+    Returns:
+        {(тип, статус): количество}
+    """
+    stats = Counter()
+
+    aggregated = db.query(
+        NotificationDailyStat.type, NotificationDailyStat.status, func.sum(NotificationDailyStat.count)
+    )
+    if since is not None:
+        aggregated = aggregated.filter(NotificationDailyStat.day >= since.date())
+    if until is not None:
+        aggregated = aggregated.filter(NotificationDailyStat.day < until.date())
+    if event_ids is not None:
+        aggregated = aggregated.filter(NotificationDailyStat.event_id.in_(event_ids))
+    aggregated = aggregated.group_by(NotificationDailyStat.type, NotificationDailyStat.status)
+
+    raw = db.query(Notification.type, Notification.status, func.count(Notification.notification_id))
+    if since is not None:
+        raw = raw.filter(Notification.scheduled_at >= since)
+    if until is not None:
+        raw = raw.filter(Notification.scheduled_at < until)
+    if event_ids is not None:
+        raw = raw.filter(Notification.event_id.in_(event_ids))
+    raw = raw.group_by(Notification.type, Notification.status)
+
+    for query in (aggregated, raw):
+        for notification_type, status, count in query:
+            stats[(notification_type, status)] += int(count or 0)
+    return dict(stats)
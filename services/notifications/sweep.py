@@ -0,0 +1,252 @@
+"""
+Рассылка напоминаний обходом наступивших next_reminder.
+
+Вместо задачи планировщика на каждое событие одна периодическая задача
+выбирает по индексу (is_active, next_reminder) события, о которых пора
+напомнить, пачками фиксированного размера, отправляет их и сдвигает
+next_reminder (повторяющиеся события — на следующее повторение).
+Стоимость обхода зависит от числа наступивших напоминаний, а не от общего
+количества событий.
+
+Пачки захватываются арендой (services.notifications.leases), поэтому
+несколько процессов бота с общей базой рассылают напоминания параллельно
+и не отправляют одно напоминание дважды.
+"""
+import logging
+import threading
+from datetime import datetime, timedelta
+
+from config.settings import NOTIFICATION_TIME, REMINDER_LEASE_SECONDS, REMINDER_SWEEP_BATCH_SIZE
+from core.database import SessionLocal
+from models import NotificationStatus, NotificationType
+from services.events.cache import event_cache
+from services.events.recipients import load_recipients
+from services.events.recurrence import advance_events, recurrence_months
+from services.notifications.leases import Lease
+from services.notifications.log_writer import notification_log
+
+logger = logging.getLogger(__name__)
+
+
+def due_cutoff(now=None):
+    """
+    Граница выборки: напоминания с next_reminder раньше неё пора отправить.
+
+    Напоминание на день отправляется в NOTIFICATION_TIME: до этого времени
+    наступившими считаются только напоминания прошлых дней.
+    """
+    now = now or datetime.now()
+    send_time = datetime.strptime(NOTIFICATION_TIME, "%H:%M").time()
+    cutoff = datetime.combine(now.date(), datetime.min.time())
+    if now.time() >= send_time:
+        cutoff += timedelta(days=1)
+    return cutoff
+
+
+def split_expired(events, today):
+    """
+    Разделение пачки на разовые события, дата которых уже прошла, и остальные.
+
+    О прошедшем разовом событии не напоминают: его next_reminder сбрасывается
+    так же, как после отправки.
+
+    Returns:
+        (прошедшие разовые события, события для отправки)
+    """
+    if not events:
+        return [], []
+    months = recurrence_months([event.repeat_type for event in events], [event.periodicity for event in events])
+    expired, due = [], []
+    for event, step in zip(events, months):
+        (expired if not step and event.event_date.date() < today else due).append(event)
+    return expired, due
+
+
+def advance_reminders(db, events, cutoff, lease):
+    """
+    Сдвиг next_reminder отправленных событий и снятие их аренды пакетным UPDATE.
+
+    Повторяющиеся события переносятся на следующее повторение (services.events.recurrence),
+    разовые больше не напоминают. Строки, аренду которых уже забрал другой процесс,
+    не изменяются.
+
+    Returns:
+        список словарей с новыми значениями полей по event_id
+    """
+    updates = advance_events(events, cutoff)
+    lease.release(db, updates)
+    return updates
+
+
+class ReminderSweep:
+    """Отправка наступивших напоминаний через переданные уведомители Telegram и email"""
+
+    def __init__(self, telegram, email=None, batch_size=REMINDER_SWEEP_BATCH_SIZE, on_advanced=None,
+                 lease_seconds=REMINDER_LEASE_SECONDS):
+        """
+        Args:
+            on_advanced: необязательный callback([(event_id, next_reminder), ...]) после commit пачки
+            lease_seconds: срок аренды захваченной пачки
+        """
+        self.telegram = telegram
+        self.email = email
+        self.batch_size = batch_size
+        self.on_advanced = on_advanced
+        self.lease_seconds = lease_seconds
+
+    def deliver(self, db, events, lease=None):
+        """
+        Отправка пачки: получатели Telegram и email всех событий читаются одним запросом.
+
+        С арендой (Lease) она продлевается по ходу отправки, а события, аренду
+        которых уже забрал другой процесс, пропускаются.
+
+        Returns:
+            отправленные события
+        """
+        recipients = load_recipients(db, [event.event_id for event in events])
+        sent = []
+        for event in events:
+            if lease is not None and event.event_id not in lease.keep(db):
+                continue
+            addresses = recipients.get(event.event_id, [])
+            chat_ids = [address for channel, address in addresses if channel == NotificationType.TELEGRAM.value]
+            emails = [address for channel, address in addresses if channel == NotificationType.EMAIL.value]
+            if chat_ids:
+                self.telegram.send_notification(db, event, chat_ids)
+            if emails and self.email is not None:
+                self._send_email(db, event, emails)
+            sent.append(event)
+        return sent
+
+    def _send_email(self, db, event, emails):
+        try:
+            self.email.send_notification(db, event, emails=emails)
+            status, error = NotificationStatus.SENT, None
+        except Exception as e:
+            status, error = NotificationStatus.FAILED, str(e)
+        notification_log.write(
+            event_id=event.event_id,
+            user_id=event.creator_id,
+            type=NotificationType.EMAIL,
+            status=status,
+            sent_at=datetime.now() if status == NotificationStatus.SENT else None,
+            error_message=error
+        )
+
+    def _process(self, db, events, cutoff, today, lease):
+        """Отправка пачки, сдвиг next_reminder со снятием аренды и commit"""
+        expired, events = split_expired(events, today)
+        if expired:
+            logger.info(f"Пропущены напоминания о прошедших разовых событиях: {len(expired)}")
+        events = expired + self.deliver(db, events, lease)
+        updates = advance_reminders(db, events, cutoff, lease)
+        # До commit: после него обращение к полям событий перечитывало бы их по одному
+        moved = {update["event_id"] for update in updates if "event_date" in update}
+        creators = {event.creator_id for event in events if event.event_id in moved}
+        db.commit()
+
+        event_cache.invalidate(*creators)
+        if self.on_advanced:
+            self.on_advanced([(update["event_id"], update["next_reminder"]) for update in updates])
+        db.expunge_all()
+
+    def _claim_and_process(self, db, cutoff, today, event_ids=None):
+        """Захват пачки арендой и её обработка; возвращает количество обработанных событий"""
+        lease = Lease(self.lease_seconds)
+        claimed = lease.claim(db, cutoff, self.batch_size, event_ids)
+        events = lease.events(db)
+        if events:
+            self._process(db, events, cutoff, today, lease)
+        return len(claimed)
+
+    def run(self, now=None):
+        """
+        Обработка всех наступивших напоминаний пачками.
+
+        Каждая пачка — отдельная транзакция: next_reminder сдвигается после отправки,
+        поэтому при сбое посреди пачки её напоминания будут отправлены повторно
+        (после истечения аренды), но не потеряются.
+
+        Returns:
+            количество обработанных событий
+        """
+        now = now or datetime.now()
+        cutoff = due_cutoff(now)
+        total = 0
+        db = SessionLocal()
+        try:
+            while True:
+                claimed = self._claim_and_process(db, cutoff, now.date())
+                total += claimed
+                if claimed < self.batch_size:
+                    break
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        if total:
+            logger.info(f"Отправлено напоминаний: {total}")
+        return total
+
+    def run_ids(self, event_ids, now=None):
+        """
+        Отправка напоминаний указанных событий, если они всё ещё наступили.
+
+        Событие, которое успели удалить, перенести, отправить или захватить
+        другим процессом, пропускается.
+
+        Returns:
+            количество отправленных событий
+        """
+        now = now or datetime.now()
+        cutoff = due_cutoff(now)
+        event_ids = list(event_ids)
+        total = 0
+        db = SessionLocal()
+        try:
+            for start in range(0, len(event_ids), self.batch_size):
+                total += self._claim_and_process(db, cutoff, now.date(), event_ids[start:start + self.batch_size])
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        return total
+
+
+_default_sweep = None
+_default_sweep_lock = threading.Lock()
+
+
+def default_sweep():
+    """
+    ReminderSweep с уведомителями бота, общий для задач обхода и очереди напоминаний.
+
+    Уведомители создаются один раз на процесс; без настроек SMTP напоминания
+    уходят только в Telegram. Перенесённые повторения попадают в очередь
+    ближайших напоминаний.
+    """
+    global _default_sweep
+    with _default_sweep_lock:
+        if _default_sweep is None:
+            from services.notifications.email import EmailNotifier
+            from services.notifications.telegram import TelegramNotifier
+            from services.notifications.timing_wheel import reminder_wheel
+
+            try:
+                email = EmailNotifier()
+            except ValueError:
+                email = None
+            _default_sweep = ReminderSweep(TelegramNotifier(), email, on_advanced=reminder_wheel.update)
+        return _default_sweep
+
+
+def reminder_sweep_job(context):
+    """Периодическая задача job_queue бота"""
+    try:
+        default_sweep().run()
+    except Exception as e:
+        logger.error(f"Ошибка рассылки напоминаний: {str(e)}", exc_info=True)
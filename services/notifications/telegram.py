@@ -5,7 +5,9 @@ from telegram import Bot
 from telegram.error import TelegramError
 
 from config.settings import TOKEN
-from models.notification import Notification, NotificationType, NotificationStatus
+from models.notification import NotificationType, NotificationStatus
+from services.events.recipients import chat_id, telegram_chat_ids
+from services.notifications.log_writer import notification_log
 
 logger = logging.getLogger(__name__)
 
@@ -30,45 +32,47 @@ class TelegramNotifier:
 
         return message
 
-    def send_notification(self, db, event):
-        """Отправка уведомления через Telegram"""
+    def send_notification(self, db, event, chat_ids=None):
+        """
+        Отправка уведомления через Telegram; запись в журнал уходит в фоновую очередь
+
+        Args:
+            chat_ids: адреса получателей; по умолчанию читаются из event_recipients
+        """
+        scheduled_at = datetime.now()
+        delivered = 0
+        errors = []
         try:
             message = self.format_message(event)
 
-            # Получаем список Telegram ID из поля responsible_telegram_ids
-            responsible_telegram_ids = event.responsible_telegram_ids.split(
-                ",") if event.responsible_telegram_ids else []
+            if chat_ids is None:
+                chat_ids = telegram_chat_ids(db, event.event_id)
 
             # Отправляем сообщение каждому получателю
-            for telegram_id in responsible_telegram_ids:
+            for telegram_id in chat_ids:
                 try:
                     self.bot.send_message(
-                        chat_id=int(telegram_id),
+                        chat_id=chat_id(telegram_id),
                         text=message,
                         parse_mode='HTML'
                     )
+                    delivered += 1
                 except TelegramError as e:
                     logger.error(f"Ошибка отправки уведомления пользователю {telegram_id}: {e}")
-
-            # Создаем запись об уведомлении
-            notification = Notification(
-                event_id=event.event_id,
-                user_id=event.creator_id,  # используем creator_id для связи
-                type=NotificationType.TELEGRAM,
-                scheduled_at=datetime.now()
-            )
-
-            # Обновляем статус
-            notification.status = NotificationStatus.SENT
-            notification.sent_at = datetime.now()
+                    errors.append(f"{telegram_id}: {e}")
 
         except Exception as e:
             logger.error(f"Ошибка отправки уведомления: {e}")
-            if notification:
-                notification.status = NotificationStatus.FAILED
-                notification.error_message = str(e)
-
-        finally:
-            if notification:
-                db.add(notification)
-                db.commit()
\ No newline at end of file
+            errors.append(str(e))
+
+        # Уведомление не доставлено, если не удалось отправить ни одному получателю
+        failed = bool(errors) and not delivered
+        notification_log.write(
+            event_id=event.event_id,
+            user_id=event.creator_id,  # используем creator_id для связи
+            type=NotificationType.TELEGRAM,
+            status=NotificationStatus.FAILED if failed else NotificationStatus.SENT,
+            scheduled_at=scheduled_at,
+            sent_at=None if failed else datetime.now(),
+            error_message="; ".join(errors) or None
+        )
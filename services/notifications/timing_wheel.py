@@ -0,0 +1,243 @@
+"""
+Очередь ближайших напоминаний в памяти.
+
+Срабатывания на REMINDER_WHEEL_HORIZON_HOURS часов вперёд читаются из events
+по индексу (is_active, next_reminder) при запуске и раскладываются по слотам
+колеса (TimingWheel): слот — номер тика, поэтому постановка, отмена и
+срабатывание стоят O(1) на напоминание, а память ограничена окном, а не
+количеством событий. Импорт и правки обновляют очередь точечно (update/cancel).
+
+Время срабатывания, до которого очередь всё обработала, сохраняется в
+reminder_checkpoints: после перезапуска события читаются начиная с него,
+а не со всей истории. Периодический обход (sweep) остаётся страховкой
+для напоминаний, пропущенных очередью.
+"""
+import logging
+import threading
+from datetime import datetime, timedelta
+
+from config.settings import NOTIFICATION_TIME, REMINDER_WHEEL_HORIZON_HOURS, REMINDER_WHEEL_TICK_SECONDS
+from core.database import SessionLocal
+from models import Event, ReminderCheckpoint
+
+logger = logging.getLogger(__name__)
+
+# Окно очереди продлевается, когда до его конца остаётся меньше горизонта минус этот шаг
+EXTEND_STEP = timedelta(hours=1)
+# При запуске очередь подхватывает пропущенные напоминания не старше этого срока, более старые досылает обход
+MISSED_GRACE = timedelta(hours=24)
+
+
+def fire_time(next_reminder):
+    """Время отправки напоминания: день next_reminder в NOTIFICATION_TIME"""
+    send_time = datetime.strptime(NOTIFICATION_TIME, "%H:%M").time()
+    return datetime.combine(next_reminder.date(), send_time)
+
+
+class TimingWheel:
+    """
+    Колесо срабатываний с шагом resolution секунд.
+
+    Слоты — словарь {номер тика: множество event_id}; у каждого события не больше
+    одного слота. Срабатывания в прошлом ставятся в ближайший тик.
+    """
+
+    def __init__(self, resolution=REMINDER_WHEEL_TICK_SECONDS):
+        self.resolution = max(int(resolution), 1)
+        self._slots = {}
+        self._slot_of = {}
+        self._cursor = None
+        self._lock = threading.Lock()
+
+    def _tick_of(self, moment):
+        return int(moment.timestamp()) // self.resolution
+
+    def __len__(self):
+        return len(self._slot_of)
+
+    def schedule(self, event_id, fire_at):
+        """Постановка или перенос срабатывания события"""
+        with self._lock:
+            self._remove(event_id)
+            tick = self._tick_of(fire_at)
+            if self._cursor is not None and tick <= self._cursor:
+                tick = self._cursor + 1
+            self._slots.setdefault(tick, set()).add(event_id)
+            self._slot_of[event_id] = tick
+
+    def cancel(self, event_id):
+        """Отмена срабатывания события, если оно стоит в очереди"""
+        with self._lock:
+            self._remove(event_id)
+
+    def _remove(self, event_id):
+        tick = self._slot_of.pop(event_id, None)
+        if tick is not None:
+            slot = self._slots[tick]
+            slot.discard(event_id)
+            if not slot:
+                del self._slots[tick]
+
+    def advance(self, now):
+        """
+        Сдвиг колеса до now.
+
+        Returns:
+            event_id сработавших событий в порядке времени срабатывания
+        """
+        with self._lock:
+            target = self._tick_of(now)
+            if self._cursor is not None and target - self._cursor <= len(self._slots):
+                ticks = range(self._cursor + 1, target + 1)
+            else:
+                # Первый сдвиг или долгий пропуск: пустые тики не перебираются
+                ticks = sorted(tick for tick in self._slots if tick <= target)
+            fired = []
+            for tick in ticks:
+                slot = self._slots.pop(tick, None)
+                if slot:
+                    fired.extend(sorted(slot))
+                    for event_id in slot:
+                        del self._slot_of[event_id]
+            self._cursor = target if self._cursor is None else max(target, self._cursor)
+            return fired
+
+
+class ReminderWheel:
+    """Очередь напоминаний на горизонт вперёд с сохранением отметки обработки"""
+
+    def __init__(self, name="reminders", horizon_hours=REMINDER_WHEEL_HORIZON_HOURS,
+                 resolution=REMINDER_WHEEL_TICK_SECONDS):
+        self.name = name
+        self.horizon = timedelta(hours=horizon_hours)
+        self.wheel = TimingWheel(resolution)
+        self.horizon_end = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.wheel)
+
+    def _fill(self, db, since, until):
+        """Постановка в очередь событий со временем отправки в [since, until)"""
+        query = db.query(Event.event_id, Event.next_reminder).filter(
+            Event.is_active == True,
+            Event.next_reminder >= datetime.combine(since.date(), datetime.min.time()),
+            Event.next_reminder < datetime.combine(until.date() + timedelta(days=1), datetime.min.time())
+        )
+        count = 0
+        for event_id, next_reminder in query:
+            fire_at = fire_time(next_reminder)
+            if since <= fire_at < until:
+                self.wheel.schedule(event_id, fire_at)
+                count += 1
+        return count
+
+    def load(self, now=None):
+        """
+        Заполнение очереди при запуске.
+
+        Напоминания читаются начиная с сохранённой отметки: отправленные до неё уже
+        сдвинуты или будут досланы обходом. Без отметки или при давней отметке очередь
+        подхватывает пропущенные напоминания только за MISSED_GRACE: память ограничена
+        окном очереди, а не количеством просроченных событий.
+        """
+        now = now or datetime.now()
+        db = SessionLocal()
+        try:
+            checkpoint = db.query(ReminderCheckpoint).get(self.name)
+            since = now - MISSED_GRACE
+            if checkpoint and checkpoint.watermark > since:
+                since = checkpoint.watermark
+            with self._lock:
+                self.horizon_end = now + self.horizon
+                count = self._fill(db, since, self.horizon_end)
+        finally:
+            db.close()
+        logger.info(f"Очередь напоминаний загружена: {count} до {self.horizon_end:%d.%m.%Y %H:%M}")
+        return count
+
+    def update(self, reminders):
+        """
+        Точечное обновление очереди после импорта, правки или отправки.
+
+        Args:
+            reminders: пары (event_id, next_reminder); None — напоминаний больше нет
+        """
+        if self.horizon_end is None:
+            return
+        for event_id, next_reminder in reminders:
+            if next_reminder is None:
+                self.wheel.cancel(event_id)
+                continue
+            fire_at = fire_time(next_reminder)
+            if fire_at < self.horizon_end:
+                self.wheel.schedule(event_id, fire_at)
+            else:
+                self.wheel.cancel(event_id)
+
+    def cancel(self, event_id):
+        """Удаление события из очереди"""
+        self.wheel.cancel(event_id)
+
+    def _save_checkpoint(self, db, watermark):
+        checkpoint = db.query(ReminderCheckpoint).get(self.name)
+        if checkpoint is None:
+            db.add(ReminderCheckpoint(name=self.name, watermark=watermark))
+        elif watermark > checkpoint.watermark:
+            checkpoint.watermark = watermark
+        db.commit()
+
+    def _extend(self, now):
+        """Продление окна очереди вслед за текущим временем"""
+        until = now + self.horizon
+        if until - self.horizon_end < EXTEND_STEP:
+            return
+        db = SessionLocal()
+        try:
+            with self._lock:
+                self._fill(db, self.horizon_end, until)
+                self.horizon_end = until
+        finally:
+            db.close()
+
+    def tick(self, sweep, now=None):
+        """
+        Отправка сработавших напоминаний через sweep (ReminderSweep).
+
+        Перенесённые повторяющиеся события возвращаются в очередь через
+        sweep.on_advanced; после отправки сохраняется отметка now.
+
+        Returns:
+            количество отправленных напоминаний
+        """
+        now = now or datetime.now()
+        if self.horizon_end is None:
+            self.load(now)
+
+        sent = 0
+        fired = self.wheel.advance(now)
+        if fired:
+            sent = sweep.run_ids(fired, now)
+            db = SessionLocal()
+            try:
+                self._save_checkpoint(db, now)
+            finally:
+                db.close()
+            logger.info(f"Очередь напоминаний: сработало {len(fired)}, отправлено {sent}")
+
+        self._extend(now)
+        return sent
+
+
+# Единственная очередь процесса: загружается в main(), обновляется импортом и обработчиками
+reminder_wheel = ReminderWheel()
+
+
+def reminder_wheel_job(context):
+    """Периодическая задача job_queue бота"""
+    from services.notifications.sweep import default_sweep
+
+    try:
+        reminder_wheel.tick(default_sweep())
+    except Exception as e:
+        logger.error(f"Ошибка очереди напоминаний: {str(e)}", exc_info=True)
@@ -0,0 +1,34 @@
+"""
+Периодические задачи бота в job_queue.
+
+Единственный планировщик процесса — job_queue обновления (Updater): он
+запускается вместе с опросом Telegram в main() и останавливается в idle().
+Отдельного планировщика APScheduler с задачей на каждое событие нет:
+напоминания рассылает обход наступивших next_reminder, а записанные
+импортом события попадают в очередь ближайших напоминаний одним вызовом
+reminder_wheel.update после commit загрузки.
+"""
+from datetime import time
+
+from config.settings import IMPORT_JOB_HEARTBEAT_SECONDS, REMINDER_SWEEP_INTERVAL, REMINDER_WHEEL_TICK_SECONDS
+from services.excel.jobs import import_jobs_job
+from services.notifications.retention import retention_job
+from services.notifications.sweep import reminder_sweep_job
+from services.notifications.timing_wheel import reminder_wheel, reminder_wheel_job
+
+
+def register_jobs(job_queue):
+    """Регистрация периодических задач бота; вызывается один раз при запуске"""
+    # Отметка своих задач импорта; задачи остановленных процессов (в том числе этого
+    # до перезапуска) уже не будут выполнены — они помечаются ошибкой
+    job_queue.run_repeating(import_jobs_job, interval=IMPORT_JOB_HEARTBEAT_SECONDS, first=0, name="import_jobs")
+
+    # Рассылка наступивших напоминаний: одна задача вместо задачи на каждое событие
+    job_queue.run_repeating(reminder_sweep_job, interval=REMINDER_SWEEP_INTERVAL, first=0, name="reminder_sweep")
+
+    # Очередь ближайших напоминаний: точное время отправки без частых запросов к базе
+    reminder_wheel.load()
+    job_queue.run_repeating(reminder_wheel_job, interval=REMINDER_WHEEL_TICK_SECONDS, first=0, name="reminder_wheel")
+
+    # Ежедневная свёртка старых записей журнала уведомлений в статистику
+    job_queue.run_daily(retention_job, time=time(hour=3, minute=30), name="notification_retention")
@@ -0,0 +1,305 @@
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, func
+
+import models
+from core.database import Base, SessionLocal
+from benchmarks.workbooks import generate_workbook
+from services.excel.parser import process_excel
+
+
+@pytest.fixture
+def db_engine(tmp_path):
+    """Импорт пишет во временную базу SQLite"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(engine)
+    previous_bind = SessionLocal.kw.get("bind")
+    SessionLocal.configure(bind=engine)
+    yield engine
+    SessionLocal.configure(bind=previous_bind)
+    engine.dispose()
+
+
+@pytest.mark.parametrize("date_style", ["iso", "iso_datetime", "dotted", "excel", "mixed"])
+def test_import_generated_workbook(db_engine, tmp_path, date_style):
+    path = generate_workbook(tmp_path / "events.xlsx", 200, error_rate=0.1, date_style=date_style, seed=1)
+
+    result = process_excel(str(path), 1, "events.xlsx")
+
+    assert result.created + len(result.errors) >= 200
+    assert 0 < len(result.errors) < 60
+    db = SessionLocal()
+    try:
+        assert db.query(models.Event).count() == result.created
+    finally:
+        db.close()
+
+
+def test_reupload_is_skipped_and_changes_are_diffed(db_engine, tmp_path):
+    path = generate_workbook(tmp_path / "events.xlsx", 50, seed=2)
+    first = process_excel(str(path), 1, "events.xlsx")
+    assert first.created == 50
+
+    assert process_excel(str(path), 1, "events.xlsx").skipped
+
+    generate_workbook(tmp_path / "events.xlsx", 40, seed=2)
+    second = process_excel(str(path), 1, "events.xlsx")
+    assert (second.created, second.updated, second.unchanged, second.removed) == (0, 0, 40, 10)
+
+
+def test_chunked_import_keeps_only_chunk_state(db_engine, tmp_path, monkeypatch):
+    from services.excel import parser
+
+    monkeypatch.setattr(parser, "EXCEL_CHUNK_SIZE", 7)
+    updates = []
+    monkeypatch.setattr(parser.reminder_wheel, "update", lambda reminders: updates.append(len(reminders)))
+
+    path = generate_workbook(tmp_path / "events.xlsx", 50, seed=2)
+    df = pd.read_excel(path, header=None, dtype=str)
+    df.to_csv(tmp_path / "events.csv", sep=";", header=False, index=False)
+    assert process_excel(str(tmp_path / "events.csv"), 1, "events.csv").created == 50
+    # Очередь напоминаний обновляется после каждой пачки, а не списком всего файла
+    assert sum(updates) == 50 and max(updates) <= 7
+
+    df.iloc[:41].to_csv(tmp_path / "events.csv", sep=";", header=False, index=False)
+    second = process_excel(str(tmp_path / "events.csv"), 1, "events.csv")
+    assert (second.created, second.updated, second.unchanged, second.removed) == (0, 0, 40, 10)
+
+
+def test_csv_import_matches_xlsx(db_engine, tmp_path):
+    path = generate_workbook(tmp_path / "events.xlsx", 100, error_rate=0.1, date_style="mixed", seed=3)
+    df = pd.read_excel(path, header=None, dtype=str)
+    df.to_csv(tmp_path / "events.csv", sep=";", header=False, index=False)
+
+    from_xlsx = process_excel(str(path), 1, "events.xlsx")
+    from_csv = process_excel(str(tmp_path / "events.csv"), 1, "events.csv")
+
+    assert from_csv.created == from_xlsx.created
+    assert from_csv.errors == from_xlsx.errors
+
+
+def test_import_fills_recipients(db_engine, tmp_path):
+    from services.events.recipients import events_for_address, load_recipients
+
+    path = tmp_path / "events.csv"
+    path.write_text(
+        "Событие;Дата;Дней;Повтор;Периодичность;Email;ID\n"
+        "Сдать отчёт;2099-06-20;5;Нет;;a@example.com;123, 456, 123\n"
+        "Продлить договор;2099-06-25;10;Нет;;;456\n",
+        encoding="utf-8"
+    )
+    process_excel(str(path), 1, "events.csv")
+
+    path.write_text(
+        "Событие;Дата;Дней;Повтор;Периодичность;Email;ID\n"
+        "Сдать отчёт;2099-06-20;5;Нет;;a@example.com;789\n"
+        "Продлить договор;2099-06-25;10;Нет;;;456\n",
+        encoding="utf-8"
+    )
+    process_excel(str(path), 1, "events.csv")
+
+    db = SessionLocal()
+    try:
+        events = {event.event_name: event for event in db.query(models.Event)}
+        recipients = load_recipients(db, [event.event_id for event in events.values()])
+        assert recipients[events["Сдать отчёт"].event_id] == [("TELEGRAM", "789"), ("EMAIL", "a@example.com")]
+        assert recipients[events["Продлить договор"].event_id] == [("TELEGRAM", "456")]
+        assert events["Сдать отчёт"].responsible_telegram_ids == "789"
+
+        due = events_for_address(db, "TELEGRAM", 456, pd.Timestamp("2099-06-01"), pd.Timestamp("2099-07-01"))
+        assert [event.event_name for event in due] == ["Продлить договор"]
+    finally:
+        db.close()
+
+
+def test_past_one_shot_rows_are_imported_without_reminder(db_engine, tmp_path):
+    from datetime import date, datetime, timedelta
+
+    today = date.today()
+    path = tmp_path / "events.csv"
+    path.write_text(
+        "Событие;Дата;Дней;Повтор;Периодичность;Email;ID\n"
+        f"Прошло;{today - timedelta(days=3):%Y-%m-%d};1;Нет;;;\n"
+        f"Каждый месяц;{today - timedelta(days=3):%Y-%m-%d};1;Ежемесячно;1;;\n"
+        f"Сегодня;{today:%Y-%m-%d};1;Нет;;;\n",
+        encoding="utf-8"
+    )
+    assert process_excel(str(path), 1, "events.csv").created == 3
+
+    db = SessionLocal()
+    try:
+        reminders = dict(db.query(models.Event.event_name, models.Event.next_reminder))
+    finally:
+        db.close()
+    assert reminders["Прошло"] is None
+    assert reminders["Каждый месяц"].date() > today
+    assert reminders["Сегодня"] == datetime.combine(today - timedelta(days=1), datetime.min.time())
+
+
+def test_reupload_after_other_user_overwrote_file_is_not_skipped(db_engine, tmp_path):
+    original = generate_workbook(tmp_path / "original.xlsx", 20, seed=4)
+    other = generate_workbook(tmp_path / "other.xlsx", 20, seed=4, date_style="dotted")
+    first = process_excel(str(original), 1, "plan.xlsx")
+    assert first.created == 20
+
+    db = SessionLocal()
+    try:
+        dates = dict(db.query(models.Event.event_name, models.Event.event_date))
+    finally:
+        db.close()
+
+    # Другой пользователь загружает другой файл с тем же именем: события пользователя 1 перезаписаны
+    shifted = pd.read_excel(other, header=None, dtype=str)
+    shifted.iloc[1:, 1] = "01.01.2030"
+    shifted.to_excel(other, header=False, index=False)
+    assert process_excel(str(other), 2, "plan.xlsx").updated == 20
+
+    again = process_excel(str(original), 1, "plan.xlsx")
+    assert not again.skipped
+    assert again.updated == 20
+    db = SessionLocal()
+    try:
+        assert dict(db.query(models.Event.event_name, models.Event.event_date)) == dates
+    finally:
+        db.close()
+
+
+def test_overwritten_archive_part_resets_only_that_archive_hash(db_engine, tmp_path, monkeypatch):
+    import zipfile
+
+    from services.excel import parallel
+
+    monkeypatch.setattr(parallel, "IMPORT_PROCESSES", 1)
+    plan = generate_workbook(tmp_path / "plan.xlsx", 10, seed=7)
+    with zipfile.ZipFile(tmp_path / "plans.zip", "w") as archive:
+        archive.write(plan, "a/plan.xlsx")
+    other = generate_workbook(tmp_path / "other.xlsx", 10, seed=8)
+    assert process_excel(str(tmp_path / "plans.zip"), 1, "plans.zip").created == 10
+    assert process_excel(str(other), 1, "other.xlsx").created == 10
+
+    # Чужая загрузка other.xlsx сбрасывает отпечаток только этой книги, а не архивов пользователя 1
+    changed = pd.read_excel(other, header=None, dtype=str)
+    changed.iloc[1:, 2] = "99"
+    changed.to_excel(tmp_path / "changed.xlsx", header=False, index=False)
+    assert process_excel(str(tmp_path / "changed.xlsx"), 2, "other.xlsx").updated == 10
+    assert process_excel(str(tmp_path / "plans.zip"), 1, "plans.zip").skipped
+    assert process_excel(str(other), 1, "other.xlsx").updated == 10
+
+    # Другой архив перезаписывает книгу a/plan.xlsx: повторная загрузка plans.zip не пропускается
+    shifted = pd.read_excel(plan, header=None, dtype=str)
+    shifted.iloc[1:, 1] = "01.01.2030"
+    shifted.to_excel(tmp_path / "shifted.xlsx", header=False, index=False)
+    with zipfile.ZipFile(tmp_path / "theirs.zip", "w") as archive:
+        archive.write(tmp_path / "shifted.xlsx", "a/plan.xlsx")
+    assert process_excel(str(tmp_path / "theirs.zip"), 2, "theirs.zip").updated == 10
+
+    assert process_excel(str(tmp_path / "plans.zip"), 1, "plans.zip").updated == 10
+
+
+def test_recovery_fails_only_jobs_of_stopped_instances(db_engine):
+    from datetime import datetime, timedelta
+
+    from services.excel.jobs import heartbeat_jobs, recover_interrupted_jobs
+
+    stale = datetime.utcnow() - timedelta(minutes=10)
+    db = SessionLocal()
+    db.add_all([
+        models.ImportJob(creator_id=1, chat_id=1, file_name=owner or "old.xlsx", status=status,
+                         owner_id=owner, heartbeat_at=heartbeat, created_at=stale)
+        for owner, status, heartbeat in [
+            ("alive", models.ImportJobStatus.RUNNING, stale),
+            ("crashed", models.ImportJobStatus.RUNNING, stale),
+            ("crashed-queued", models.ImportJobStatus.QUEUED, stale),
+            (None, models.ImportJobStatus.RUNNING, None),
+            ("crashed-done", models.ImportJobStatus.DONE, stale),
+        ]
+    ])
+    db.commit()
+    db.close()
+
+    # Живой процесс отмечает свои задачи, перезапущенный процесс освобождает остальные
+    heartbeat_jobs("alive")
+    recover_interrupted_jobs("restarted")
+
+    db = SessionLocal()
+    try:
+        statuses = dict(db.query(models.ImportJob.file_name, models.ImportJob.status))
+    finally:
+        db.close()
+    assert statuses == {
+        "alive": "RUNNING", "crashed": "FAILED", "crashed-queued": "FAILED", "old.xlsx": "FAILED",
+        "crashed-done": "DONE",
+    }
+
+
+@pytest.mark.parametrize("streamed", [False, True])
+def test_multi_part_uploads_keep_archive_paths_and_stream_large_sheets(db_engine, tmp_path, monkeypatch, streamed):
+    import zipfile
+
+    from services.excel import parallel
+
+    monkeypatch.setattr(parallel, "IMPORT_PROCESSES", 1)
+    monkeypatch.setattr(parallel, "EXCEL_SPLIT_SHEETS", True)
+    if streamed:
+        # Любая книга «больше порога»: листы читаются пачками, а не в пуле целиком
+        monkeypatch.setattr(parallel, "EXCEL_STREAMING_THRESHOLD_MB", 0)
+        monkeypatch.setattr(parallel, "parse_part", None)
+
+    frame = pd.read_excel(generate_workbook(tmp_path / "plan.xlsx", 10, seed=5), header=None, dtype=str)
+    with pd.ExcelWriter(tmp_path / "book.xlsx") as writer:
+        frame.to_excel(writer, sheet_name="Январь", header=False, index=False)
+        frame.iloc[:6].to_excel(writer, sheet_name="Февраль", header=False, index=False)
+    with zipfile.ZipFile(tmp_path / "plans.zip", "w") as archive:
+        archive.write(tmp_path / "plan.xlsx", "a/plan.xlsx")
+        archive.write(tmp_path / "plan.xlsx", "b/PLAN.XLSX")
+        archive.writestr("c/", "")
+        archive.writestr("__MACOSX/a/._plan.xlsx", b"")
+        archive.writestr("readme.txt", "План на год")
+
+    with open(tmp_path / "book.xlsx", "rb") as upload:
+        assert process_excel(upload, 1, "book.xlsx").created == 15
+    archived = process_excel(str(tmp_path / "plans.zip"), 1, "plans.zip")
+    assert archived.created == 20
+    assert archived.errors == ["readme.txt: пропущен, в архиве обрабатываются только книги .xlsx"]
+
+    db = SessionLocal()
+    try:
+        counts = dict(db.query(models.Event.file_name, func.count()).group_by(models.Event.file_name))
+    finally:
+        db.close()
+    assert counts == {"book.xlsx": 10, "book.xlsx / Февраль": 5, "a/plan.xlsx": 10, "b/PLAN.XLSX": 10}
+
+
+def test_reupload_of_existing_multi_sheet_workbook_keeps_event_keys(db_engine, tmp_path, monkeypatch):
+    from services.excel import parallel
+
+    monkeypatch.setattr(parallel, "IMPORT_PROCESSES", 1)
+    frame = pd.read_excel(generate_workbook(tmp_path / "plan.xlsx", 10, seed=6), header=None, dtype=str)
+    instructions = pd.DataFrame([["Заполните лист «План»"], ["Даты в формате ДД.ММ.ГГГГ"]])
+
+    def write_book(path, plan):
+        with pd.ExcelWriter(path) as writer:
+            plan.to_excel(writer, sheet_name="План", header=False, index=False)
+            instructions.to_excel(writer, sheet_name="Инструкция", header=False, index=False)
+        return str(path)
+
+    # Книга загружена раньше: события первого листа записаны под именем книги
+    assert process_excel(write_book(tmp_path / "v1.xlsx", frame), 1, "book.xlsx").created == 10
+
+    changed = frame.copy()
+    changed.iloc[1, 2] = "99"
+    second = process_excel(write_book(tmp_path / "v2.xlsx", changed), 1, "book.xlsx")
+    assert (second.created, second.updated, second.unchanged, second.errors) == (0, 1, 9, [])
+
+    # С разбором по листам первый лист по-прежнему обновляет те же события
+    monkeypatch.setattr(parallel, "EXCEL_SPLIT_SHEETS", True)
+    changed.iloc[2, 2] = "98"
+    third = process_excel(write_book(tmp_path / "v3.xlsx", changed), 1, "book.xlsx")
+    assert (third.created, third.updated, third.unchanged) == (0, 1, 9)
+
+    db = SessionLocal()
+    try:
+        counts = dict(db.query(models.Event.file_name, func.count()).group_by(models.Event.file_name))
+    finally:
+        db.close()
+    assert counts == {"book.xlsx": 10}
@@ -0,0 +1,203 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+import models
+from core.database import Base
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        yield db
+    engine.dispose()
+
+
+def query_plan(db, query):
+    """Строки EXPLAIN QUERY PLAN для запроса ORM или select()"""
+    compiled = getattr(query, "statement", query).compile(db.bind)
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    rows = db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).fetchall()
+    return " | ".join(row[-1] for row in rows)
+
+
+def test_user_events_use_creator_index(session):
+    from services.events.queries import active_events_query, reminders_query
+
+    queries = [
+        # Мои события, удаление и ручная отправка (кэш списков событий)
+        active_events_query(1),
+        # Напоминания: просроченные, сегодня и приближающиеся одним запросом
+        reminders_query(1, datetime.now().date()),
+    ]
+    for query in queries:
+        assert "USING INDEX ix_events_creator_id_is_active_event_date" in query_plan(session, query)
+
+
+def test_due_reminders_use_next_reminder_index(session):
+    Event = models.Event
+    query = session.query(Event).filter(Event.is_active == True, Event.next_reminder <= datetime.now())
+    assert "USING INDEX ix_events_is_active_next_reminder" in query_plan(session, query)
+
+
+def test_event_notifications_use_scheduled_index(session):
+    Notification = models.Notification
+    query = session.query(Notification).filter(Notification.event_id == 1).order_by(Notification.scheduled_at)
+    plan = query_plan(session, query)
+    assert "USING INDEX ix_notifications_event_id_scheduled_at" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_db_session_is_lazy_and_commits_once(tmp_path, monkeypatch):
+    from sqlalchemy import event
+
+    from core.database import SessionLocal
+    from utils.decorators import db_session
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(engine)
+    # Привязка фабрики сессий восстанавливается после теста
+    monkeypatch.setitem(SessionLocal.kw, "bind", engine)
+    checkouts, commits = [], []
+    event.listen(engine, "checkout", lambda *args: checkouts.append(1))
+    event.listen(engine, "commit", lambda *args: commits.append(1))
+
+    @db_session
+    def no_db(update, context, db):
+        return "ok"
+
+    @db_session
+    def add_event(update, context, db):
+        db.add(models.Event(
+            creator_id=1, file_name="f", event_name="e", event_date=datetime.now(),
+            next_reminder=datetime.now(), remind_before=1
+        ))
+
+    @db_session
+    def failing(update, context, db):
+        add_event.__wrapped__(update, context, db)
+        raise RuntimeError
+
+    assert no_db(None, None) == "ok"
+    assert not checkouts
+
+    add_event(None, None)
+    assert len(commits) == 1
+
+    with pytest.raises(RuntimeError):
+        failing(None, None)
+    with Session(engine) as db:
+        assert db.query(models.Event).count() == 1
+    engine.dispose()
+
+
+def test_query_reminders_buckets(session):
+    from handlers.commands import query_reminders
+
+    today = datetime(2025, 6, 15).date()
+    noon = datetime(2025, 6, 15, 12, 0)
+
+    def add(name, event_date, remind_before=0, creator_id=1, is_active=True, file_name="b.xlsx"):
+        session.add(models.Event(
+            creator_id=creator_id, file_name=file_name, event_name=name, event_date=event_date,
+            next_reminder=event_date, remind_before=remind_before, is_active=is_active
+        ))
+
+    add("просрочено", noon - timedelta(days=3))
+    add("сегодня", noon)
+    add("сегодня в полночь", datetime(2025, 6, 15), file_name="a.xlsx")
+    add("пора напомнить", noon + timedelta(days=3), remind_before=5)
+    add("срок напоминания сегодня", datetime(2025, 6, 20), remind_before=5)
+    add("рано напоминать", noon + timedelta(days=10), remind_before=1)
+    add("за горизонтом", noon + timedelta(days=40), remind_before=60)
+    add("чужое", noon, creator_id=2)
+    add("удалено", noon, is_active=False)
+    session.commit()
+
+    rows = query_reminders(session, 1, today)
+
+    assert [(bucket, name) for bucket, _, name, _ in rows] == [
+        (0, "просрочено"),
+        (1, "сегодня в полночь"),
+        (1, "сегодня"),
+        (2, "пора напомнить"),
+        (2, "срок напоминания сегодня"),
+    ]
+
+
+def test_event_cache_hits_and_invalidation(session):
+    from services.events.cache import EventCache
+
+    def add(name, creator_id=1):
+        session.add(models.Event(
+            creator_id=creator_id, file_name="a.xlsx", event_name=name, event_date=datetime(2025, 6, 15),
+            next_reminder=datetime(2025, 6, 15), remind_before=0, is_active=True
+        ))
+        session.commit()
+
+    cache = EventCache(max_size=1, ttl=60)
+    add("первое")
+    assert [event.event_name for event in cache.get(session, 1)] == ["первое"]
+
+    add("второе")
+    assert len(cache.get(session, 1)) == 1
+    cache.invalidate(1)
+    assert len(cache.get(session, 1)) == 2
+
+    # Размер ограничен: снимок второго пользователя вытесняет первый
+    cache.get(session, 2)
+    cache.get(session, 1)
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 4
+    assert cache.stats()["size"] == 1
+
+
+def test_async_repository_matches_sync_queries(tmp_path):
+    pytest.importorskip("aiosqlite")
+    import asyncio
+
+    from core.async_database import AsyncSessionLocal, create_async_db_engine
+    from handlers.commands import query_reminders
+    from services.events.async_repository import get_active_events, get_reminders, get_user_event
+    from services.events.cache import load_active_events
+    from services.notifications.async_repository import add_notification
+
+    url = f"sqlite:///{tmp_path / 'test.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    today = datetime.now().date()
+    with Session(engine) as db:
+        for days in (-2, 0, 3, 40):
+            event_date = datetime.combine(today, datetime.min.time()) + timedelta(days=days)
+            db.add(models.Event(
+                creator_id=1, file_name="a.xlsx", event_name=f"через {days}", event_date=event_date,
+                next_reminder=event_date, remind_before=5, is_active=True
+            ))
+        db.commit()
+        expected_events = load_active_events(db, 1)
+        expected_reminders = query_reminders(db, 1, today)
+
+    async def run():
+        async_engine = create_async_db_engine(url)
+        try:
+            async with AsyncSessionLocal(bind=async_engine) as db:
+                events = await get_active_events(db, 1)
+                reminders = await get_reminders(db, 1, today)
+                event = await get_user_event(db, events[0].event_id, 1)
+                await add_notification(db, event.event_id, 1, "TELEGRAM", "SENT")
+                return events, reminders, await get_user_event(db, events[0].event_id, 2)
+        finally:
+            await async_engine.dispose()
+
+    events, reminders, foreign = asyncio.run(run())
+
+    assert events == expected_events
+    assert reminders == expected_reminders
+    assert foreign is None
+    with Session(engine) as db:
+        assert db.query(models.Notification).count() == 1
+    engine.dispose()
@@ -0,0 +1,587 @@
+import sqlite3
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, event, func, select
+
+import models
+from core.database import Base, SessionLocal
+from services.notifications.log_writer import NotificationLogWriter
+
+
+@pytest.fixture
+def db_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(engine)
+    previous_bind = SessionLocal.kw.get("bind")
+    SessionLocal.configure(bind=engine)
+    yield engine
+    SessionLocal.configure(bind=previous_bind)
+    engine.dispose()
+
+
+def _count(engine):
+    with engine.connect() as connection:
+        return connection.execute(select(func.count()).select_from(models.Notification.__table__)).scalar()
+
+
+def test_log_writer_batches_and_flushes_on_shutdown(db_engine):
+    inserts = []
+    event.listen(db_engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: inserts.append(1) if statement.startswith("INSERT") else None)
+
+    writer = NotificationLogWriter(batch_size=3, flush_interval=60)
+    for event_id in range(7):
+        writer.write(event_id=event_id, user_id=10 ** 10, type="TELEGRAM", status="SENT", sent_at=datetime.now())
+
+    writer.flush()
+    assert _count(db_engine) == 7
+    # Две полные пачки по 3 записи и остаток при flush
+    assert len(inserts) == 3
+
+    writer.write(event_id=8, user_id=1, type="EMAIL", status="FAILED", error_message="smtp")
+    writer.shutdown()
+    assert _count(db_engine) == 8
+
+
+def test_log_writer_flushes_by_interval(db_engine):
+    writer = NotificationLogWriter(batch_size=100, flush_interval=0.05)
+    writer.write(event_id=1, user_id=1, type="TELEGRAM", status="SENT")
+
+    for _ in range(100):
+        if _count(db_engine):
+            break
+        writer._thread.join(0.02)
+    assert _count(db_engine) == 1
+    writer.shutdown()
+
+
+def test_log_writer_retries_failed_flush_and_drops_only_rejected_rows(db_engine):
+    failures = []
+
+    def lock_first_insert(conn, cursor, statement, *args):
+        if statement.startswith("INSERT") and not failures:
+            failures.append(1)
+            raise sqlite3.OperationalError("database is locked")
+
+    event.listen(db_engine, "before_cursor_execute", lock_first_insert)
+
+    writer = NotificationLogWriter(batch_size=100, flush_interval=60, retry_delay=0.05)
+    for event_id in range(3):
+        writer.write(event_id=event_id, user_id=1, type="TELEGRAM", status="SENT")
+    # Первая запись пачки падает: записи не теряются, а сохраняются повтором
+    writer.flush()
+    for _ in range(100):
+        if _count(db_engine) == 3:
+            break
+        writer._thread.join(0.02)
+    assert failures == [1]
+    assert _count(db_engine) == 3
+
+    # Строка без типа нарушает NOT NULL: отбрасывается только она
+    writer.write(event_id=4, user_id=1, type=None, status="SENT")
+    writer.write(event_id=5, user_id=1, type="EMAIL", status="SENT")
+    writer.shutdown()
+    assert _count(db_engine) == 4
+
+
+def test_retention_rolls_up_archives_and_keeps_stats(db_engine, tmp_path, monkeypatch):
+    import gzip
+    import json
+    from datetime import timedelta
+
+    from services.notifications import retention
+
+    monkeypatch.setattr(retention, "NOTIFICATION_ARCHIVE_DIR", str(tmp_path / "archive"))
+    now = datetime.now()
+    old = now - timedelta(days=100)
+    rows = (
+        [dict(event_id=1, user_id=1, type="TELEGRAM", status="SENT", scheduled_at=old)] * 5
+        + [dict(event_id=1, user_id=1, type="TELEGRAM", status="FAILED", scheduled_at=old)] * 2
+        + [dict(event_id=2, user_id=1, type="EMAIL", status="SENT", scheduled_at=now)] * 3
+    )
+    with db_engine.begin() as connection:
+        connection.execute(models.Notification.__table__.insert(), rows)
+
+    db = SessionLocal()
+    try:
+        before = retention.delivery_stats(db)
+    finally:
+        db.close()
+
+    assert retention.run_retention(retention_days=90, batch_size=3) == 7
+    assert _count(db_engine) == 3
+
+    db = SessionLocal()
+    try:
+        assert retention.delivery_stats(db) == before == {
+            ("TELEGRAM", "SENT"): 5, ("TELEGRAM", "FAILED"): 2, ("EMAIL", "SENT"): 3
+        }
+        assert retention.delivery_stats(db, event_ids=[1], since=old - timedelta(days=1)) == {
+            ("TELEGRAM", "SENT"): 5, ("TELEGRAM", "FAILED"): 2
+        }
+        assert db.query(models.NotificationDailyStat).count() == 2
+    finally:
+        db.close()
+
+    archive_path = tmp_path / "archive" / f"notifications-{old:%Y-%m}.jsonl.gz"
+    with gzip.open(archive_path, "rt", encoding="utf-8") as f:
+        archived = [json.loads(line) for line in f]
+    assert len(archived) == 7
+
+
+class FakeTelegram:
+    def __init__(self):
+        self.sent = []
+
+    def send_notification(self, db, event, chat_ids):
+        self.sent.append((event.event_name, chat_ids))
+
+
+def test_reminder_sweep_sends_due_batches_and_advances(db_engine):
+    from services.events.recipients import replace_recipients
+    from services.notifications.sweep import ReminderSweep, due_cutoff
+
+    now = datetime(2025, 6, 15, 10, 0)
+    assert due_cutoff(now) == datetime(2025, 6, 16)
+    assert due_cutoff(datetime(2025, 6, 15, 8, 0)) == datetime(2025, 6, 15)
+
+    db = SessionLocal()
+    names = {}
+    for name, next_reminder, is_active in [
+        ("вчера", datetime(2025, 6, 14), True),
+        ("сегодня", datetime(2025, 6, 15), True),
+        ("сегодня 2", datetime(2025, 6, 15, 12, 0), True),
+        ("завтра", datetime(2025, 6, 16), True),
+        ("удалено", datetime(2025, 6, 14), False),
+        ("отправлено", None, True),
+    ]:
+        event_row = models.Event(
+            creator_id=1, file_name="a.xlsx", event_name=name, event_date=datetime(2025, 6, 20),
+            next_reminder=next_reminder, remind_before=5, is_active=is_active
+        )
+        db.add(event_row)
+        db.flush()
+        names[name] = event_row.event_id
+    replace_recipients(db, {event_id: [("TELEGRAM", "100")] for event_id in names.values()})
+    db.commit()
+    db.close()
+
+    telegram = FakeTelegram()
+    assert ReminderSweep(telegram, batch_size=2).run(now) == 3
+    assert sorted(name for name, _ in telegram.sent) == ["вчера", "сегодня", "сегодня 2"]
+    assert telegram.sent[0][1] == ["100"]
+
+    # Повторный обход ничего не отправляет: next_reminder отправленных сброшен
+    assert ReminderSweep(telegram, batch_size=2).run(now) == 0
+    db = SessionLocal()
+    try:
+        remaining = {event_row.event_name for event_row in db.query(models.Event).filter(
+            models.Event.next_reminder.isnot(None))}
+        assert remaining == {"завтра", "удалено"}
+    finally:
+        db.close()
+
+
+def test_reminder_sweep_emails_recipients_from_event_recipients(db_engine, monkeypatch):
+    from services.events.recipients import replace_recipients
+    from services.notifications import email
+    from services.notifications.sweep import ReminderSweep
+
+    for name, value in [("SMTP_USER", "bot"), ("SMTP_PASSWORD", "secret"), ("SENDER_EMAIL", "bot@example.com")]:
+        monkeypatch.setattr(email, name, value)
+    messages = []
+
+    class FakeSMTP:
+        def __init__(self, *args):
+            pass
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            return False
+
+        def login(self, user, password):
+            pass
+
+        def send_message(self, message):
+            messages.append(message["To"])
+
+    monkeypatch.setattr(email.smtplib, "SMTP_SSL", FakeSMTP)
+
+    db = SessionLocal()
+    event_row = models.Event(
+        creator_id=1, file_name="a.xlsx", event_name="отчёт", event_date=datetime(2025, 6, 20),
+        next_reminder=datetime(2025, 6, 15), remind_before=5, is_active=True, responsible_email="old@example.com"
+    )
+    db.add(event_row)
+    db.flush()
+    replace_recipients(db, {event_row.event_id: [("EMAIL", "a@example.com"), ("EMAIL", "b@example.com")]})
+    db.commit()
+    db.close()
+
+    assert ReminderSweep(FakeTelegram(), email.EmailNotifier()).run(datetime(2025, 6, 15, 10, 0)) == 1
+    assert messages == ["a@example.com, b@example.com"]
+
+
+def test_recurrence_clamps_month_end_and_skips_missed_periods():
+    import pandas as pd
+
+    from services.events.recurrence import expand_occurrences, next_occurrences
+
+    dates = pd.Series([datetime(2025, 1, 31, 9, 0), datetime(2025, 2, 28), datetime(2024, 1, 15)])
+    # 28 февраля, урезанное из 31 января, снова даёт 31 марта
+    assert list(next_occurrences(dates, [1, 1, 3], datetime(2025, 3, 1), anchor_days=[31, 31, None])) == [
+        datetime(2025, 3, 31, 9, 0), datetime(2025, 3, 31), datetime(2025, 4, 15)
+    ]
+
+    events = pd.DataFrame({
+        "event_id": [1, 2],
+        "event_date": [datetime(2024, 1, 31), datetime(2024, 1, 31)],
+        "repeat_type": ["Ежемесячно", "Нет"],
+        "periodicity": [1, 0],
+        "remind_before": [3, 3],
+    })
+    forecast = expand_occurrences(events, 3)
+    assert list(forecast["event_id"]) == [1, 1, 1]
+    assert list(forecast["occurrence"]) == [datetime(2024, 1, 31), datetime(2024, 2, 29), datetime(2024, 3, 31)]
+    assert list(forecast["reminder"])[1] == datetime(2024, 2, 26)
+
+
+def test_reminder_sweep_rolls_monthly_events(db_engine):
+    from services.notifications.sweep import ReminderSweep
+
+    db = SessionLocal()
+    db.add_all([
+        # Бот не работал три месяца: пропущенные повторения не отправляются
+        models.Event(
+            creator_id=1, file_name="a.xlsx", event_name="ежемесячно", event_date=datetime(2025, 1, 31),
+            next_reminder=datetime(2025, 1, 29), remind_before=2, is_active=True,
+            repeat_type="Ежемесячно", periodicity=1, anchor_day=31
+        ),
+        models.Event(
+            creator_id=1, file_name="a.xlsx", event_name="разовое", event_date=datetime(2025, 4, 20),
+            next_reminder=datetime(2025, 4, 18), remind_before=2, is_active=True, repeat_type="Нет"
+        ),
+    ])
+    db.commit()
+    db.close()
+
+    assert ReminderSweep(FakeTelegram()).run(datetime(2025, 4, 20, 10, 0)) == 2
+
+    db = SessionLocal()
+    try:
+        events = {event_row.event_name: event_row for event_row in db.query(models.Event)}
+        assert events["ежемесячно"].event_date == datetime(2025, 4, 30)
+        assert events["ежемесячно"].next_reminder == datetime(2025, 4, 28)
+        assert events["разовое"].next_reminder is None
+    finally:
+        db.close()
+
+
+def test_reminder_sweep_skips_past_one_shot_events(db_engine):
+    from services.events.recipients import replace_recipients
+    from services.notifications.sweep import ReminderSweep
+
+    db = SessionLocal()
+    events = [
+        # Импортировано до исправления: дата прошла, напоминание осталось
+        models.Event(
+            creator_id=1, file_name="a.xlsx", event_name="прошло", event_date=datetime(2025, 4, 10),
+            next_reminder=datetime(2025, 4, 5), remind_before=5, is_active=True, repeat_type="Нет"
+        ),
+        models.Event(
+            creator_id=1, file_name="a.xlsx", event_name="сегодня", event_date=datetime(2025, 4, 20),
+            next_reminder=datetime(2025, 4, 15), remind_before=5, is_active=True, repeat_type="Нет"
+        ),
+    ]
+    db.add_all(events)
+    db.flush()
+    replace_recipients(db, {event_row.event_id: [("TELEGRAM", "100")] for event_row in events})
+    db.commit()
+    db.close()
+
+    telegram = FakeTelegram()
+    ReminderSweep(telegram).run(datetime(2025, 4, 20, 10, 0))
+    assert telegram.sent == [("сегодня", ["100"])]
+
+    db = SessionLocal()
+    try:
+        assert db.query(models.Event).filter(models.Event.next_reminder.isnot(None)).count() == 0
+    finally:
+        db.close()
+
+
+def test_reminder_sweep_migration_clears_past_one_shot_reminders(tmp_path, monkeypatch):
+    from datetime import date, timedelta
+    from pathlib import Path
+
+    from alembic import command
+    from alembic.config import Config
+    from sqlalchemy import text
+
+    import core.database
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrated.db'}")
+    monkeypatch.setattr(core.database, "engine", engine)
+    config = Config()
+    config.set_main_option("script_location", str(Path(__file__).resolve().parents[1] / "migrations"))
+    command.upgrade(config, "0008_event_recipients")
+
+    past = datetime.combine(date.today() - timedelta(days=3), datetime.min.time())
+    future = past + timedelta(days=30)
+    with engine.begin() as connection:
+        for name, event_date, repeat_type in [
+            ("прошло", past, "Нет"), ("без повтора", past, None),
+            ("каждый месяц", past, "Ежемесячно"), ("впереди", future, "Нет"),
+        ]:
+            connection.execute(text(
+                "INSERT INTO events (creator_id, file_name, event_name, event_date, next_reminder, remind_before, "
+                "repeat_type, is_active) VALUES (1, 'a.xlsx', :name, :event_date, :next_reminder, 1, :repeat_type, 1)"
+            ), {"name": name, "event_date": event_date, "next_reminder": event_date - timedelta(days=1),
+                "repeat_type": repeat_type})
+
+    command.upgrade(config, "0009_reminder_sweep")
+
+    with engine.connect() as connection:
+        reminders = dict(connection.execute(text("SELECT event_name, next_reminder FROM events")).fetchall())
+    engine.dispose()
+    assert reminders["прошло"] is None
+    assert reminders["без повтора"] is None
+    assert reminders["каждый месяц"] is not None
+    assert reminders["впереди"] is not None
+
+
+def test_reminder_wheel_fires_in_order_and_resumes_from_checkpoint(db_engine):
+    from datetime import timedelta
+
+    from services.events.recipients import replace_recipients
+    from services.notifications.sweep import ReminderSweep
+    from services.notifications.timing_wheel import ReminderWheel, TimingWheel
+
+    wheel = TimingWheel(resolution=1)
+    start = datetime(2025, 6, 15, 8, 0)
+    wheel.schedule(3, start + timedelta(seconds=30))
+    wheel.schedule(1, start + timedelta(seconds=10))
+    wheel.schedule(2, start + timedelta(seconds=10))
+    wheel.schedule(4, start + timedelta(seconds=20))
+    wheel.cancel(4)
+    assert wheel.advance(start) == []
+    assert wheel.advance(start + timedelta(seconds=15)) == [1, 2]
+    # Срабатывание в прошлом ставится в следующий тик
+    wheel.schedule(5, start)
+    assert wheel.advance(start + timedelta(hours=1)) == [5, 3]
+    assert len(wheel) == 0
+
+    db = SessionLocal()
+    db.add_all([
+        models.Event(
+            creator_id=1, file_name="a.xlsx", event_name=name, event_date=next_reminder + timedelta(days=2),
+            next_reminder=next_reminder, remind_before=2, is_active=True,
+            repeat_type=repeat_type, periodicity=1 if repeat_type else None
+        ) for name, next_reminder, repeat_type in [
+            # Просрочено давно: очередь без отметки его не загружает, его досылает обход
+            ("месяц назад", datetime(2025, 5, 15), "Ежемесячно"),
+            ("сегодня", datetime(2025, 6, 15), None),
+            ("ежемесячно", datetime(2025, 6, 15), "Ежемесячно"),
+            ("завтра", datetime(2025, 6, 16), None),
+            ("через неделю", datetime(2025, 6, 22), None),
+        ]
+    ])
+    db.flush()
+    replace_recipients(db, {event_id: [("TELEGRAM", "100")] for event_id, in db.query(models.Event.event_id)})
+    db.commit()
+    db.close()
+
+    reminders = ReminderWheel(name="test", horizon_hours=24)
+    # Окно 24 часа заканчивается завтра в 08:00: в очереди только сегодняшние напоминания
+    assert reminders.load(start) == 2
+    telegram = FakeTelegram()
+    sweep = ReminderSweep(telegram, on_advanced=reminders.update)
+    assert reminders.tick(sweep, start + timedelta(minutes=59)) == 0
+    assert reminders.tick(sweep, start + timedelta(hours=1)) == 2
+    assert sorted(name for name, _ in telegram.sent) == ["ежемесячно", "сегодня"]
+    # Следующее повторение через месяц — за горизонтом; окно сдвигается и подхватывает «завтра»
+    assert len(reminders) == 0
+    assert reminders.tick(sweep, start + timedelta(hours=2)) == 0
+    assert len(reminders) == 1
+
+    db = SessionLocal()
+    try:
+        checkpoint = db.query(models.ReminderCheckpoint).get("test")
+        assert checkpoint.watermark == start + timedelta(hours=1)
+    finally:
+        db.close()
+
+    # После перезапуска история до отметки не перечитывается, окно продлевается по времени
+    restarted = ReminderWheel(name="test", horizon_hours=24)
+    assert restarted.load(start + timedelta(hours=2)) == 1
+    assert restarted.tick(sweep, datetime(2025, 6, 16, 9, 0)) == 1
+    assert telegram.sent[-1][0] == "завтра"
+
+
+class FileTelegram:
+    """Отправка в общий файл: журнал рассылки нескольких процессов"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def send_notification(self, db, event, chat_ids):
+        import time
+
+        with open(self.path, "a") as f:
+            f.write(f"{event.event_id}\n")
+        time.sleep(0.002)
+
+
+def _sweep_worker(url, path, barrier, results):
+    from core.database import create_db_engine
+    from services.notifications.sweep import ReminderSweep
+
+    SessionLocal.configure(bind=create_db_engine(url))
+    barrier.wait()
+    results.put(ReminderSweep(FileTelegram(path), batch_size=20).run(datetime(2025, 6, 15, 10, 0)))
+
+
+def test_reminder_leases_split_due_events_between_processes(db_engine, tmp_path):
+    import multiprocessing
+    from datetime import timedelta
+
+    from services.events.recipients import replace_recipients
+
+    db = SessionLocal()
+    events = [
+        models.Event(
+            creator_id=1, file_name="a.xlsx", event_name=f"событие {number}", event_date=datetime(2025, 6, 20),
+            next_reminder=datetime(2025, 6, 15), remind_before=5, is_active=True
+        ) for number in range(300)
+    ]
+    # Аренда упавшего процесса истекла — событие забирает другой процесс;
+    # действующую аренду работающего процесса не трогают
+    events[0].lease_token, events[0].lease_expires_at = "crashed", datetime.now() - timedelta(minutes=1)
+    events[1].lease_token, events[1].lease_expires_at = "alive", datetime.now() + timedelta(minutes=5)
+    db.add_all(events)
+    db.flush()
+    replace_recipients(db, {event_row.event_id: [("TELEGRAM", "100")] for event_row in events})
+    db.commit()
+    busy_id = events[1].event_id
+    db.close()
+
+    path = tmp_path / "sent.txt"
+    context = multiprocessing.get_context("spawn")
+    barrier, results = context.Barrier(3), context.Queue()
+    workers = [
+        context.Process(target=_sweep_worker, args=(str(db_engine.url), str(path), barrier, results))
+        for _ in range(3)
+    ]
+    for worker in workers:
+        worker.start()
+    counts = [results.get(timeout=60) for _ in workers]
+    for worker in workers:
+        worker.join(timeout=60)
+        assert worker.exitcode == 0
+
+    sent = [int(line) for line in path.read_text().split()]
+    assert len(sent) == len(set(sent)) == sum(counts) == 299
+    assert busy_id not in sent
+    # Пачки разошлись по процессам
+    assert sum(1 for count in counts if count) > 1
+
+    db = SessionLocal()
+    try:
+        assert db.query(models.Event).filter(models.Event.lease_token.isnot(None)).count() == 1
+    finally:
+        db.close()
+
+
+def test_reminder_lease_is_renewed_and_checked_when_batch_outlives_it(db_engine):
+    import threading
+    import time
+    from datetime import timedelta
+
+    from services.events.recipients import replace_recipients
+    from services.notifications.leases import Lease
+    from services.notifications.sweep import ReminderSweep
+
+    db = SessionLocal()
+    events = [
+        models.Event(
+            creator_id=1, file_name="a.xlsx", event_name=f"событие {number}", event_date=datetime(2025, 6, 20),
+            next_reminder=datetime(2025, 6, 15), remind_before=5, is_active=True
+        ) for number in range(5)
+    ]
+    db.add_all(events)
+    db.flush()
+    replace_recipients(db, {event_row.event_id: [("TELEGRAM", "100")] for event_row in events})
+    db.commit()
+    db.close()
+
+    # Продление аренды не фиксирует сессию отправки: события пачки не перечитываются по одному
+    reloads = []
+    event.listen(db_engine, "before_cursor_execute", lambda conn, cursor, statement, *args: reloads.append(
+        statement) if statement.startswith("SELECT") and "WHERE events.event_id = ?" in statement else None)
+
+    class SlowTelegram(FakeTelegram):
+        def send_notification(self, db, event, chat_ids):
+            time.sleep(0.4)
+            super().send_notification(db, event, chat_ids)
+
+    now = datetime(2025, 6, 15, 10, 0)
+    slow, fast = SlowTelegram(), FakeTelegram()
+    # Пачка отправляется дольше срока аренды в 1 секунду: аренда продлевается по ходу отправки
+    worker = threading.Thread(target=ReminderSweep(slow, lease_seconds=1).run, args=(now,))
+    worker.start()
+    time.sleep(1.5)
+    assert ReminderSweep(fast).run(now) == 0
+    worker.join()
+    assert len(slow.sent) == 5 and fast.sent == []
+    assert reloads == []
+
+    # Аренду, которую забрал другой процесс, сдвиг не снимает и не перезаписывает
+    db = SessionLocal()
+    try:
+        event_row = db.query(models.Event).first()
+        event_row.next_reminder = datetime(2025, 6, 15)
+        event_row.lease_token, event_row.lease_expires_at = "other", datetime.now() + timedelta(minutes=5)
+        db.commit()
+        Lease().release(db, [{"event_id": event_row.event_id, "next_reminder": None}])
+        db.commit()
+        db.refresh(event_row)
+        assert (event_row.lease_token, event_row.next_reminder) == ("other", datetime(2025, 6, 15))
+    finally:
+        db.close()
+
+
+def test_reminder_jobs_reuse_one_sweep(monkeypatch):
+    from services.notifications import email, sweep, telegram
+
+    created = []
+    monkeypatch.setattr(telegram, "TelegramNotifier", lambda: created.append("telegram") or FakeTelegram())
+    monkeypatch.setattr(email, "EmailNotifier", lambda: created.append("email") or None)
+    monkeypatch.setattr(sweep, "_default_sweep", None)
+    monkeypatch.setattr(sweep.ReminderSweep, "run", lambda self, now=None: 0)
+
+    for _ in range(3):
+        sweep.reminder_sweep_job(None)
+    assert sweep.default_sweep() is sweep.default_sweep()
+    assert sorted(created) == ["email", "telegram"]
+
+
+def test_periodic_jobs_share_the_bot_job_queue(db_engine):
+    from telegram.ext import Updater
+
+    from services.notifications.timing_wheel import reminder_wheel
+    from services.scheduler.jobs import register_jobs
+
+    # Updater без запуска опроса не обращается к Telegram
+    updater = Updater("123456:TEST", use_context=True)
+    try:
+        register_jobs(updater.job_queue)
+        assert sorted(job.name for job in updater.job_queue.jobs()) == [
+            "import_jobs", "notification_retention", "reminder_sweep", "reminder_wheel"
+        ]
+        assert reminder_wheel.horizon_end is not None
+    finally:
+        reminder_wheel.horizon_end = None
+        updater.job_queue.stop()
@@ -0,0 +1,89 @@
+import re
+from datetime import datetime
+from functools import lru_cache
+
+import pandas as pd
+
+# Поддерживаемые форматы дат в порядке приоритета
+DATE_FORMATS = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d", "%d.%m.%Y")
+
+# Сколько значений колонки просматривается для определения формата
+SAMPLE_SIZE = 100
+
+# Размер кэша разбора отдельных строк
+DATE_CACHE_SIZE = 4096
+
+_TOKENS = {"%Y": r"\d{4}", "%m": r"\d{1,2}", "%d": r"\d{1,2}", "%H": r"\d{1,2}", "%M": r"\d{1,2}", "%S": r"\d{1,2}"}
+
+
+@lru_cache(maxsize=None)
+def _format_pattern(date_format):
+    """Регулярное выражение формата: отсекает заведомо неподходящие строки без исключений strptime"""
+    parts = re.split(r"(%[YmdHMS])", date_format)
+    return re.compile("".join(_TOKENS.get(part, re.escape(part)) for part in parts))
+
+
+def _matches(value, date_format):
+    return _format_pattern(date_format).fullmatch(value) is not None
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def parse_date(value, formats=DATE_FORMATS):
+    """
+    Разбор одной строки даты с кэшированием.
+
+    Args:
+        value: строка с датой
+        formats: допустимые форматы в порядке приоритета
+
+    Returns:
+        datetime или None, если строка не соответствует ни одному формату
+    """
+    value = value.strip()
+    for date_format in formats:
+        if not _matches(value, date_format):
+            continue
+        try:
+            return datetime.strptime(value, date_format)
+        except ValueError:
+            # Форма совпала, но значение невозможно (например, 31.02.2024)
+            continue
+    return None
+
+
+def infer_date_format(series, formats=DATE_FORMATS):
+    """
+    Определение формата колонки по выборке значений.
+
+    Returns:
+        формат, которому соответствует больше всего значений выборки, или None
+    """
+    sample = series.dropna().head(SAMPLE_SIZE)
+    best_format, best_count = None, 0
+    for date_format in formats:
+        count = sum(1 for value in sample if _matches(str(value).strip(), date_format))
+        if count > best_count:
+            best_format, best_count = date_format, count
+    return best_format
+
+
+def parse_date_column(series, formats=DATE_FORMATS):
+    """
+    Разбор колонки дат целиком.
+
+    Основной формат определяется по выборке и применяется ко всей колонке
+    векторно; остальные форматы пробуются только для оставшихся значений.
+
+    Returns:
+        Series datetime64, NaT для нераспознанных значений
+    """
+    parsed = pd.Series(pd.NaT, index=series.index, dtype="datetime64[ns]")
+    inferred = infer_date_format(series, formats)
+    ordered = ([inferred] if inferred else []) + [f for f in formats if f != inferred]
+
+    for date_format in ordered:
+        pending = parsed.isna() & series.notna()
+        if not pending.any():
+            break
+        parsed[pending] = pd.to_datetime(series[pending], format=date_format, errors="coerce")
+    return parsed
@@ -0,0 +1,33 @@
+import logging
+from functools import wraps
+
+from core.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+def db_session(handler):
+    """
+    Одна сессия базы данных на обработку одного обновления Telegram.
+
+    Сессия передаётся обработчику аргументом db. Соединение берётся из пула
+    только при первом запросе, поэтому обработчики, не обращающиеся к базе,
+    соединение не занимают. После обработчика незафиксированные изменения
+    сохраняются одним commit, при исключении — откатываются; сессия всегда
+    закрывается. Обработчик может вызвать db.commit() сам, если ответ
+    пользователю должен уходить только после сохранения.
+    """
+    @wraps(handler)
+    def wrapper(update, context, *args, **kwargs):
+        db = SessionLocal()
+        try:
+            result = handler(update, context, *args, db=db, **kwargs)
+            db.commit()
+            return result
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    return wrapper